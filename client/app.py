@@ -86,12 +86,30 @@ if not API_BASE_URL:
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
+# Messages loaded per history page
+HISTORY_PAGE_SIZE = 20
+
+# The thread ID is kept in the URL so a browser refresh resumes the conversation
 if "thread_id" not in st.session_state:
-    st.session_state.thread_id = str(uuid.uuid4())
+    st.session_state.thread_id = st.query_params.get("thread") or str(uuid.uuid4())
+    st.query_params["thread"] = st.session_state.thread_id
+
+# Cursor of the next older history page (None when there is nothing older)
+if "history_before" not in st.session_state:
+    st.session_state.history_before = None
+
+if "history_loaded" not in st.session_state:
+    st.session_state.history_loaded = False
 
 if "api_connected" not in st.session_state:
     st.session_state.api_connected = False
 
+if "pending_message" not in st.session_state:
+    st.session_state.pending_message = None
+
+if "pending_key" not in st.session_state:
+    st.session_state.pending_key = None
+
 # Functions
 def check_api_connection():
     """Check if the API is available"""
@@ -101,27 +119,100 @@ def check_api_connection():
     except:
         return False
 
-def send_message(message: str, thread_id: str):
-    """Send message to the API"""
+def fetch_history(thread_id: str, before: int = None):
+    """Fetch a page of the thread's transcript; returns (messages, next_before) or None on failure"""
+    params = {"limit": HISTORY_PAGE_SIZE}
+    if before is not None:
+        params["before"] = before
     try:
-        payload = {
-            "message": message,
-            "thread_id": thread_id
-        }
-        response = requests.post(
-            f"{API_BASE_URL}/chat",
-            json=payload,
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return {"error": f"API Error: {response.status_code}"}
-    except requests.exceptions.Timeout:
-        return {"error": "Request timeout. The assistant might be processing your request."}
-    except Exception as e:
-        return {"error": f"Connection error: {str(e)}"}
+        response = requests.get(f"{API_BASE_URL}/threads/{thread_id}/messages", params=params, timeout=10)
+        if response.status_code != 200:
+            return None
+        page = response.json()
+        return page["messages"], page["next_before"]
+    except Exception:
+        return None
+
+def load_latest_history():
+    """Show only the newest page of the thread; older pages are fetched on demand"""
+    page = fetch_history(st.session_state.thread_id)
+    if page is not None:
+        st.session_state.messages, st.session_state.history_before = page
+        st.session_state.history_loaded = True
+
+def load_older_history():
+    """Prepend the next older page of the thread"""
+    page = fetch_history(st.session_state.thread_id, st.session_state.history_before)
+    if page is not None:
+        older, st.session_state.history_before = page
+        st.session_state.messages = older + st.session_state.messages
+
+def stream_message(message: str, thread_id: str, idempotency_key: str, attempts: int = 2):
+    """Send message to the streaming API and yield its events
+    
+    The idempotency key makes retries safe: a retried message is answered
+    with the first attempt's reply instead of being run again.
+    """
+    payload = {
+        "message": message,
+        "thread_id": thread_id,
+        "idempotency_key": idempotency_key
+    }
+    for attempt in range(attempts):
+        try:
+            with requests.post(
+                f"{API_BASE_URL}/chat/stream",
+                json=payload,
+                stream=True,
+                timeout=(5, 60)
+            ) as response:
+                if response.status_code != 200:
+                    yield {"type": "error", "detail": f"API Error: {response.status_code}"}
+                    return
+                
+                # Server-Sent Events: each frame's payload is on a "data:" line
+                for line in response.iter_lines(decode_unicode=True):
+                    if line and line.startswith("data:"):
+                        yield json.loads(line[len("data:"):].strip())
+                return
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            if attempt + 1 < attempts:
+                continue
+            if isinstance(e, requests.exceptions.Timeout):
+                yield {"type": "error", "detail": "Request timeout. The assistant might be processing your request."}
+            else:
+                yield {"type": "error", "detail": f"Connection error: {str(e)}"}
+        except Exception as e:
+            yield {"type": "error", "detail": f"Connection error: {str(e)}"}
+            return
+
+def render_streamed_reply(message: str, thread_id: str, idempotency_key: str) -> str:
+    """Render the assistant's reply incrementally and return the final text"""
+    status = st.empty()
+    placeholder = st.empty()
+    reply = ""
+    
+    for event in stream_message(message, thread_id, idempotency_key):
+        if event["type"] == "token":
+            reply += event["content"]
+            placeholder.markdown(f"""
+            <div class="chat-message assistant-message">
+                <strong>Assistant:</strong> {reply}▌
+            </div>
+            """, unsafe_allow_html=True)
+        elif event["type"] == "tool_start":
+            status.caption(f"🔧 Running {event['name']}...")
+        elif event["type"] == "tool_end":
+            status.caption(f"✅ Finished {event['name']}")
+        elif event["type"] == "done":
+            reply = event["response"]
+        elif event["type"] == "error":
+            st.error(f"Error: {event['detail']}")
+            reply = f"Sorry, I encountered an error: {event['detail']}"
+    
+    status.empty()
+    placeholder.empty()
+    return reply
 
 def get_api_status():
     """Get API status information"""
@@ -163,11 +254,14 @@ with st.sidebar:
     
     if st.button("New Session"):
         st.session_state.thread_id = str(uuid.uuid4())
+        st.query_params["thread"] = st.session_state.thread_id
         st.session_state.messages = []
+        st.session_state.history_before = None
         st.rerun()
     
     if st.button("Clear Chat"):
         st.session_state.messages = []
+        st.session_state.history_before = None
         st.rerun()
     
     # Instructions
@@ -193,6 +287,10 @@ st.header("Chat with your Calendar Assistant")
 if not st.session_state.api_connected:
     st.session_state.api_connected = check_api_connection()
 
+# Rebuild the conversation from the server after a browser refresh
+if st.session_state.api_connected and not st.session_state.history_loaded:
+    load_latest_history()
+
 if not st.session_state.api_connected:
     st.warning("⚠️ Cannot connect to the Calendar Assistant API. Please make sure the FastAPI server is running.")
     st.code("python fastapi_server.py", language="bash")
@@ -200,6 +298,9 @@ if not st.session_state.api_connected:
 # Display chat messages
 chat_container = st.container()
 with chat_container:
+    if st.session_state.history_before is not None:
+        st.button("Load earlier messages", on_click=load_older_history)
+    
     for message in st.session_state.messages:
         if message["role"] == "user":
             st.markdown(f"""
@@ -213,6 +314,20 @@ with chat_container:
                 <strong>Assistant:</strong> {message["content"]}
             </div>
             """, unsafe_allow_html=True)
+    
+    # Stream the reply to a message queued by the input callbacks
+    if st.session_state.pending_message:
+        user_message = st.session_state.pending_message
+        idempotency_key = st.session_state.pending_key
+        st.session_state.pending_message = None
+        reply = render_streamed_reply(user_message, st.session_state.thread_id, idempotency_key)
+        st.session_state.messages.append({
+            "role": "assistant",
+            "content": reply
+        })
+        # Keep the rendered transcript to the newest page, as stored by the server
+        load_latest_history()
+        st.rerun()
 
 
 # --- START OF CHANGES ---
@@ -221,7 +336,8 @@ with chat_container:
 def handle_send_click():
     """Handles the logic when the send button is clicked."""
     # We check if the input is not empty before processing.
-    if st.session_state.user_input:
+    # Enter and the Send button can both fire for one message; only the first counts.
+    if st.session_state.user_input and st.session_state.pending_message is None:
         user_message = st.session_state.user_input
         
         # Add user message to chat history
@@ -230,23 +346,10 @@ def handle_send_click():
             "content": user_message
         })
         
-        # Show a spinner while the assistant is thinking
-        with st.spinner("Calendar Assistant is thinking..."):
-            # Send message to API
-            response = send_message(user_message, st.session_state.thread_id)
-        
-        # Handle the API response
-        if "error" in response:
-            st.error(f"Error: {response['error']}")
-            st.session_state.messages.append({
-                "role": "assistant",
-                "content": f"Sorry, I encountered an error: {response['error']}"
-            })
-        else:
-            st.session_state.messages.append({
-                "role": "assistant",
-                "content": response["response"]
-            })
+        # Queue the message; the reply is streamed into the chat container on rerun
+        st.session_state.pending_message = user_message
+        # One key per message, reused by every retry of it
+        st.session_state.pending_key = str(uuid.uuid4())
         
         # 2. This is the key change: Clearing the input by setting its session state value.
         # This is allowed within a callback function like this one.
@@ -302,20 +405,13 @@ if st.session_state.api_connected:
     for i, action in enumerate(quick_actions):
         with [col1, col2, col3, col4][i]:
             if st.button(action, key=f"quick_action_{i}"):
-                # Add message and get response
+                # Add message and queue it for streaming
                 st.session_state.messages.append({
                     "role": "user",
                     "content": action
                 })
-                
-                with st.spinner("Processing..."):
-                    response = send_message(action, st.session_state.thread_id)
-                
-                if "error" not in response:
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": response["response"]
-                    })
+                st.session_state.pending_message = action
+                st.session_state.pending_key = str(uuid.uuid4())
                 
                 st.rerun()
 
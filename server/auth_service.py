@@ -1,50 +1,167 @@
 import os
+import tempfile
+import threading
+from datetime import datetime, timezone
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import InstalledAppFlow
-from config import SCOPES, CREDENTIALS_FILE, TOKEN_FILE, OAUTH_PORT
+from file_lock import FileLock
+from telemetry import AUTH_REFRESH_SECONDS, trace
+from config import (
+    SCOPES, CREDENTIALS_FILE, TOKEN_FILE, OAUTH_PORT,
+    TOKEN_REFRESH_MARGIN_SECONDS, TOKEN_REFRESH_RETRY_SECONDS
+)
+
+
+def _seconds_left(creds: Credentials) -> float:
+    """Seconds until the credentials' token expires (infinite if no expiry is known)."""
+    if creds.expiry is None:
+        return float("inf")
+    return (creds.expiry - datetime.now(timezone.utc).replace(tzinfo=None)).total_seconds()
 
 
 class GoogleAuthService:
     """Service for handling Google OAuth authentication."""
     
-    def __init__(self):
+    def __init__(self, token_file: str = None, interactive: bool = True):
+        """
+        Args:
+            token_file: Where this user's token is stored (defaults to TOKEN_FILE)
+            interactive: Whether the browser OAuth flow may be launched by default
+        """
         self.scopes = SCOPES
         self.credentials_file = CREDENTIALS_FILE
-        self.token_file = TOKEN_FILE
+        self.token_file = token_file or TOKEN_FILE
+        self.interactive = interactive
         self.oauth_port = OAUTH_PORT
+        self.refresh_margin = TOKEN_REFRESH_MARGIN_SECONDS
+        self._creds = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._refresh_thread = None
+        self.refresh_count = 0
+        self.adopted_count = 0
+        self.last_refresh_at = None
+        self._listeners = []
     
-    def get_access_token(self) -> Credentials:
+    def add_credentials_listener(self, callback):
+        """
+        Register a callback run with the new credentials whenever they are replaced.
+        
+        In-place refreshes keep the same credentials object, so callbacks only
+        run when a different object is loaded or obtained through OAuth.
+        """
+        self._listeners.append(callback)
+    
+    def get_access_token(self, interactive: bool = None) -> Credentials:
         """
         Get valid Google OAuth credentials.
         
+        Credentials are held in memory after the first load; the token file is
+        only touched when the cached credentials are missing or no longer valid.
+        
+        Args:
+            interactive: Whether the browser OAuth flow may be launched
+                (defaults to the service's setting)
+        
         Returns:
             Credentials: Valid Google OAuth credentials
         """
-        creds = None
+        creds = self._creds
+        if creds and creds.valid:
+            return creds
+        if interactive is None:
+            interactive = self.interactive
         
-        # Load existing credentials if available
-        if os.path.exists(self.token_file):
-            creds = Credentials.from_authorized_user_file(self.token_file, self.scopes)
+        # Single-flight: only one caller loads or refreshes, the rest reuse its result
+        with self._lock:
+            creds = self._creds
+            if creds and creds.valid:
+                return creds
         
-        # If credentials are not valid, refresh or get new ones
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                try:
-                    creds.refresh(Request())
-                except Exception as e:
-                    print(f"Error refreshing token: {e}")
-                    creds = self._get_new_credentials()
-            else:
-                creds = self._get_new_credentials()
-            
-            # Save the credentials for future use
-            self._save_credentials(creds)
+            # Load existing credentials if available
+            if creds is None and os.path.exists(self.token_file):
+                creds = Credentials.from_authorized_user_file(self.token_file, self.scopes)
+        
+            # If credentials are not valid, refresh or get new ones
+            if not creds or not creds.valid:
+                if creds and creds.expired and creds.refresh_token:
+                    try:
+                        self._refresh_shared(creds)
+                    except Exception as e:
+                        print(f"Error refreshing token: {e}")
+                        creds = self._get_new_credentials(interactive)
+                        self._save_credentials(creds)
+                else:
+                    creds = self._get_new_credentials(interactive)
+                    # Save the credentials for future use
+                    self._save_credentials(creds)
+        
+            replaced = creds is not self._creds
+            self._creds = creds
         
+        if replaced:
+            for callback in self._listeners:
+                callback(creds)
+        self.start_background_refresh()
         return creds
     
-    def _get_new_credentials(self) -> Credentials:
+    def reload_credentials(self) -> Credentials:
+        """
+        Drop the cached credentials and load them again from the token file.
+        
+        Used after the token file was replaced (e.g. re-authorized or switched
+        to another account); listeners receive the reloaded credentials.
+        
+        Returns:
+            Credentials: Valid Google OAuth credentials
+        """
+        with self._lock:
+            self._creds = None
+        return self.get_access_token()
+    
+    def _refresh(self, creds: Credentials):
+        """Refresh credentials in place so every holder sees the new token."""
+        with trace(AUTH_REFRESH_SECONDS, "auth.refresh"):
+            creds.refresh(Request())
+        self.refresh_count += 1
+        self.last_refresh_at = datetime.now(timezone.utc)
+    
+    def _refresh_shared(self, creds: Credentials, margin: float = 0.0):
+        """
+        Refresh credentials unless another process sharing the token file already did.
+        
+        The token file's lock lets one process at a time refresh; processes
+        that were waiting take over the token it saved instead of refreshing
+        the same token again.
+        
+        Args:
+            creds: Credentials to bring up to date (updated in place)
+            margin: Seconds of remaining validity that make a refresh unnecessary
+        """
+        with FileLock(self.token_file + ".lock"):
+            if self._adopt_saved_token(creds) and _seconds_left(creds) > margin:
+                return
+            self._refresh(creds)
+            self._save_credentials(creds)
+    
+    def _adopt_saved_token(self, creds: Credentials) -> bool:
+        """Copy a newer token from the token file into creds; returns whether creds are valid."""
+        if os.path.exists(self.token_file):
+            saved = Credentials.from_authorized_user_file(self.token_file, self.scopes)
+            if saved.valid and saved.token != creds.token and (
+                creds.expiry is None or (saved.expiry is not None and saved.expiry > creds.expiry)
+            ):
+                creds.token = saved.token
+                creds.expiry = saved.expiry
+                self.adopted_count += 1
+        return creds.valid
+    
+    def _get_new_credentials(self, interactive: bool = True) -> Credentials:
         """Get new credentials through OAuth flow."""
+        if not interactive:
+            raise PermissionError("Interactive OAuth flow required but not allowed")
+        
         if not os.path.exists(self.credentials_file):
             raise FileNotFoundError(
                 f"Credentials file '{self.credentials_file}' not found. "
@@ -52,19 +169,87 @@ class GoogleAuthService:
             )
         
         flow = InstalledAppFlow.from_client_secrets_file(
-            self.credentials_file, 
+            self.credentials_file,
             self.scopes
         )
         creds = flow.run_local_server(port=self.oauth_port)
         return creds
     
     def _save_credentials(self, creds: Credentials):
-        """Save credentials to token file."""
-        with open(self.token_file, "w") as token:
-            token.write(creds.to_json())
+        """Atomically save credentials to the token file."""
+        token_dir = os.path.dirname(os.path.abspath(self.token_file))
+        fd, tmp_path = tempfile.mkstemp(dir=token_dir, prefix=".token-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w") as token:
+                token.write(creds.to_json())
+            os.replace(tmp_path, self.token_file)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+    
+    def get_token_expiry(self):
+        """Get the cached token's expiry (naive UTC), or None if unknown."""
+        creds = self._creds
+        return creds.expiry if creds else None
+    
+    def _seconds_until_refresh(self) -> float:
+        """Seconds to wait before the next proactive refresh."""
+        creds = self._creds
+        if not creds or not creds.refresh_token or creds.expiry is None:
+            return TOKEN_REFRESH_RETRY_SECONDS
+        remaining = (creds.expiry - datetime.now(timezone.utc).replace(tzinfo=None)).total_seconds()
+        return max(1.0, remaining - self.refresh_margin)
+    
+    def refresh_if_expiring(self):
+        """Refresh the cached credentials if they expire within the refresh margin."""
+        with self._lock:
+            creds = self._creds
+            if not creds or not creds.refresh_token:
+                return
+            if creds.valid and self._seconds_until_refresh() > 1.0:
+                return
+            self._refresh_shared(creds, margin=self.refresh_margin + 1.0)
+    
+    def _refresh_loop(self):
+        """Background loop that refreshes the token ahead of expiry."""
+        while not self._stop_event.wait(self._seconds_until_refresh()):
+            try:
+                self.refresh_if_expiring()
+            except Exception as e:
+                print(f"Background token refresh failed: {e}")
+                if self._stop_event.wait(TOKEN_REFRESH_RETRY_SECONDS):
+                    break
+    
+    def start_background_refresh(self):
+        """Start the proactive refresh thread if it is not already running."""
+        if self._refresh_thread is not None or self._creds is None:
+            return
+        with self._lock:
+            if self._refresh_thread is None:
+                self._refresh_thread = threading.Thread(
+                    target=self._refresh_loop,
+                    name="token-refresh",
+                    daemon=True
+                )
+                self._refresh_thread.start()
+    
+    def stop_background_refresh(self):
+        """Stop the proactive refresh thread."""
+        self._stop_event.set()
+    
+    def check_authenticated(self) -> bool:
+        """Check authentication without ever launching the interactive OAuth flow."""
+        try:
+            creds = self.get_access_token(interactive=False)
+            return creds.valid
+        except Exception:
+            return False
     
     def is_authenticated(self) -> bool:
         """Check if user is authenticated."""
+        creds = self._creds
+        if creds is not None and creds.valid:
+            return True
         try:
             creds = self.get_access_token()
             return creds and creds.valid
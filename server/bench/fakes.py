@@ -0,0 +1,321 @@
+"""
+Offline stand-ins for Gemini and Google Calendar, for benchmarks.
+
+``install()`` patches the agent stack in-process so the real FastAPI app,
+CalendarAgent graph, tools, caches and checkpointer run unchanged, while
+the chat model is scripted and Calendar API requests, sent through the
+real transport and discovery-built clients, are answered from memory.
+"""
+import asyncio
+import email
+import itertools
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from urllib.parse import parse_qs, unquote, urlparse
+
+import httplib2
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+# The real ID of the fake account's primary calendar, which "primary" aliases
+PRIMARY_CALENDAR_ID = "bench@example.com"
+CALENDARS_INFO = json.dumps([{"id": PRIMARY_CALENDAR_ID, "summary": "Primary", "timeZone": "UTC"}])
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _with_offsets(event: dict) -> dict:
+    """Give local dateTimes their zone's offset, as the real API returns them."""
+    for key in ("start", "end"):
+        value = event.get(key) or {}
+        if "dateTime" in value and value.get("timeZone"):
+            moment = _parse_time(value["dateTime"])
+            if moment.tzinfo is None:
+                value["dateTime"] = moment.replace(tzinfo=ZoneInfo(value["timeZone"])).isoformat()
+    return event
+
+
+def _real_calendar_id(calendar_id: str) -> str:
+    return PRIMARY_CALENDAR_ID if calendar_id == "primary" else calendar_id
+
+
+def _event_start(event: dict) -> str:
+    return event["start"].get("dateTime") or event["start"].get("date", "")
+
+
+class FakeCalendarHttp:
+    """
+    In-memory Google Calendar v3 backend behind the httplib2 interface.
+
+    Supports the calls the tools, conflict index and event mirror make:
+    calendarList, calendars get, events list (with timeMin/timeMax), get,
+    insert, patch, update, delete and multipart batch requests. Thread-safe.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        """
+        Args:
+            latency: Seconds added to every HTTP round trip
+        """
+        self.latency = latency
+        self.events = {PRIMARY_CALENDAR_ID: {}}
+        self.requests = 0
+        self.connections = {}
+        self._lock = threading.Lock()
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def _response(status: int, body=None):
+        headers = {"status": status, "content-type": "application/json"}
+        if body is None:
+            return httplib2.Response(headers), b""
+        return httplib2.Response(headers), json.dumps(body).encode()
+
+    def _not_found(self):
+        return self._response(404, {"error": {"code": 404, "message": "Not Found"}})
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if "/batch/" in uri:
+            return self._batch(body, headers or {})
+        with self._lock:
+            return self._handle(uri, method, body)
+
+    def _handle(self, uri: str, method: str, body):
+        url = urlparse(uri)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        parts = [unquote(part) for part in url.path.split("/") if part]
+        parts = parts[parts.index("v3") + 1:]
+
+        if parts[:3] == ["users", "me", "calendarList"]:
+            return self._response(200, {"items": [
+                {
+                    "id": calendar_id, "summary": calendar_id, "timeZone": "UTC", "accessRole": "owner",
+                    "primary": calendar_id == PRIMARY_CALENDAR_ID,
+                }
+                for calendar_id in self.events
+            ]})
+
+        calendar_id = _real_calendar_id(parts[1])
+        if len(parts) == 2:
+            return self._response(200, {"id": calendar_id, "summary": calendar_id, "timeZone": "UTC"})
+        store = self.events.setdefault(calendar_id, {})
+        if len(parts) == 3:
+            if method == "GET":
+                return self._response(200, self._list(store, query))
+            event = _with_offsets(json.loads(body))
+            event["id"] = uuid.uuid4().hex
+            event["htmlLink"] = f"https://calendar.example/event/{event['id']}"
+            event["status"] = "confirmed"
+            store[event["id"]] = event
+            return self._response(200, event)
+
+        event_id = parts[3]
+        if parts[4:] == ["move"]:
+            event = store.pop(event_id, None)
+            if event is None:
+                return self._not_found()
+            self.events.setdefault(_real_calendar_id(query["destination"]), {})[event_id] = event
+            return self._response(200, event)
+        if event_id not in store:
+            return self._not_found()
+        if method == "DELETE":
+            del store[event_id]
+            return self._response(204)
+        if method == "GET":
+            return self._response(200, store[event_id])
+        if method == "PATCH":
+            store[event_id].update(_with_offsets(json.loads(body)))
+            return self._response(200, store[event_id])
+        event = _with_offsets(json.loads(body))
+        event["id"] = event_id
+        store[event_id] = event
+        return self._response(200, event)
+
+    @staticmethod
+    def _list(store: dict, query: dict) -> dict:
+        time_min = _parse_time(query["timeMin"]) if "timeMin" in query else None
+        time_max = _parse_time(query["timeMax"]) if "timeMax" in query else None
+        items = []
+        for event in sorted(store.values(), key=_event_start):
+            if "dateTime" in event["start"] and (time_min or time_max):
+                start, end = _parse_time(event["start"]["dateTime"]), _parse_time(event["end"]["dateTime"])
+                if (time_max and start >= time_max) or (time_min and end <= time_min):
+                    continue
+            items.append(event)
+        if "maxResults" in query:
+            items = items[:int(query["maxResults"])]
+        return {"items": items, "nextSyncToken": uuid.uuid4().hex}
+
+    def _batch(self, body, headers: dict):
+        if isinstance(body, bytes):
+            body = body.decode()
+        message = email.message_from_string(f"Content-Type: {headers['content-type']}\r\n\r\n" + body)
+        parts = []
+        for part in message.get_payload():
+            raw = part.get_payload()
+            separator = "\r\n\r\n" if "\r\n\r\n" in raw else "\n\n"
+            head, _, part_body = raw.partition(separator)
+            method, path, _ = head.splitlines()[0].split(" ")
+            with self._lock:
+                response, content = self._handle("https://www.googleapis.com" + path, method, part_body or None)
+            parts.append(
+                f"--BOUNDARY\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{part['Content-ID'].strip('<>')}>\r\n\r\n"
+                f"HTTP/1.1 {response.status} OK\r\nContent-Type: application/json\r\n\r\n"
+                f"{content.decode()}\r\n"
+            )
+        payload = "".join(parts) + "--BOUNDARY--"
+        return httplib2.Response({"status": 200, "content-type": "multipart/mixed; boundary=BOUNDARY"}), payload.encode()
+
+
+def tool_args(name: str, n: int) -> dict:
+    """Valid arguments for a calendar tool call; ``n`` spreads calls over time slots."""
+    day = (datetime.now() + timedelta(days=1 + n // 9)).replace(minute=0, second=0, microsecond=0)
+    start = day.replace(hour=9 + n % 9)
+    end = start + timedelta(hours=1)
+    datetime_format = "%Y-%m-%d %H:%M:%S"
+    if name == "search_events":
+        return {
+            "calendars_info": CALENDARS_INFO,
+            "min_datetime": day.replace(hour=0).strftime(datetime_format),
+            "max_datetime": day.replace(hour=23).strftime(datetime_format),
+        }
+    if name == "create_calendar_event":
+        return {
+            "summary": f"Benchmark meeting {n}",
+            "start_datetime": start.strftime(datetime_format),
+            "end_datetime": end.strftime(datetime_format),
+            "timezone": "UTC",
+        }
+    if name == "check_calendar_conflicts":
+        return {
+            "start_datetime": start.strftime(datetime_format),
+            "end_datetime": end.strftime(datetime_format),
+        }
+    return {}
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Chat model that follows a fixed tool-calling script.
+
+    For each user message it makes ``tool_steps`` rounds of tool calls (each
+    round calls every tool in ``tool_plan`` once), then answers. Summary
+    requests from the context manager get a short canned summary.
+    """
+
+    latency: float = 0.0
+    tool_plan: list = ["search_events"]
+    tool_steps: int = 1
+    counter: object = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _reply(self, messages: list) -> AIMessage:
+        last = messages[-1]
+        if isinstance(last, HumanMessage) and "running summary" in str(last.content):
+            return AIMessage(content="Summary: the user reviewed and booked meetings.")
+
+        steps_done = 0
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                break
+            if isinstance(message, AIMessage) and message.tool_calls:
+                steps_done += 1
+        if steps_done >= self.tool_steps or not self.tool_plan:
+            return AIMessage(content="Done. Your calendar is up to date and nothing else needs attention.")
+
+        counter = self.counter if self.counter is not None else itertools.count()
+        return AIMessage(content="", tool_calls=[
+            {"name": name, "args": tool_args(name, next(counter)), "id": uuid.uuid4().hex}
+            for name in self.tool_plan
+        ])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        message = self._reply(messages)
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+                for i, call in enumerate(message.tool_calls)
+            ]))
+            return
+        for word in message.content.split(" "):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                await run_manager.on_llm_new_token(word + " ", chunk=chunk)
+            yield chunk
+
+
+class _FakeCredentials:
+    valid = True
+    expired = False
+    expiry = None
+    refresh_token = None
+    # Batch requests authorize themselves through the oauth2client-style interface
+    access_token = "benchmark"
+    access_token_expired = False
+
+    def before_request(self, request, method, url, headers):
+        self.apply(headers)
+
+    def apply(self, headers):
+        headers["authorization"] = "Bearer benchmark"
+
+
+def install(llm_latency: float, calendar_latency: float, tool_plan: list, tool_steps: int) -> FakeCalendarHttp:
+    """
+    Patch the agent stack to run against the fakes.
+
+    Args:
+        llm_latency: Seconds each chat model call takes
+        calendar_latency: Seconds each Calendar API round trip takes
+        tool_plan: Tool names the model calls in every tool step
+        tool_steps: Tool-calling rounds per user message
+
+    Returns:
+        The fake Calendar backend (shared by every user)
+    """
+    import auth_service
+    import calendar_agent
+    import http_transport
+
+    backend = FakeCalendarHttp(calendar_latency)
+    counter = itertools.count()
+
+    # The real transport, discovery document and per-thread clients are kept;
+    # only the socket-level HTTP client is replaced
+    http_transport.CalendarTransport._new_http = lambda self: backend
+    auth_service.GoogleAuthService.get_access_token = lambda self, interactive=None: _FakeCredentials()
+    calendar_agent.GOOGLE_API_KEY = calendar_agent.GOOGLE_API_KEY or "benchmark-placeholder"
+    calendar_agent.ChatGoogleGenerativeAI = lambda **kwargs: ScriptedChatModel(
+        latency=llm_latency, tool_plan=tool_plan, tool_steps=tool_steps, counter=counter
+    )
+    return backend
@@ -0,0 +1,234 @@
+"""
+Offline load test for the API server.
+
+Run from the server directory:
+
+    python -m bench.load --conversations 40 --concurrency 8 --turns 4 --output load.json
+
+The real FastAPI app, CalendarAgent graph, tools, caches and checkpointer
+are served by uvicorn in this process; only Gemini and the Google Calendar
+HTTP backend are replaced (see bench.fakes), so no quota is used. Results
+are printed and optionally saved as JSON for comparing commits.
+"""
+import argparse
+import functools
+import itertools
+import json
+import math
+import os
+import resource
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+
+DEFAULT_MESSAGES = [
+    "Book a planning meeting with the design team tomorrow afternoon",
+    "Also add a one hour focus block before it",
+    "Show me everything I have that day",
+    "Thanks, that's all for now",
+]
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process, in MB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Peak rather than current RSS where /proc is unavailable (macOS reports bytes)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class StageTimer:
+    """Accumulates wall time spent in instrumented agent stages."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals = defaultdict(float)
+        self.counts = defaultdict(int)
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self.totals[stage] += seconds
+            self.counts[stage] += 1
+
+    def wrap(self, owner, attribute: str, stage: str):
+        """Time an async method of a class under a stage name."""
+        original = getattr(owner, attribute)
+
+        @functools.wraps(original)
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - started)
+
+        setattr(owner, attribute, timed)
+
+    def per_turn_ms(self, turns: int) -> dict:
+        """Mean milliseconds per turn spent in each stage."""
+        with self._lock:
+            stages = {stage: total * 1000 / turns for stage, total in self.totals.items()}
+        if "turn" in stages:
+            inner = sum(stages.get(stage, 0.0) for stage in ("router", "llm", "tools"))
+            # Graph scheduling, checkpoint reads/writes and state merging
+            stages["graph_and_checkpoints"] = max(0.0, stages["turn"] - inner)
+        return {stage: round(value, 2) for stage, value in sorted(stages.items())}
+
+
+def instrument(timer: StageTimer):
+    import calendar_agent
+    import parallel_tools
+
+    timer.wrap(calendar_agent.CalendarAgent, "aprocess_message", "turn")
+    timer.wrap(calendar_agent.CalendarAgent, "_arouter_node", "router")
+    timer.wrap(calendar_agent.CalendarAgent, "_achatbot_node", "llm")
+    timer.wrap(parallel_tools.ParallelToolNode, "_afunc", "tools")
+
+
+def start_server(app, port: int):
+    """Serve the app with uvicorn on a background thread."""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="bench-server", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("Server failed to start")
+        time.sleep(0.01)
+    return server, thread
+
+
+def run_conversation(base_url: str, conversation: int, turns: int, messages: list) -> list:
+    """Send one conversation's turns in order; returns (latency seconds, status) per turn."""
+    import httpx
+
+    results = []
+    thread_id = f"bench-{conversation}"
+    with httpx.Client(base_url=base_url, timeout=120) as client:
+        for message in itertools.islice(itertools.cycle(messages), turns):
+            started = time.perf_counter()
+            try:
+                status = client.post("/chat", json={"message": message, "thread_id": thread_id}).status_code
+            except httpx.HTTPError:
+                status = None
+            results.append((time.perf_counter() - started, status))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test for the API server")
+    parser.add_argument("--conversations", type=int, default=40, help="Conversations to run")
+    parser.add_argument("--concurrency", type=int, default=8, help="Conversations running at once")
+    parser.add_argument("--turns", type=int, default=4, help="Messages per conversation")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Seconds per chat model call")
+    parser.add_argument("--calendar-latency", type=float, default=0.05, help="Seconds per Calendar API request")
+    parser.add_argument("--tools", default="search_events", help="Comma-separated tools called per tool step")
+    parser.add_argument("--tool-steps", type=int, default=1, help="Tool-calling rounds per message")
+    parser.add_argument("--messages", help="JSON file with the list of messages to cycle through")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    messages = DEFAULT_MESSAGES
+    if args.messages:
+        with open(args.messages) as f:
+            messages = json.load(f)
+
+    # Configure before the server modules read their settings
+    workdir = tempfile.mkdtemp(prefix="calendar-bench-")
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+    os.environ.setdefault("CHECKPOINT_DB_PATH", os.path.join(workdir, "checkpoints.db"))
+    os.environ.setdefault("EVENT_MIRROR_PATH", os.path.join(workdir, "calendar_mirror.db"))
+    os.environ["STARTUP_MODE"] = "eager"
+
+    from bench.fakes import install
+
+    rss_start = rss_mb()
+    backend = install(args.llm_latency, args.calendar_latency, args.tools.split(","), args.tool_steps)
+    timer = StageTimer()
+    instrument(timer)
+
+    import main as server_main
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server, thread = start_server(server_main.app, port)
+    base_url = f"http://127.0.0.1:{port}"
+    rss_ready = rss_mb()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        runs = list(pool.map(
+            lambda conversation: run_conversation(base_url, conversation, args.turns, messages),
+            range(args.conversations)
+        ))
+    duration = time.perf_counter() - started
+    rss_end = rss_mb()
+
+    import httpx
+    server_stats = httpx.get(base_url + "/stats", timeout=30).json()
+    server.should_exit = True
+    thread.join(timeout=30)
+
+    turns = [turn for run in runs for turn in run]
+    latencies = [latency for latency, status in turns if status == 200]
+    results = {
+        "commit": git_commit(),
+        "params": vars(args),
+        "requests": len(turns),
+        "errors": sum(1 for _, status in turns if status != 200),
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(latencies) / duration, 2),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 1),
+            "p95": round(percentile(latencies, 95) * 1000, 1),
+            "p99": round(percentile(latencies, 99) * 1000, 1),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 1),
+            "max": round(max(latencies) * 1000, 1),
+        } if latencies else None,
+        "stages_ms_per_turn": timer.per_turn_ms(max(1, len(turns))),
+        "rss_mb": {
+            "start": round(rss_start, 1),
+            "ready": round(rss_ready, 1),
+            "end": round(rss_end, 1),
+            "growth": round(rss_end - rss_ready, 1),
+        },
+        "calendar_http_requests": backend.requests,
+        "server_stats": server_stats,
+    }
+
+    print(json.dumps({key: value for key, value in results.items() if key != "server_stats"}, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Import-time and startup-time benchmark for the API server.
+
+Run from the server directory:
+
+    python -m bench.startup --runs 5 --output startup.json
+
+Each measurement uses a fresh interpreter. The server is started with
+uvicorn in every STARTUP_MODE and timed until the port answers /livez and
+until /health reports the agent initialized. No Gemini or Calendar calls are
+made; a placeholder GOOGLE_API_KEY is used if none is set.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - started)"
+)
+
+
+def _env(**overrides) -> dict:
+    env = dict(os.environ)
+    env.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+    env.setdefault("CHECKPOINT_BACKEND", "memory")
+    env.update(overrides)
+    return env
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get_json(url: str):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return json.loads(response.read())
+    except (urllib.error.URLError, ConnectionError, OSError):
+        return None
+
+
+def measure_import(module: str) -> float:
+    """Seconds to import a module in a fresh interpreter."""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET.format(module=module)],
+        cwd=SERVER_DIR, env=_env(), capture_output=True, text=True, check=True
+    )
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def measure_startup(mode: str, timeout: float) -> dict:
+    """
+    Start the server in a STARTUP_MODE and time its way to serving.
+
+    Returns:
+        Seconds until /livez answered and until /health reported the agent
+        initialized (None if it did not within the timeout)
+    """
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=SERVER_DIR, env=_env(STARTUP_MODE=mode),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    result = {"port_open_s": None, "initialized_s": None}
+    try:
+        deadline = started + timeout
+        while time.perf_counter() < deadline and process.poll() is None:
+            now = time.perf_counter() - started
+            if result["port_open_s"] is None:
+                if _get_json(base + "/livez") is not None:
+                    result["port_open_s"] = now
+            else:
+                health = _get_json(base + "/health")
+                if health and health["initialized"]:
+                    result["initialized_s"] = now
+                    break
+            time.sleep(0.01)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return result
+
+
+def _summary(values: list) -> dict:
+    values = [value for value in values if value is not None]
+    if not values:
+        return {"runs": 0}
+    return {
+        "runs": len(values),
+        "median_s": round(statistics.median(values), 4),
+        "min_s": round(min(values), 4),
+        "max_s": round(max(values), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Measurements per case")
+    parser.add_argument("--modes", default="eager,background", help="Comma-separated STARTUP_MODE values")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for a server to start")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "imports": {
+            module: _summary([measure_import(module) for _ in range(args.runs)])
+            for module in ("main", "calendar_agent")
+        },
+        "startup": {},
+    }
+    for mode in args.modes.split(","):
+        runs = [measure_startup(mode, args.timeout) for _ in range(args.runs)]
+        results["startup"][mode] = {
+            "port_open": _summary([run["port_open_s"] for run in runs]),
+            "initialized": _summary([run["initialized_s"] for run in runs]),
+        }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
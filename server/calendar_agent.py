@@ -1,31 +1,77 @@
+import asyncio
 import os
+import threading
 from typing import Annotated
 from typing_extensions import TypedDict
-from datetime import datetime
+from datetime import datetime, timezone
 
-from langgraph.graph import StateGraph, START
+from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
-from langgraph.prebuilt import ToolNode, tools_condition
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.prebuilt import tools_condition
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
 from langchain_google_genai import ChatGoogleGenerativeAI
 
-from calendar_service import CalendarService
-from config import GOOGLE_API_KEY
+from calendar_tools import build_tool_templates
+from checkpoint_store import create_checkpointer
+from context_manager import ContextManager, SUMMARY_TAG, content_text
+from intent_router import IntentRouter
+from parallel_tools import ParallelToolNode
+from tenant_pool import TenantPool, DEFAULT_USER_ID
+from telemetry import GRAPH_NODE_SECONDS, LLM_REQUEST_SECONDS, record_llm_usage, trace
+from config import (
+    GOOGLE_API_KEY, CHECKPOINT_BACKEND, CHECKPOINT_DB_PATH, CHECKPOINT_HOT_THREADS,
+    CHECKPOINT_THREAD_TTL_SECONDS, CHECKPOINT_KEEP_LAST, CONTEXT_TOKEN_BUDGET,
+    CONTEXT_RECENT_TURNS, CONTEXT_TOOL_OUTPUT_CHARS, INTENT_ROUTER_ENABLED,
+    TOOL_MAX_CONCURRENCY, TOOL_CALL_TIMEOUT_SECONDS, TENANT_TOKENS_DIR,
+    TENANT_POOL_MAX, TENANT_IDLE_SECONDS
+)
 
 
 class State(TypedDict):
     """State definition for the calendar agent."""
     messages: Annotated[list, add_messages]
+    summary: str
+    summarized_count: int
 
 
 class CalendarAgent:
-    """Calendar booking agent with LangGraph integration."""
+    """
+    Calendar booking agent with LangGraph integration.
     
-    def __init__(self):
-        self.calendar_service = CalendarService()
-        self.memory = MemorySaver()
+    The LLM and compiled graph are shared by every user; each run resolves
+    the caller's own calendar tools from the tenant pool through the
+    ``user_id`` in its config.
+    """
+    
+    FALLBACK_RESPONSE = "I'm sorry, I couldn't process your request. Please try again."
+    TOOL_OUTPUT_PREVIEW_CHARS = 500
+    
+    def __init__(self, checkpointer=None):
+        """
+        Args:
+            checkpointer: Conversation checkpoint store to share; a new one is
+                created from the configuration when omitted
+        """
+        self.tenants = TenantPool(TENANT_TOKENS_DIR, TENANT_POOL_MAX, TENANT_IDLE_SECONDS)
+        self.calendar_service = self.tenants.default
+        self.tool_templates = build_tool_templates()
+        self.memory = checkpointer or create_checkpointer(
+            CHECKPOINT_BACKEND, CHECKPOINT_DB_PATH, CHECKPOINT_HOT_THREADS,
+            CHECKPOINT_THREAD_TTL_SECONDS, CHECKPOINT_KEEP_LAST
+        )
+        self.context = ContextManager(
+            CONTEXT_TOKEN_BUDGET, CONTEXT_RECENT_TURNS, CONTEXT_TOOL_OUTPUT_CHARS
+        )
+        self.router = IntentRouter(self._tools_for_user)
         self.llm = None
+        self.llm_with_tools = None
         self.graph = None
+        self.tool_node = None
+        self.last_llm_success_at = None
+        self.last_llm_error = None
+        self.in_flight = 0
+        self._idle = threading.Condition()
         self._setup_llm()
         self._build_graph()
     
@@ -36,6 +82,27 @@ class CalendarAgent:
         
         os.environ["GOOGLE_API_KEY"] = GOOGLE_API_KEY
         self.llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
+        self.llm_with_tools = self.llm.bind_tools(self.tool_templates)
+    
+    def _tools_for_user(self, user_id: str) -> dict:
+        """Get a user's calendar tools by name."""
+        return self.tenants.get(user_id).get_tools_by_name()
+    
+    def _tools_for_config(self, config: dict) -> dict:
+        """Get the calendar tools of the user a graph run belongs to."""
+        return self._tools_for_user(config["configurable"].get("user_id", DEFAULT_USER_ID))
+    
+    @staticmethod
+    def _run_config(thread_id: str, user_id: str) -> dict:
+        """
+        Graph config for a user's conversation thread.
+        
+        Thread IDs are scoped per user so users cannot read each other's
+        conversations; the default user keeps the bare thread ID.
+        """
+        if user_id != DEFAULT_USER_ID:
+            thread_id = f"{user_id}:{thread_id}"
+        return {"configurable": {"thread_id": thread_id, "user_id": user_id}}
     
     def _get_system_prompt(self) -> str:
         """Generate the system prompt with current date and time."""
@@ -46,7 +113,8 @@ class CalendarAgent:
 
 When users ask about scheduling events, meetings, or calendar-related tasks, always consider this current date and time context. You can help users:
 
-- Important Thing: when creating a meeting, check first if there is already a meeting scheduled. If so, ask the user if they want to delete the existing meeting or schedule it at another time.
+- Important Thing: the create event tool checks for an existing meeting at that time by itself, so call it directly. If it reports a conflict, ask the user if they want to delete the existing meeting or schedule it at another time. Use the conflict check tool for quick availability questions.
+- When several events are created, updated, deleted or looked up at once, use the batch tools in a single call instead of repeating the single-event tools.
 - Create new calendar events
 - Check their calendar for availability
 - Update or modify existing events
@@ -54,60 +122,176 @@ When users ask about scheduling events, meetings, or calendar-related tasks, alw
 
 Always be precise with dates and times, and ask for clarification if the user's request is ambiguous about timing."""
     
-    def _chatbot_node(self, state: State):
-        """Main chatbot node that processes messages."""
-        messages = state["messages"]
+    def _prepare_messages(self, state: State) -> list:
+        """Build the prompt: system prompt and summary, then the budgeted history."""
+        return self.context.build_prompt(state, self._get_system_prompt())
+    
+    def _summary_update(self, state: State, fold: list, summary) -> dict:
+        """State update that records a new rolling summary covering fold."""
+        return {
+            "summary": summary,
+            "summarized_count": state.get("summarized_count", 0) + len(fold),
+        }
+    
+    def _summarize(self, state: State) -> dict:
+        """Fold older turns into the rolling summary when over the token budget."""
+        fold = self.context.messages_to_fold(state, self._get_system_prompt())
+        if not fold:
+            return {}
         
-        # Check if system message exists
-        has_system_message = any(
-            msg.get("role") == "system" 
-            for msg in messages 
-            if hasattr(msg, 'get') or isinstance(msg, dict)
-        )
+        prompt = self.context.summary_prompt(state.get("summary", ""), fold)
+        try:
+            with trace(LLM_REQUEST_SECONDS, "llm.summary", purpose="summary") as span:
+                response = self.llm.with_config(tags=[SUMMARY_TAG]).invoke(prompt)
+                record_llm_usage("summary", response, span)
+        except Exception as e:
+            # Send the longer prompt rather than failing the turn
+            print(f"Context summarization failed: {e}")
+            self.context.record_summary(False)
+            return {}
+        self.context.record_summary(True)
+        return self._summary_update(state, fold, response.content)
+    
+    async def _asummarize(self, state: State) -> dict:
+        """Async counterpart of _summarize."""
+        fold = self.context.messages_to_fold(state, self._get_system_prompt())
+        if not fold:
+            return {}
         
-        # Add system message if not present
-        if not has_system_message:
-            system_message = {"role": "system", "content": self._get_system_prompt()}
-            messages_with_system = [system_message] + messages
-        else:
-            messages_with_system = messages
+        prompt = self.context.summary_prompt(state.get("summary", ""), fold)
+        try:
+            with trace(LLM_REQUEST_SECONDS, "llm.summary", purpose="summary") as span:
+                response = await self.llm.with_config(tags=[SUMMARY_TAG]).ainvoke(prompt)
+                record_llm_usage("summary", response, span)
+        except Exception as e:
+            print(f"Context summarization failed: {e}")
+            self.context.record_summary(False)
+            return {}
+        self.context.record_summary(True)
+        return self._summary_update(state, fold, response.content)
+    
+    def _router_node(self, state: State, config: dict):
+        """Answer simple agenda/availability questions without the LLM."""
+        with trace(GRAPH_NODE_SECONDS, "graph.router", node="router"):
+            return self._route(state, config)
+    
+    def _route(self, state: State, config: dict):
+        """Router node body: the templated answer, or no update to fall through."""
+        last_message = state["messages"][-1]
+        if not isinstance(last_message, HumanMessage) or not isinstance(last_message.content, str):
+            return {}
         
-        # Get tools and bind to LLM
-        tools = self.calendar_service.get_calendar_tools()
-        llm_with_tools = self.llm.bind_tools(tools)
+        answer = self.router.route(
+            last_message.content, config["configurable"].get("user_id", DEFAULT_USER_ID)
+        )
+        if answer is None:
+            return {}
+        return {"messages": [AIMessage(content=answer)]}
+    
+    async def _arouter_node(self, state: State, config: dict):
+        """Async counterpart of the router node; calendar reads run in a thread."""
+        return await asyncio.to_thread(self._router_node, state, config)
+    
+    @staticmethod
+    def _route_after_router(state: State) -> str:
+        """End the turn if the router answered, otherwise hand over to the LLM."""
+        if isinstance(state["messages"][-1], AIMessage):
+            return END
+        return "chatbot"
+    
+    def _get_llm_with_tools(self):
+        """Get the LLM with the calendar tool schemas bound (done once, shared by all users)."""
+        return self.llm_with_tools
+    
+    def _chatbot_node(self, state: State):
+        """Main chatbot node that processes messages."""
+        with trace(GRAPH_NODE_SECONDS, "graph.chatbot", node="chatbot"):
+            return self._chatbot_step(state)
+    
+    def _chatbot_step(self, state: State):
+        """Chatbot node body: summarize if needed, then call the LLM."""
+        summary_update = self._summarize(state)
+        messages_with_system = self._prepare_messages({**state, **summary_update})
         
         # Invoke the LLM
-        response = llm_with_tools.invoke(messages_with_system)
-        return {"messages": [response]}
+        try:
+            with trace(LLM_REQUEST_SECONDS, "llm.chat", purpose="chat") as span:
+                response = self._get_llm_with_tools().invoke(messages_with_system)
+                record_llm_usage("chat", response, span)
+        except Exception as e:
+            self.last_llm_error = str(e)
+            raise
+        self.last_llm_success_at = datetime.now(timezone.utc)
+        self.last_llm_error = None
+        return {"messages": [response], **summary_update}
+    
+    async def _achatbot_node(self, state: State):
+        """Async counterpart of the chatbot node, used by astream."""
+        with trace(GRAPH_NODE_SECONDS, "graph.chatbot", node="chatbot"):
+            return await self._achatbot_step(state)
+    
+    async def _achatbot_step(self, state: State):
+        """Async counterpart of _chatbot_step."""
+        summary_update = await self._asummarize(state)
+        messages_with_system = self._prepare_messages({**state, **summary_update})
+        
+        # Invoke the LLM without holding a thread during the network wait
+        try:
+            with trace(LLM_REQUEST_SECONDS, "llm.chat", purpose="chat") as span:
+                response = await self._get_llm_with_tools().ainvoke(messages_with_system)
+                record_llm_usage("chat", response, span)
+        except Exception as e:
+            self.last_llm_error = str(e)
+            raise
+        self.last_llm_success_at = datetime.now(timezone.utc)
+        self.last_llm_error = None
+        return {"messages": [response], **summary_update}
     
     def _build_graph(self):
         """Build the LangGraph workflow."""
-        # Get calendar tools
-        tools = self.calendar_service.get_calendar_tools()
+        # Tool schemas only; calls run on the calling user's own tools
+        tools = self.tool_templates
         
         # Build the graph
         graph_builder = StateGraph(State)
-        graph_builder.add_node("chatbot", self._chatbot_node)
+        graph_builder.add_node(
+            "chatbot",
+            RunnableLambda(self._chatbot_node, afunc=self._achatbot_node)
+        )
         
-        # Add tool node
-        tool_node = ToolNode(tools)
-        graph_builder.add_node("tools", tool_node)
+        # Add tool node (independent tool calls from one step run concurrently)
+        self.tool_node = ParallelToolNode(
+            tools, TOOL_MAX_CONCURRENCY, TOOL_CALL_TIMEOUT_SECONDS,
+            resolve_tools=self._tools_for_config
+        )
+        graph_builder.add_node("tools", self.tool_node)
         
         # Add edges
         graph_builder.add_conditional_edges("chatbot", tools_condition)
         graph_builder.add_edge("tools", "chatbot")
-        graph_builder.add_edge(START, "chatbot")
+        
+        # Simple queries are answered by the router; the rest go to the LLM
+        if INTENT_ROUTER_ENABLED:
+            graph_builder.add_node(
+                "router",
+                RunnableLambda(self._router_node, afunc=self._arouter_node)
+            )
+            graph_builder.add_edge(START, "router")
+            graph_builder.add_conditional_edges("router", self._route_after_router, ["chatbot", END])
+        else:
+            graph_builder.add_edge(START, "chatbot")
         
         # Compile the graph
         self.graph = graph_builder.compile(checkpointer=self.memory)
     
-    def process_message(self, message: str, thread_id: str = "1") -> str:
+    def process_message(self, message: str, thread_id: str = "1", user_id: str = DEFAULT_USER_ID) -> str:
         """
         Process a user message and return the assistant's response.
         
         Args:
             message: User's message
             thread_id: Conversation thread ID
+            user_id: Caller identity whose calendar and threads are used
             
         Returns:
             Assistant's response
@@ -115,7 +299,7 @@ Always be precise with dates and times, and ask for clarification if the user's
         if not self.graph:
             raise RuntimeError("Calendar agent not properly initialized")
         
-        config = {"configurable": {"thread_id": thread_id}}
+        config = self._run_config(thread_id, user_id)
         
         # Stream the graph updates
         events = self.graph.stream(
@@ -127,18 +311,210 @@ Always be precise with dates and times, and ask for clarification if the user's
         # Get the last response
         last_response = None
         for event in events:
-            if "messages" in event and event["messages"]:
-                last_message = event["messages"][-1]
-                if hasattr(last_message, 'content'):
-                    last_response = last_message.content
-                elif isinstance(last_message, dict) and 'content' in last_message:
-                    last_response = last_message['content']
+            last_response = self._extract_response(event, last_response)
         
         if last_response is None:
-            last_response = "I'm sorry, I couldn't process your request. Please try again."
+            last_response = self.FALLBACK_RESPONSE
         
         return last_response
     
+    async def aprocess_message(self, message: str, thread_id: str = "1", user_id: str = DEFAULT_USER_ID) -> str:
+        """
+        Process a user message asynchronously and return the assistant's response.
+        
+        Args:
+            message: User's message
+            thread_id: Conversation thread ID
+            user_id: Caller identity whose calendar and threads are used
+            
+        Returns:
+            Assistant's response
+        """
+        if not self.graph:
+            raise RuntimeError("Calendar agent not properly initialized")
+        
+        config = self._run_config(thread_id, user_id)
+        
+        # Stream the graph updates on the event loop
+        events = self.graph.astream(
+            {"messages": [{"role": "user", "content": message}]},
+            config,
+            stream_mode="values",
+        )
+        
+        # Get the last response
+        last_response = None
+        async for event in events:
+            last_response = self._extract_response(event, last_response)
+        
+        if last_response is None:
+            last_response = self.FALLBACK_RESPONSE
+        
+        return last_response
+    
+    async def astream_message(self, message: str, thread_id: str = "1", user_id: str = DEFAULT_USER_ID):
+        """
+        Process a user message and yield progress events as they happen.
+        
+        Yields dicts with a ``type`` of ``token`` (LLM text as it is generated),
+        ``tool_start`` / ``tool_end`` (calendar tool progress) and finally
+        ``done`` carrying the full response.
+        
+        Args:
+            message: User's message
+            thread_id: Conversation thread ID
+            user_id: Caller identity whose calendar and threads are used
+        """
+        if not self.graph:
+            raise RuntimeError("Calendar agent not properly initialized")
+        
+        config = self._run_config(thread_id, user_id)
+        
+        events = self.graph.astream_events(
+            {"messages": [{"role": "user", "content": message}]},
+            config,
+            version="v2",
+        )
+        
+        async for event in events:
+            kind = event["event"]
+            node = event.get("metadata", {}).get("langgraph_node")
+        
+            # Summary updates are internal; only stream the reply itself
+            if kind == "on_chat_model_stream" and node == "chatbot" and SUMMARY_TAG not in event.get("tags", []):
+                content = event["data"]["chunk"].content
+                if isinstance(content, str) and content:
+                    yield {"type": "token", "content": content}
+        
+            elif kind == "on_tool_start":
+                yield {
+                    "type": "tool_start",
+                    "name": event["name"],
+                    "input": event["data"].get("input"),
+                }
+        
+            elif kind == "on_tool_end":
+                output = event["data"].get("output")
+                output = getattr(output, "content", output)
+                yield {
+                    "type": "tool_end",
+                    "name": event["name"],
+                    "output": str(output)[:self.TOOL_OUTPUT_PREVIEW_CHARS],
+                }
+        
+        # Read the final message back from the checkpoint
+        state = await self.graph.aget_state(config)
+        last_response = self._extract_response(state.values, None)
+        if last_response is None:
+            last_response = self.FALLBACK_RESPONSE
+        
+        yield {"type": "done", "response": last_response}
+    
+    async def aget_messages(self, thread_id: str, user_id: str = DEFAULT_USER_ID,
+                            before: int = None, limit: int = 20) -> dict:
+        """
+        Get a page of a conversation's transcript, newest page first.
+        
+        Read from the thread's latest checkpoint without running the graph.
+        Only the user's messages and the assistant's text replies are
+        returned; tool calls and tool results stay internal. A message's
+        cursor is its position in the thread, which never changes because
+        history is only ever appended to.
+        
+        Args:
+            thread_id: Conversation thread ID
+            user_id: Caller identity whose threads are read
+            before: Cursor from an earlier page; only older messages are returned
+            limit: Maximum messages in the page
+            
+        Returns:
+            Dict with ``messages`` (oldest first, each with role, content,
+            cursor and id) and ``next_before``, the cursor for the next older
+            page, or None when there is nothing older
+        """
+        checkpoint_tuple = await self.memory.aget_tuple(self._run_config(thread_id, user_id))
+        history = []
+        if checkpoint_tuple is not None:
+            history = checkpoint_tuple.checkpoint["channel_values"].get("messages", [])
+        
+        end = len(history) if before is None else min(before, len(history))
+        page = []
+        next_before = None
+        for cursor in range(end - 1, -1, -1):
+            message = history[cursor]
+            content = content_text(message.content)
+            if message.type != "human" and not (message.type == "ai" and content.strip()):
+                continue
+            if len(page) == limit:
+                # A visible message is left before this page
+                next_before = page[-1]["cursor"]
+                break
+            page.append({
+                "role": "user" if message.type == "human" else "assistant",
+                "content": content,
+                "cursor": cursor,
+                "id": message.id,
+            })
+        page.reverse()
+        return {"messages": page, "next_before": next_before}
+    
+    @staticmethod
+    def _extract_response(event: dict, last_response):
+        """Get the content of the latest message in a streamed graph event."""
+        if "messages" in event and event["messages"]:
+            last_message = event["messages"][-1]
+            if hasattr(last_message, 'content'):
+                return last_message.content
+            elif isinstance(last_message, dict) and 'content' in last_message:
+                return last_message['content']
+        return last_response
+    
+    def begin_turn(self):
+        """Record that a turn is running on this agent (see ``drain``)."""
+        with self._idle:
+            self.in_flight += 1
+    
+    def end_turn(self):
+        """Record that a turn started with ``begin_turn`` has finished."""
+        with self._idle:
+            self.in_flight -= 1
+            if self.in_flight == 0:
+                self._idle.notify_all()
+    
+    def drain(self, timeout: float) -> bool:
+        """
+        Wait for in-flight turns to finish, e.g. before closing a replaced agent.
+        
+        Args:
+            timeout: Maximum time to wait, in seconds
+        
+        Returns:
+            True if no turns are running, False if the timeout expired first
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self.in_flight == 0, timeout)
+    
+    def warm_up(self):
+        """
+        Pay the default user's first-request costs up front.
+        
+        Loads the token (never through the browser OAuth flow) and builds the
+        Calendar API client and tools, so the first chat turn does not.
+        """
+        if not self.calendar_service.auth_service.check_authenticated():
+            print("Warm-up skipped: no valid Google token yet")
+            return
+        self.calendar_service.get_calendar_tools()
+    
+    def refresh_tools(self, user_id: str = DEFAULT_USER_ID):
+        """
+        Rebuild a user's calendar tools (e.g. after a token change).
+        
+        The graph and LLM only hold tool templates, so they are left as they
+        are; the next tool call picks up the new tools.
+        """
+        self.tenants.get(user_id).refresh_tools()
+    
     def is_ready(self) -> bool:
         """Check if the agent is ready to process requests."""
         return (
@@ -147,6 +523,12 @@ Always be precise with dates and times, and ask for clarification if the user's
             self.graph is not None
         )
     
+    def close(self):
+        """Release background resources held by the agent."""
+        self.tenants.close()
+        if self.tool_node is not None:
+            self.tool_node.shutdown()
+    
     def get_status(self) -> dict:
         """Get the current status of the agent."""
         current_date = datetime.now().strftime("%A, %B %d, %Y")
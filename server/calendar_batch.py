@@ -0,0 +1,320 @@
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Type
+
+from googleapiclient.errors import HttpError
+from pydantic import BaseModel, Field
+from langchain_google_community.calendar.base import CalendarBaseTool
+from langchain_google_community.calendar.utils import is_all_day_event
+
+from calendar_cache import parse_tool_window
+from telemetry import CALENDAR_API_SECONDS, trace
+
+
+# Google Calendar accepts at most 50 calls per batch request
+BATCH_LIMIT = 50
+
+
+def _error_text(error: Exception) -> str:
+    """Short per-item error text for tool output."""
+    if isinstance(error, HttpError):
+        return f"HTTP {error.resp.status}: {error.reason}"
+    return str(error)
+
+
+def execute_batch(api_resource, requests: list) -> list:
+    """
+    Execute API requests as multipart batch calls.
+
+    Requests are sent in chunks of BATCH_LIMIT, one HTTP round trip per chunk.
+
+    Args:
+        api_resource: Google Calendar API resource
+        requests: Unexecuted HttpRequest objects
+
+    Returns:
+        One (response, error) pair per request, in request order
+    """
+    results = [(None, None)] * len(requests)
+
+    def store(request_id, response, exception):
+        results[int(request_id)] = (response, exception)
+
+    for chunk_start in range(0, len(requests), BATCH_LIMIT):
+        batch = api_resource.new_batch_http_request(callback=store)
+        for i in range(chunk_start, min(chunk_start + BATCH_LIMIT, len(requests))):
+            batch.add(requests[i], request_id=str(i))
+        try:
+            with trace(CALENDAR_API_SECONDS, "calendar.batch", method="calendar.batch"):
+                batch.execute()
+        except Exception as e:
+            # The whole chunk failed (e.g. a network error); report it on each item
+            for i in range(chunk_start, min(chunk_start + BATCH_LIMIT, len(requests))):
+                results[i] = (None, e)
+    return results
+
+
+def _event_times(start_datetime: str, end_datetime: str, timezone: Optional[str]) -> tuple:
+    """Build Calendar API start/end objects from tool datetimes."""
+    if is_all_day_event(start_datetime, end_datetime):
+        return {"date": start_datetime}, {"date": end_datetime}
+    datetime_format = "%Y-%m-%d %H:%M:%S"
+    try:
+        start = {"dateTime": datetime.strptime(start_datetime, datetime_format).astimezone().isoformat()}
+        end = {"dateTime": datetime.strptime(end_datetime, datetime_format).astimezone().isoformat()}
+    except ValueError as error:
+        raise ValueError("The datetime format is incorrect.") from error
+    if timezone:
+        start["timeZone"] = end["timeZone"] = timezone
+    return start, end
+
+
+def _event_result(item: dict, response, error, **extra) -> dict:
+    """Per-item entry in a batch tool's output."""
+    result = {"event_id": item.get("event_id"), "calendar_id": item.get("calendar_id", "primary")}
+    if error is not None:
+        result.update(status="error", error=_error_text(error))
+    else:
+        result["status"] = "ok"
+        if response:
+            result.update(
+                event_id=response.get("id"),
+                summary=response.get("summary"),
+                start=response.get("start", {}).get("dateTime") or response.get("start", {}).get("date"),
+                end=response.get("end", {}).get("dateTime") or response.get("end", {}).get("date"),
+                htmlLink=response.get("htmlLink"),
+            )
+    result.update(extra)
+    return result
+
+
+def _report(results: list) -> str:
+    """Tool output: a one-line tally followed by per-item results."""
+    succeeded = sum(1 for result in results if result["status"] == "ok")
+    return f"{succeeded} of {len(results)} succeeded. " + json.dumps(results)
+
+
+class EventRef(BaseModel):
+    """One event addressed by a batch tool."""
+
+    event_id: str = Field(..., description="The event ID.")
+    calendar_id: str = Field(default="primary", description="The calendar ID of the event.")
+
+
+class NewEvent(BaseModel):
+    """One event to create."""
+
+    summary: str = Field(..., description="The title of the event.")
+    start_datetime: str = Field(
+        ..., description="Start in 'YYYY-MM-DD HH:MM:SS' format, or 'YYYY-MM-DD' for all-day events."
+    )
+    end_datetime: str = Field(
+        ..., description="End in 'YYYY-MM-DD HH:MM:SS' format, or 'YYYY-MM-DD' for all-day events."
+    )
+    timezone: Optional[str] = Field(default=None, description="The timezone of the event.")
+    calendar_id: str = Field(default="primary", description="The calendar ID to create the event in.")
+    location: Optional[str] = Field(default=None, description="The location of the event.")
+    description: Optional[str] = Field(default=None, description="The description of the event.")
+
+
+class EventChanges(EventRef):
+    """One event to update; only the given fields change."""
+
+    summary: Optional[str] = Field(default=None, description="The new title.")
+    start_datetime: Optional[str] = Field(default=None, description="The new start, same format as for creation.")
+    end_datetime: Optional[str] = Field(default=None, description="The new end, same format as for creation.")
+    timezone: Optional[str] = Field(default=None, description="The timezone of the new start and end.")
+    location: Optional[str] = Field(default=None, description="The new location.")
+    description: Optional[str] = Field(default=None, description="The new description.")
+
+
+class BatchEventRefsSchema(BaseModel):
+    """Input for batch get and delete."""
+
+    events: List[EventRef] = Field(..., description="The events to act on.")
+
+
+class BatchCreateEventsSchema(BaseModel):
+    """Input for BatchCreateEvents."""
+
+    events: List[NewEvent] = Field(..., description="The events to create.")
+    allow_conflicts: bool = Field(
+        default=False,
+        description="Set to true only after the user confirmed booking over existing events.",
+    )
+
+
+class BatchUpdateEventsSchema(BaseModel):
+    """Input for BatchUpdateEvents."""
+
+    events: List[EventChanges] = Field(..., description="The events to update and their changes.")
+
+
+class BatchGetEvents(CalendarBaseTool):
+    """Tool that fetches several events in one batch request."""
+
+    name: str = "get_calendar_events_batch"
+    description: str = (
+        "Use this tool to fetch the details of several events at once by event ID."
+    )
+    args_schema: Type[BatchEventRefsSchema] = BatchEventRefsSchema
+
+    def _run(self, events: list, run_manager=None) -> str:
+        items = [dict(event) for event in events]
+        requests = [
+            self.api_resource.events().get(calendarId=item["calendar_id"], eventId=item["event_id"])
+            for item in items
+        ]
+        results = execute_batch(self.api_resource, requests)
+        return _report([
+            _event_result(item, response, error)
+            for item, (response, error) in zip(items, results)
+        ])
+
+
+class BatchCreateEvents(CalendarBaseTool):
+    """
+    Tool that creates several events in one batch request.
+
+    Each event is pre-checked against the conflict index like
+    create_calendar_event; conflicting events are reported and skipped unless
+    allow_conflicts is set.
+    """
+
+    name: str = "create_calendar_events_batch"
+    description: str = (
+        "Use this tool to create several events at once. Events that overlap "
+        "existing events are skipped and reported unless allow_conflicts is true."
+    )
+    args_schema: Type[BatchCreateEventsSchema] = BatchCreateEventsSchema
+    cache: Any = None
+    index: Any = None
+    mirror: Any = None
+
+    def _run(self, events: list, allow_conflicts: bool = False, run_manager=None) -> str:
+        items = [dict(event) for event in events]
+        output = [None] * len(items)
+        requests, pending = [], []
+        for i, item in enumerate(items):
+            try:
+                start, end = _event_times(item["start_datetime"], item["end_datetime"], item.get("timezone"))
+            except ValueError as e:
+                output[i] = _event_result(item, None, e)
+                continue
+
+            window = None
+            if "dateTime" in start:
+                naive_window = parse_tool_window(item["start_datetime"], item["end_datetime"])
+                window = (naive_window[0].astimezone(), naive_window[1].astimezone())
+                if not allow_conflicts:
+                    try:
+                        conflicts = self.index.find_conflicts_live(
+                            item["calendar_id"], *window, mirror=self.mirror
+                        )
+                    except Exception as e:
+                        print(f"Conflict pre-check unavailable: {e}")
+                        conflicts = None
+                    if conflicts:
+                        output[i] = _event_result(item, None, None, status="skipped", conflicts=conflicts)
+                        continue
+
+            body = {"summary": item["summary"], "start": start, "end": end}
+            for field in ("location", "description"):
+                if item.get(field):
+                    body[field] = item[field]
+            requests.append(self.api_resource.events().insert(calendarId=item["calendar_id"], body=body))
+            pending.append((i, window))
+
+        for (i, window), (response, error) in zip(pending, execute_batch(self.api_resource, requests)):
+            item = items[i]
+            output[i] = _event_result(item, response, error)
+            if error is None:
+                self.cache.invalidate(item["calendar_id"], parse_tool_window(item["start_datetime"], item["end_datetime"]))
+                if self.mirror is not None:
+                    self.mirror.mark_stale(item["calendar_id"])
+                if window is not None:
+                    self.index.add_event(item["calendar_id"], *window, response.get("id"), item["summary"])
+                else:
+                    self.index.invalidate(item["calendar_id"])
+        return _report(output)
+
+
+class BatchUpdateEvents(CalendarBaseTool):
+    """Tool that updates several events in one batch request (as patches)."""
+
+    name: str = "update_calendar_events_batch"
+    description: str = (
+        "Use this tool to update or reschedule several events at once. "
+        "Only the fields given for each event are changed."
+    )
+    args_schema: Type[BatchUpdateEventsSchema] = BatchUpdateEventsSchema
+    cache: Any = None
+    index: Any = None
+    mirror: Any = None
+
+    def _run(self, events: list, run_manager=None) -> str:
+        items = [dict(event) for event in events]
+        output = [None] * len(items)
+        requests, pending = [], []
+        for i, item in enumerate(items):
+            body = {
+                field: item[field]
+                for field in ("summary", "location", "description")
+                if item.get(field) is not None
+            }
+            if item.get("start_datetime") and item.get("end_datetime"):
+                try:
+                    body["start"], body["end"] = _event_times(
+                        item["start_datetime"], item["end_datetime"], item.get("timezone")
+                    )
+                except ValueError as e:
+                    output[i] = _event_result(item, None, e)
+                    continue
+            elif item.get("start_datetime") or item.get("end_datetime"):
+                output[i] = _event_result(item, None, ValueError("Give both start_datetime and end_datetime."))
+                continue
+            requests.append(self.api_resource.events().patch(
+                calendarId=item["calendar_id"], eventId=item["event_id"], body=body
+            ))
+            pending.append(i)
+
+        for i, (response, error) in zip(pending, execute_batch(self.api_resource, requests)):
+            item = items[i]
+            output[i] = _event_result(item, response, error)
+            if error is None:
+                # The previous times are unknown, so drop the whole calendar
+                self.cache.invalidate(item["calendar_id"])
+                if self.mirror is not None:
+                    self.mirror.mark_stale(item["calendar_id"])
+                self.index.invalidate(item["calendar_id"])
+        return _report(output)
+
+
+class BatchDeleteEvents(CalendarBaseTool):
+    """Tool that deletes several events in one batch request."""
+
+    name: str = "delete_calendar_events_batch"
+    description: str = (
+        "Use this tool to delete several events at once by event ID, for example "
+        "to cancel all meetings on a day after searching for them."
+    )
+    args_schema: Type[BatchEventRefsSchema] = BatchEventRefsSchema
+    cache: Any = None
+    index: Any = None
+    mirror: Any = None
+
+    def _run(self, events: list, run_manager=None) -> str:
+        items = [dict(event) for event in events]
+        requests = [
+            self.api_resource.events().delete(calendarId=item["calendar_id"], eventId=item["event_id"])
+            for item in items
+        ]
+        output = []
+        for item, (response, error) in zip(items, execute_batch(self.api_resource, requests)):
+            output.append(_event_result(item, None, error))
+            if error is None:
+                self.cache.invalidate(item["calendar_id"])
+                if self.mirror is not None:
+                    self.mirror.mark_stale(item["calendar_id"])
+                self.index.remove_event(item["calendar_id"], item["event_id"])
+        return _report(output)
@@ -0,0 +1,143 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from calendar_ids import PRIMARY_ALIAS
+
+
+def parse_tool_datetime(value: str) -> datetime:
+    """Parse a tool datetime in 'YYYY-MM-DD HH:MM:SS' or 'YYYY-MM-DD' format."""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return datetime.strptime(value, "%Y-%m-%d")
+
+
+def parse_tool_window(start: str, end: str) -> Optional[tuple]:
+    """Parse a tool start/end pair into a window, or None if unparseable."""
+    try:
+        start_dt = parse_tool_datetime(start)
+        end_dt = parse_tool_datetime(end)
+    except (TypeError, ValueError):
+        return None
+    # All-day end dates are exclusive, a bare date start covers the whole day
+    if end_dt <= start_dt:
+        end_dt = start_dt + timedelta(days=1)
+    return start_dt, end_dt
+
+
+class CalendarReadCache:
+    """TTL- and size-bounded read-through cache for calendar read tools."""
+
+    MISS = object()
+
+    def __init__(self, ttl_seconds: float, max_entries: int, resolve_calendar_id=None):
+        """
+        Args:
+            ttl_seconds: How long entries are served
+            max_entries: Entries kept at most
+            resolve_calendar_id: Maps calendar aliases ("primary") to real IDs, so
+                reads and invalidations of one calendar match
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.resolve_calendar_id = resolve_calendar_id or (lambda calendar_id: calendar_id)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, key):
+        """Return the cached value for key, or ``CalendarReadCache.MISS``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["expires_at"] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return self.MISS
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry["value"])
+
+    def put(self, key, value, calendars=None, window=None):
+        """
+        Store a value.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            calendars: Calendar IDs the value was read from (None if calendar-independent)
+            window: (start, end) datetimes the value covers (None for the whole calendar)
+        """
+        if not self.enabled:
+            return
+        if calendars:
+            calendars = frozenset(self.resolve_calendar_id(calendar_id) for calendar_id in calendars)
+        with self._lock:
+            self._entries[key] = {
+                "value": copy.deepcopy(value),
+                "calendars": calendars or None,
+                "window": window,
+                "expires_at": time.monotonic() + self.ttl_seconds,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, calendar_id: str, window: Optional[tuple] = None):
+        """
+        Drop cached reads affected by a write.
+
+        Args:
+            calendar_id: Calendar that was written to
+            window: (start, end) of the write, or None to drop the whole calendar
+        """
+        calendar_id = self.resolve_calendar_id(calendar_id)
+        # An alias that could not be resolved may be any calendar
+        any_calendar = calendar_id == PRIMARY_ALIAS
+        with self._lock:
+            stale = []
+            for key, entry in self._entries.items():
+                calendars = entry["calendars"]
+                if calendars is None or not (any_calendar or calendar_id in calendars):
+                    continue
+                cached_window = entry["window"]
+                if window is None or cached_window is None or (
+                    cached_window[0] <= window[1] and window[0] <= cached_window[1]
+                ):
+                    stale.append(key)
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> dict:
+        """Get hit/miss counts and the hit ratio."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,50 @@
+import threading
+
+
+PRIMARY_ALIAS = "primary"
+
+
+class CalendarIdResolver:
+    """
+    Maps the "primary" alias to the account's real calendar ID.
+
+    Tools and the API accept either form, but searches read calendars by
+    the IDs calendarList returns (the account's email for the primary
+    calendar). Caches and the event mirror key their data through this
+    resolver so a write to "primary" reaches reads of the same calendar.
+    """
+
+    def __init__(self, get_api_resource):
+        """
+        Args:
+            get_api_resource: Callable returning the Calendar API resource
+        """
+        self.get_api_resource = get_api_resource
+        self._primary_id = None
+        self._lock = threading.Lock()
+
+    def resolve(self, calendar_id: str) -> str:
+        """
+        Get the real ID of a calendar.
+
+        The primary calendar's ID is looked up once. If the lookup fails the
+        alias is returned unchanged; callers treat an unresolved alias as
+        possibly meaning any calendar.
+        """
+        if calendar_id != PRIMARY_ALIAS:
+            return calendar_id
+        if self._primary_id is None:
+            with self._lock:
+                if self._primary_id is None:
+                    try:
+                        calendar = self.get_api_resource().calendars().get(calendarId=PRIMARY_ALIAS).execute()
+                    except Exception as e:
+                        print(f"Could not resolve the primary calendar ID: {e}")
+                        return calendar_id
+                    self._primary_id = calendar["id"]
+        return self._primary_id
+
+    def reset(self):
+        """Forget the primary calendar's ID (after the account's credentials change)."""
+        with self._lock:
+            self._primary_id = None
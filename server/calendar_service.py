@@ -1,42 +1,140 @@
-from langchain_google_community import CalendarToolkit
-from langchain_google_community.calendar.utils import build_resource_service
 from auth_service import GoogleAuthService
+from calendar_cache import CalendarReadCache
+from calendar_ids import CalendarIdResolver
+from calendar_tools import build_calendar_tools
+from interval_index import EventIntervalIndex
+from event_mirror import EventMirror
+from http_transport import CalendarTransport, load_discovery_document
+from config import (
+    CALENDAR_CACHE_TTL_SECONDS, CALENDAR_CACHE_MAX_ENTRIES,
+    CONFLICT_INDEX_HORIZON_DAYS, CONFLICT_INDEX_REFRESH_SECONDS,
+    EVENT_MIRROR_ENABLED, EVENT_MIRROR_PATH, EVENT_MIRROR_SYNC_SECONDS,
+    EVENT_MIRROR_PAST_DAYS, CALENDAR_HTTP_TIMEOUT_SECONDS, DISCOVERY_CACHE_FILE
+)
 
 
 class CalendarService:
     """Service for managing Google Calendar operations."""
     
-    def __init__(self):
-        self.auth_service = GoogleAuthService()
+    def __init__(self, token_file: str = None, interactive: bool = True, mirror_path: str = None):
+        """
+        Args:
+            token_file: The user's OAuth token file (defaults to TOKEN_FILE)
+            interactive: Whether a missing token may launch the browser OAuth flow
+            mirror_path: The user's event mirror database (defaults to EVENT_MIRROR_PATH)
+        """
+        self.auth_service = GoogleAuthService(token_file, interactive)
         self._api_resource = None
         self._tools = None
+        self._tools_by_name = None
+        self.transport = None
+        self.calendar_ids = CalendarIdResolver(self._get_api_resource)
+        self.cache = CalendarReadCache(
+            CALENDAR_CACHE_TTL_SECONDS, CALENDAR_CACHE_MAX_ENTRIES, self.calendar_ids.resolve
+        )
+        self.conflict_index = EventIntervalIndex(
+            self._get_api_resource,
+            CONFLICT_INDEX_HORIZON_DAYS,
+            CONFLICT_INDEX_REFRESH_SECONDS
+        )
+        self.mirror = None
+        if EVENT_MIRROR_ENABLED:
+            self.mirror = EventMirror(
+                mirror_path or EVENT_MIRROR_PATH,
+                self._get_api_resource,
+                EVENT_MIRROR_SYNC_SECONDS,
+                EVENT_MIRROR_PAST_DAYS,
+                self.calendar_ids.resolve
+            )
     
     def _get_api_resource(self):
-        """Build and cache the Google Calendar API resource."""
+        """
+        Get the Google Calendar API resource.
+        
+        The resource is thread-safe: every thread calling the API uses its own
+        pooled keep-alive client from the transport.
+        """
         if self._api_resource is None:
             credentials = self.auth_service.get_access_token()
-            self._api_resource = build_resource_service(credentials=credentials)
+            if self.transport is None:
+                self.transport = CalendarTransport(
+                    credentials,
+                    load_discovery_document("calendar", "v3", DISCOVERY_CACHE_FILE),
+                    CALENDAR_HTTP_TIMEOUT_SECONDS
+                )
+                self.auth_service.add_credentials_listener(self.transport.update_credentials)
+            self._api_resource = self.transport.resource
         return self._api_resource
     
     def get_calendar_tools(self):
         """
         Get the calendar tools for LangChain integration.
         
+        Read tools are served through the read cache; write tools invalidate it
+        and keep the conflict index current. Event creation is pre-checked
+        against the conflict index. With the event mirror enabled, searches
+        are answered from the local mirror.
+        
         Returns:
             List of calendar tools for the LLM to use
         """
         if self._tools is None:
             api_resource = self._get_api_resource()
-            toolkit = CalendarToolkit(api_resource=api_resource)
-            self._tools = toolkit.get_tools()
+            self._tools = build_calendar_tools(
+                api_resource, self.cache, self.conflict_index, self.mirror
+            )
         return self._tools
     
+    def get_tools_by_name(self) -> dict:
+        """Get the calendar tools keyed by tool name."""
+        if self._tools_by_name is None:
+            self._tools_by_name = {tool.name: tool for tool in self.get_calendar_tools()}
+        return self._tools_by_name
+    
     def refresh_tools(self):
-        """Refresh the calendar tools (useful after token refresh)."""
+        """
+        Rebuild the calendar tools with credentials reloaded from the token file.
+        
+        Useful after token.json was replaced: the cached credentials would
+        otherwise be kept until they expire.
+        """
         self._api_resource = None
         self._tools = None
+        self._tools_by_name = None
+        if self.transport is not None:
+            self.transport.close()
+        credentials = self.auth_service.reload_credentials()
+        if self.transport is not None:
+            self.transport.update_credentials(credentials)
+        self.calendar_ids.reset()
+        self.cache.clear()
+        self.conflict_index.invalidate()
         return self.get_calendar_tools()
     
+    def get_cache_stats(self) -> dict:
+        """Get read cache statistics, including the hit ratio."""
+        return self.cache.get_stats()
+    
+    def get_conflict_index_stats(self) -> dict:
+        """Get conflict index sizes and query timing."""
+        return self.conflict_index.get_stats()
+    
+    def get_mirror_stats(self):
+        """Get event mirror statistics, or None if the mirror is disabled."""
+        return self.mirror.get_stats() if self.mirror else None
+    
+    def get_transport_stats(self):
+        """Get pooled HTTP client statistics, or None before the first API call."""
+        return self.transport.get_stats() if self.transport else None
+    
+    def close(self):
+        """Release background resources held by the service."""
+        self.auth_service.stop_background_refresh()
+        if self.mirror:
+            self.mirror.close()
+        if self.transport:
+            self.transport.close()
+    
     def is_ready(self) -> bool:
         """Check if the calendar service is ready to use."""
         try:
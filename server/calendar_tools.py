@@ -0,0 +1,340 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Type
+
+from googleapiclient.discovery import Resource
+from pydantic import BaseModel, Field
+from langchain_google_community.calendar.base import CalendarBaseTool
+from langchain_google_community.calendar.create_event import CalendarCreateEvent, CreateEventSchema
+from langchain_google_community.calendar.current_datetime import GetCurrentDatetime
+from langchain_google_community.calendar.delete_event import CalendarDeleteEvent
+from langchain_google_community.calendar.get_calendars_info import GetCalendarsInfo
+from langchain_google_community.calendar.move_event import CalendarMoveEvent
+from langchain_google_community.calendar.search_events import CalendarSearchEvents
+from langchain_google_community.calendar.update_event import CalendarUpdateEvent
+
+from calendar_batch import BatchCreateEvents, BatchDeleteEvents, BatchGetEvents, BatchUpdateEvents
+from calendar_cache import CalendarReadCache, parse_tool_window
+
+
+def _local_window(start: str, end: str) -> Optional[tuple]:
+    """Parse tool datetimes (local wall-clock time) into an aware window."""
+    window = parse_tool_window(start, end)
+    if window is None:
+        return None
+    return window[0].astimezone(), window[1].astimezone()
+
+
+def _event_id_from_link(html_link: str) -> Optional[str]:
+    """Recover the event ID from an event's htmlLink ('eid' is base64 of 'id calendar')."""
+    try:
+        eid = html_link.split("eid=", 1)[1].split("&", 1)[0]
+        decoded = base64.urlsafe_b64decode(eid + "=" * (-len(eid) % 4)).decode()
+        return decoded.split(" ", 1)[0]
+    except Exception:
+        return None
+
+
+def _invalidate_reads(tool, calendar_id: str, window: Optional[tuple] = None):
+    """Invalidate a write tool's cached and mirrored reads of a calendar."""
+    tool.cache.invalidate(calendar_id, window)
+    if tool.mirror is not None:
+        tool.mirror.mark_stale(calendar_id)
+
+
+class CachedSearchEvents(CalendarSearchEvents):
+    """search_events backed by the read cache and, when enabled, the local event mirror."""
+
+    cache: Any = None
+    mirror: Any = None
+
+    def _search_mirror(self, calendar_ids, min_datetime: str, max_datetime: str,
+                       max_results: int, query: Optional[str]):
+        """
+        Answer a search from the local mirror instead of events.list.
+
+        Returns:
+            The tool's result, or None if the range starts before the mirrored
+            window or the mirror fails (the API is asked instead)
+        """
+        try:
+            datetime_format = "%Y-%m-%d %H:%M:%S"
+            start = datetime.strptime(min_datetime, datetime_format).astimezone()
+            end = datetime.strptime(max_datetime, datetime_format).astimezone()
+            if not self.mirror.covers(start):
+                return None
+            events = []
+            for calendar_id in calendar_ids:
+                events.extend(self.mirror.query(calendar_id, start, end, query, max_results))
+        except Exception as e:
+            print(f"Event mirror unavailable, searching the API: {e}")
+            return None
+        return self._process_data_events(events)
+
+    def _run(self, calendars_info: str, min_datetime: str, max_datetime: str,
+             max_results: int = 10, single_events: bool = True,
+             order_by: str = "startTime", query: Optional[str] = None,
+             run_manager=None):
+        try:
+            calendar_ids = tuple(sorted(cal["id"] for cal in json.loads(calendars_info)))
+        except (TypeError, ValueError, KeyError):
+            calendar_ids = None
+
+        key = (self.name, calendars_info, min_datetime, max_datetime,
+               max_results, single_events, order_by, query)
+        cached = self.cache.get(key)
+        if cached is not CalendarReadCache.MISS:
+            return cached
+
+        result = None
+        # The mirror stores expanded single events ordered by start time
+        if self.mirror is not None and calendar_ids and single_events and order_by == "startTime":
+            result = self._search_mirror(calendar_ids, min_datetime, max_datetime, max_results, query)
+        if result is None:
+            result = super()._run(
+                calendars_info, min_datetime, max_datetime, max_results,
+                single_events, order_by, query, run_manager=run_manager
+            )
+        if calendar_ids:
+            self.cache.put(
+                key, result,
+                calendars=calendar_ids,
+                window=parse_tool_window(min_datetime, max_datetime)
+            )
+        return result
+
+
+class CachedCalendarsInfo(GetCalendarsInfo):
+    """get_calendars_info backed by the read cache."""
+
+    cache: Any = None
+
+    def _run(self, run_manager=None) -> str:
+        key = (self.name,)
+        cached = self.cache.get(key)
+        if cached is not CalendarReadCache.MISS:
+            return cached
+
+        result = super()._run(run_manager=run_manager)
+        self.cache.put(key, result)
+        return result
+
+
+class CachedCurrentDatetime(GetCurrentDatetime):
+    """get_current_datetime with the calendar timezone lookup cached."""
+
+    cache: Any = None
+
+    def get_timezone(self, calendar_id: Optional[str]) -> str:
+        key = (self.name, calendar_id)
+        cached = self.cache.get(key)
+        if cached is not CalendarReadCache.MISS:
+            return cached
+
+        timezone = super().get_timezone(calendar_id)
+        self.cache.put(key, timezone)
+        return timezone
+
+
+class ConflictCheckSchema(BaseModel):
+    """Input for CalendarConflictCheck."""
+
+    start_datetime: str = Field(
+        ..., description="The start datetime to check in 'YYYY-MM-DD HH:MM:SS' format."
+    )
+    end_datetime: str = Field(
+        ..., description="The end datetime to check in 'YYYY-MM-DD HH:MM:SS' format."
+    )
+    calendar_id: str = Field(default="primary", description="The calendar ID to check.")
+
+
+class CalendarConflictCheck(CalendarBaseTool):
+    """Tool that checks a time range for conflicting events using the local interval index."""
+
+    name: str = "check_calendar_conflicts"
+    description: str = (
+        "Use this tool to check instantly whether a time range overlaps existing events. "
+        "Returns the conflicting events, or an empty list if the slot is free."
+    )
+    args_schema: Type[ConflictCheckSchema] = ConflictCheckSchema
+    index: Any = None
+    mirror: Any = None
+
+    def _run(self, start_datetime: str, end_datetime: str,
+             calendar_id: str = "primary", run_manager=None) -> str:
+        window = _local_window(start_datetime, end_datetime)
+        if window is None:
+            raise ValueError("The datetime format is incorrect.")
+
+        # Outside the indexed window this asks the mirror or the API directly
+        conflicts = self.index.find_conflicts_live(calendar_id, *window, mirror=self.mirror)
+        return json.dumps(conflicts)
+
+
+class CheckedCreateEventSchema(CreateEventSchema):
+    """Input for CheckedCreateEvent."""
+
+    allow_conflicts: bool = Field(
+        default=False,
+        description=(
+            "Set to true only after the user has confirmed they want this event "
+            "even though it overlaps existing events."
+        ),
+    )
+
+
+class CheckedCreateEvent(CalendarCreateEvent):
+    """
+    create_calendar_event with an automatic conflict pre-check.
+
+    Overlapping events are reported instead of booking, unless allow_conflicts
+    is set. Successful writes update the interval index and invalidate the
+    read cache.
+    """
+
+    description: str = (
+        "Use this tool to create an event. "
+        "The input must include the summary, start, and end datetime for the event. "
+        "It checks for conflicting events first and does not book over them "
+        "unless allow_conflicts is true."
+    )
+    args_schema: Type[CheckedCreateEventSchema] = CheckedCreateEventSchema
+    cache: Any = None
+    index: Any = None
+    mirror: Any = None
+
+    def _run(self, *args, allow_conflicts: bool = False, run_manager=None, **kwargs):
+        calendar_id = kwargs.get("calendar_id", "primary")
+        naive_window = window = None
+        if not kwargs.get("recurrence"):
+            naive_window = parse_tool_window(kwargs.get("start_datetime"), kwargs.get("end_datetime"))
+        if naive_window is not None:
+            window = (naive_window[0].astimezone(), naive_window[1].astimezone())
+
+        if window is not None and not allow_conflicts:
+            try:
+                conflicts = self.index.find_conflicts_live(calendar_id, *window, mirror=self.mirror)
+            except Exception as e:
+                print(f"Conflict pre-check unavailable: {e}")
+                conflicts = None
+            if conflicts:
+                return (
+                    "Event not created: the time overlaps existing events "
+                    f"{json.dumps(conflicts)}. Ask the user whether to delete or move "
+                    "the existing event, pick another time, or book anyway with "
+                    "allow_conflicts set to true."
+                )
+
+        result = super()._run(*args, run_manager=run_manager, **kwargs)
+
+        if window is not None:
+            _invalidate_reads(self, calendar_id, naive_window)
+            self.index.add_event(
+                calendar_id, window[0], window[1],
+                _event_id_from_link(result), kwargs.get("summary")
+            )
+        else:
+            _invalidate_reads(self, calendar_id)
+            self.index.invalidate(calendar_id)
+        return result
+
+
+class InvalidatingUpdateEvent(CalendarUpdateEvent):
+    """update_calendar_event that keeps the read cache and interval index current."""
+
+    cache: Any = None
+    index: Any = None
+    mirror: Any = None
+
+    def _run(self, *args, run_manager=None, **kwargs):
+        result = super()._run(*args, run_manager=run_manager, **kwargs)
+        calendar_id = kwargs.get("calendar_id", "primary")
+        # The event's previous time is unknown here, so drop the whole calendar
+        _invalidate_reads(self, calendar_id)
+
+        window = _local_window(kwargs.get("start_datetime"), kwargs.get("end_datetime"))
+        if window is not None and not kwargs.get("recurrence"):
+            self.index.remove_event(calendar_id, kwargs.get("event_id"))
+            self.index.add_event(calendar_id, window[0], window[1], kwargs.get("event_id"), kwargs.get("summary"))
+        elif kwargs.get("recurrence"):
+            self.index.invalidate(calendar_id)
+        return result
+
+
+class InvalidatingDeleteEvent(CalendarDeleteEvent):
+    """delete_calendar_event that keeps the read cache and interval index current."""
+
+    cache: Any = None
+    index: Any = None
+    mirror: Any = None
+
+    def _run(self, *args, run_manager=None, **kwargs):
+        result = super()._run(*args, run_manager=run_manager, **kwargs)
+        calendar_id = kwargs.get("calendar_id") or "primary"
+        _invalidate_reads(self, calendar_id)
+        self.index.remove_event(calendar_id, kwargs.get("event_id"))
+        return result
+
+
+class InvalidatingMoveEvent(CalendarMoveEvent):
+    """move_calendar_event that keeps the read cache and interval index current."""
+
+    cache: Any = None
+    index: Any = None
+    mirror: Any = None
+
+    def _run(self, *args, run_manager=None, **kwargs):
+        # The upstream schema field is misspelled; map it onto the _run parameter
+        origin_calendar_id = kwargs.pop("origin_calenddar_id", None) or kwargs.get("origin_calendar_id")
+        kwargs["origin_calendar_id"] = origin_calendar_id
+        result = super()._run(*args, run_manager=run_manager, **kwargs)
+
+        destination_calendar_id = kwargs.get("destination_calendar_id")
+        _invalidate_reads(self, origin_calendar_id)
+        _invalidate_reads(self, destination_calendar_id)
+        self.index.remove_event(origin_calendar_id, kwargs.get("event_id"))
+        self.index.invalidate(destination_calendar_id)
+        return result
+
+
+def build_calendar_tools(api_resource, cache: CalendarReadCache, index, mirror=None) -> list:
+    """
+    Build the CalendarToolkit tool set with caching, conflict checks and index upkeep.
+
+    Args:
+        api_resource: Google Calendar API resource
+        cache: Shared read cache
+        index: Shared EventIntervalIndex
+        mirror: Optional EventMirror that searches are answered from
+
+    Returns:
+        List of calendar tools: CalendarToolkit's tools in their usual order,
+        followed by check_calendar_conflicts and the batch tools
+    """
+    write_hooks = {"cache": cache, "index": index, "mirror": mirror}
+    return [
+        CheckedCreateEvent(api_resource=api_resource, **write_hooks),
+        CachedSearchEvents(api_resource=api_resource, cache=cache, mirror=mirror),
+        InvalidatingUpdateEvent(api_resource=api_resource, **write_hooks),
+        CachedCalendarsInfo(api_resource=api_resource, cache=cache),
+        InvalidatingMoveEvent(api_resource=api_resource, **write_hooks),
+        InvalidatingDeleteEvent(api_resource=api_resource, **write_hooks),
+        CachedCurrentDatetime(api_resource=api_resource, cache=cache),
+        CalendarConflictCheck(api_resource=api_resource, index=index, mirror=mirror),
+        BatchGetEvents(api_resource=api_resource),
+        BatchCreateEvents(api_resource=api_resource, **write_hooks),
+        BatchUpdateEvents(api_resource=api_resource, **write_hooks),
+        BatchDeleteEvents(api_resource=api_resource, **write_hooks),
+    ]
+
+
+def build_tool_templates() -> list:
+    """
+    Build the calendar tools without an API resource.
+
+    The templates carry names, descriptions and argument schemas only; they
+    are shared by every user for binding to the LLM and routing tool calls,
+    and are never run (each user's own tools are).
+    """
+    return build_calendar_tools(Resource.__new__(Resource), cache=None, index=None)
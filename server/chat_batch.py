@@ -0,0 +1,64 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+def _default_error(error: Exception) -> dict:
+    return {"error": str(error)}
+
+
+async def run_batch(items: list, concurrency: int, run_item, stop_thread_on_error: bool = True,
+                    describe_error=_default_error):
+    """
+    Run chat items concurrently across threads and in order within each thread.
+
+    Items of one thread form a lane that runs one item at a time in
+    submission order; lanes run in parallel, with at most ``concurrency``
+    items running at once across the batch. Closing the generator cancels
+    whatever is still running or queued.
+
+    Args:
+        items: Objects with a ``thread_id``, in submission order
+        concurrency: Items running at once
+        run_item: Coroutine function taking an item and returning its reply
+        stop_thread_on_error: Skip a thread's later items once one of them fails
+        describe_error: Maps an item's exception to the fields reported for it
+
+    Yields:
+        One result per item as it completes: ``index``, ``thread_id``,
+        ``status`` ("ok", "error" or "skipped"), ``elapsed_ms`` and either
+        ``response`` or the error fields
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    results = asyncio.Queue()
+    lanes = OrderedDict()
+    for index, item in enumerate(items):
+        lanes.setdefault(item.thread_id, []).append(index)
+
+    async def run_lane(indices: list):
+        failed = False
+        for index in indices:
+            item = items[index]
+            result = {"index": index, "thread_id": item.thread_id}
+            if failed and stop_thread_on_error:
+                result.update(status="skipped", error="An earlier message in this thread failed", elapsed_ms=0.0)
+                await results.put(result)
+                continue
+            started = time.perf_counter()
+            async with semaphore:
+                try:
+                    result.update(status="ok", response=await run_item(item))
+                except Exception as e:
+                    failed = True
+                    result.update(status="error", **describe_error(e))
+            result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            await results.put(result)
+
+    tasks = [asyncio.create_task(run_lane(indices)) for indices in lanes.values()]
+    try:
+        for _ in range(len(items)):
+            yield await results.get()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,543 @@
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    copy_checkpoint,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import MemorySaver
+
+from telemetry import CHECKPOINT_SECONDS, trace
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    Disk-backed LangGraph checkpointer with a bounded hot cache.
+
+    Checkpoints are stored whole (channel values included) in SQLite, so
+    conversations survive restarts. Only the newest ``keep_last`` checkpoints
+    of each thread are kept; older ones are superseded by the full state in
+    the newer checkpoints and are pruned on write. The latest checkpoint of the
+    ``hot_threads`` most recently used threads is kept deserialized in memory,
+    and threads idle for longer than ``thread_ttl_seconds`` are deleted.
+
+    With ``shared`` the database is written by several server processes, so
+    a cached checkpoint is only served after a cheap check that no other
+    process has since added a newer checkpoint or pending writes to it.
+    """
+
+    SWEEP_INTERVAL_SECONDS = 60
+
+    # How long a writer waits for another process's transaction before failing
+    BUSY_TIMEOUT_SECONDS = 30
+
+    def __init__(self, db_path: str, hot_threads: int = 256,
+                 thread_ttl_seconds: float = 7 * 24 * 3600, keep_last: int = 2,
+                 shared: bool = False):
+        """
+        Args:
+            db_path: SQLite database file
+            hot_threads: Threads whose latest checkpoint is cached in memory
+            thread_ttl_seconds: Idle time after which a thread is deleted (0 keeps threads forever)
+            keep_last: Checkpoints kept per thread and namespace
+            shared: Whether other processes write the same database
+        """
+        super().__init__()
+        self.db_path = db_path
+        self.hot_threads = hot_threads
+        self.thread_ttl_seconds = thread_ttl_seconds
+        self.keep_last = max(1, keep_last)
+        self.shared = shared
+        self._lock = threading.RLock()
+        self._hot = OrderedDict()
+        self._last_sweep = 0.0
+        self._conn = sqlite3.connect(
+            db_path, timeout=self.BUSY_TIMEOUT_SECONDS, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                parent_checkpoint_id TEXT,
+                checkpoint_type TEXT NOT NULL,
+                checkpoint BLOB NOT NULL,
+                metadata_type TEXT NOT NULL,
+                metadata BLOB NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                value_type TEXT NOT NULL,
+                value BLOB NOT NULL,
+                task_path TEXT NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+            CREATE TABLE IF NOT EXISTS threads (
+                thread_id TEXT PRIMARY KEY,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS threads_by_access ON threads (last_access);
+        """)
+        self._conn.commit()
+        self.hot_hits = 0
+        self.hot_misses = 0
+        self.hot_stale = 0
+        self.pruned_checkpoints = 0
+        self.evicted_threads = 0
+
+    # Hot cache
+
+    def _hot_get(self, key: tuple) -> Optional[CheckpointTuple]:
+        entry = self._hot.get(key)
+        if entry is None:
+            return None
+        self._hot.move_to_end(key)
+        # The graph updates loaded checkpoints in place, so hand out a copy
+        return entry._replace(
+            checkpoint=copy_checkpoint(entry.checkpoint),
+            pending_writes=list(entry.pending_writes),
+        )
+
+    def _hot_put(self, key: tuple, checkpoint_tuple: CheckpointTuple):
+        if self.hot_threads <= 0:
+            return
+        self._hot[key] = checkpoint_tuple
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.hot_threads:
+            self._hot.popitem(last=False)
+
+    def _hot_is_current(self, entry: CheckpointTuple) -> bool:
+        """Whether a cached checkpoint is still the latest on disk, with the same pending writes."""
+        configurable = entry.config["configurable"]
+        row = self._conn.execute(
+            "SELECT checkpoint_id, "
+            "  (SELECT COUNT(*) FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?) "
+            "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT 1",
+            (
+                configurable["thread_id"], configurable["checkpoint_ns"], configurable["checkpoint_id"],
+                configurable["thread_id"], configurable["checkpoint_ns"],
+            )
+        ).fetchone()
+        return (
+            row is not None
+            and row[0] == configurable["checkpoint_id"]
+            and row[1] == len(entry.pending_writes)
+        )
+
+    def _hot_drop_thread(self, thread_id: str):
+        for key in [key for key in self._hot if key[0] == thread_id]:
+            del self._hot[key]
+
+    # Storage helpers
+
+    def _touch(self, thread_id: str):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO threads VALUES (?, ?)", (thread_id, time.time())
+        )
+
+    def _load_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> list:
+        rows = self._conn.execute(
+            "SELECT task_id, channel, value_type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+            "ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id)
+        ).fetchall()
+        return [
+            (task_id, channel, self.serde.loads_typed((value_type, value)))
+            for task_id, channel, value_type, value in rows
+        ]
+
+    def _row_to_tuple(self, row) -> CheckpointTuple:
+        (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,
+         checkpoint_type, checkpoint, metadata_type, metadata) = row
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=self.serde.loads_typed((checkpoint_type, checkpoint)),
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=self._load_writes(thread_id, checkpoint_ns, checkpoint_id),
+        )
+
+    def _prune(self, thread_id: str, checkpoint_ns: str):
+        """Delete superseded checkpoints of a thread and their pending writes."""
+        cursor = self._conn.execute(
+            "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "AND checkpoint_id NOT IN ("
+            "  SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "  ORDER BY checkpoint_id DESC LIMIT ?"
+            ")",
+            (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.keep_last)
+        )
+        if cursor.rowcount:
+            self.pruned_checkpoints += cursor.rowcount
+            self._conn.execute(
+                "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND checkpoint_id NOT IN ("
+                "  SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+                ")",
+                (thread_id, checkpoint_ns, thread_id, checkpoint_ns)
+            )
+
+    def _delete_threads(self, thread_ids: list):
+        for thread_id in thread_ids:
+            self._conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            self._conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+            self._conn.execute("DELETE FROM threads WHERE thread_id = ?", (thread_id,))
+            self._hot_drop_thread(thread_id)
+
+    def _maybe_sweep(self):
+        """Delete idle threads, at most once per SWEEP_INTERVAL_SECONDS."""
+        if self.thread_ttl_seconds <= 0:
+            return
+        now = time.time()
+        if now - self._last_sweep < self.SWEEP_INTERVAL_SECONDS:
+            return
+        self._last_sweep = now
+        self.evict_idle_threads()
+
+    def evict_idle_threads(self) -> int:
+        """
+        Delete every thread idle for longer than the TTL.
+
+        Returns:
+            Number of threads deleted
+        """
+        with self._lock:
+            cutoff = time.time() - self.thread_ttl_seconds
+            idle = [
+                row[0] for row in self._conn.execute(
+                    "SELECT thread_id FROM threads WHERE last_access < ?", (cutoff,)
+                ).fetchall()
+            ]
+            self._delete_threads(idle)
+            self._conn.commit()
+            self.evicted_threads += len(idle)
+        if idle:
+            print(f"Evicted {len(idle)} idle conversation thread(s)")
+        return len(idle)
+
+    # BaseCheckpointSaver interface
+
+    @trace(CHECKPOINT_SECONDS, "checkpoint.get", op="get")
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        key = (thread_id, checkpoint_ns)
+
+        with self._lock:
+            hot = self._hot_get(key)
+            if hot is not None and self.shared and not self._hot_is_current(hot):
+                # Another process moved the thread on since it was cached
+                del self._hot[key]
+                self.hot_stale += 1
+                hot = None
+            if hot is not None and (
+                checkpoint_id is None
+                or hot.config["configurable"]["checkpoint_id"] == checkpoint_id
+            ):
+                self.hot_hits += 1
+                return hot
+            self.hot_misses += 1
+
+            sql = (
+                "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+                "checkpoint_type, checkpoint, metadata_type, metadata FROM checkpoints "
+                "WHERE thread_id = ? AND checkpoint_ns = ?"
+            )
+            params = [thread_id, checkpoint_ns]
+            if checkpoint_id:
+                sql += " AND checkpoint_id = ?"
+                params.append(checkpoint_id)
+            else:
+                sql += " ORDER BY checkpoint_id DESC LIMIT 1"
+            row = self._conn.execute(sql, params).fetchone()
+            if row is None:
+                return None
+            checkpoint_tuple = self._row_to_tuple(row)
+            if checkpoint_id is None:
+                self._hot_put(key, checkpoint_tuple)
+            return checkpoint_tuple
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        sql = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+            "checkpoint_type, checkpoint, metadata_type, metadata FROM checkpoints"
+        )
+        clauses, params = [], []
+        if config is not None:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            checkpoint_id = get_checkpoint_id(config)
+            if checkpoint_id:
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before is not None and get_checkpoint_id(before):
+            clauses.append("checkpoint_id < ?")
+            params.append(get_checkpoint_id(before))
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY checkpoint_id DESC"
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            checkpoint_tuples = []
+            for row in rows:
+                if limit is not None and len(checkpoint_tuples) >= limit:
+                    break
+                checkpoint_tuple = self._row_to_tuple(row)
+                if filter and not all(
+                    checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()
+                ):
+                    continue
+                checkpoint_tuples.append(checkpoint_tuple)
+        yield from checkpoint_tuples
+
+    @trace(CHECKPOINT_SECONDS, "checkpoint.put", op="put")
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        parent_checkpoint_id = config["configurable"].get("checkpoint_id")
+        metadata = get_checkpoint_metadata(config, metadata)
+        checkpoint_type, checkpoint_blob = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_blob = self.serde.dumps_typed(metadata)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id, checkpoint_ns, checkpoint["id"], parent_checkpoint_id,
+                    checkpoint_type, checkpoint_blob, metadata_type, metadata_blob,
+                )
+            )
+            self._prune(thread_id, checkpoint_ns)
+            self._touch(thread_id)
+            self._conn.commit()
+
+            new_config = {
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint["id"],
+                }
+            }
+            # Round-trip through the serializer so cached state is never shared with the caller
+            self._hot_put((thread_id, checkpoint_ns), CheckpointTuple(
+                config=new_config,
+                checkpoint=self.serde.loads_typed((checkpoint_type, checkpoint_blob)),
+                metadata=self.serde.loads_typed((metadata_type, metadata_blob)),
+                parent_config=(
+                    {
+                        "configurable": {
+                            "thread_id": thread_id,
+                            "checkpoint_ns": checkpoint_ns,
+                            "checkpoint_id": parent_checkpoint_id,
+                        }
+                    }
+                    if parent_checkpoint_id
+                    else None
+                ),
+                pending_writes=[],
+            ))
+            self._maybe_sweep()
+        return new_config
+
+    @trace(CHECKPOINT_SECONDS, "checkpoint.put_writes", op="put_writes")
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        with self._lock:
+            for idx, (channel, value) in enumerate(writes):
+                write_idx = WRITES_IDX_MAP.get(channel, idx)
+                value_type, value_blob = self.serde.dumps_typed(value)
+                # Regular writes are kept as first written; special writes overwrite
+                self._conn.execute(
+                    ("INSERT OR IGNORE" if write_idx >= 0 else "INSERT OR REPLACE")
+                    + " INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        thread_id, checkpoint_ns, checkpoint_id, task_id, write_idx,
+                        channel, value_type, value_blob, task_path,
+                    )
+                )
+            self._conn.commit()
+            # The cached tuple no longer has the full set of pending writes
+            hot = self._hot.get((thread_id, checkpoint_ns))
+            if hot is not None and hot.config["configurable"]["checkpoint_id"] == checkpoint_id:
+                del self._hot[(thread_id, checkpoint_ns)]
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._delete_threads([thread_id])
+            self._conn.commit()
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        checkpoint_tuples = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint_tuple in checkpoint_tuples:
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        next_v = current_v + 1
+        next_h = random.random()
+        return f"{next_v:032}.{next_h:016}"
+
+    # Lifecycle
+
+    def get_stats(self) -> dict:
+        """Get store size, hot cache hit ratio and pruning/eviction counters."""
+        with self._lock:
+            threads = self._conn.execute("SELECT COUNT(*) FROM threads").fetchone()[0]
+            checkpoints = self._conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+            lookups = self.hot_hits + self.hot_misses
+            return {
+                "backend": "sqlite",
+                "db_path": self.db_path,
+                "db_bytes": os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0,
+                "threads": threads,
+                "checkpoints": checkpoints,
+                "hot_threads": len(self._hot),
+                "hot_max_threads": self.hot_threads,
+                "hot_hits": self.hot_hits,
+                "hot_misses": self.hot_misses,
+                "hot_hit_ratio": round(self.hot_hits / lookups, 4) if lookups else 0.0,
+                "hot_stale": self.hot_stale,
+                "shared": self.shared,
+                "pruned_checkpoints": self.pruned_checkpoints,
+                "evicted_threads": self.evicted_threads,
+                "thread_ttl_seconds": self.thread_ttl_seconds,
+                "keep_last": self.keep_last,
+            }
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._hot.clear()
+            self._conn.close()
+
+
+def create_checkpointer(backend: str, db_path: str, hot_threads: int,
+                        thread_ttl_seconds: float, keep_last: int,
+                        shared: bool = False) -> BaseCheckpointSaver:
+    """
+    Create the conversation checkpoint store.
+
+    Args:
+        backend: "sqlite" (persistent, bounded) or "memory" (LangGraph's MemorySaver)
+        db_path: SQLite database file
+        hot_threads: Threads whose latest checkpoint is cached in memory
+        thread_ttl_seconds: Idle time after which a thread is deleted
+        keep_last: Checkpoints kept per thread
+        shared: Whether several server processes use the store at once
+
+    Returns:
+        A LangGraph checkpointer
+    """
+    if backend == "memory":
+        if shared:
+            raise ValueError("The memory checkpoint backend cannot be shared between processes; use sqlite")
+        return MemorySaver()
+    if backend == "sqlite":
+        return SQLiteCheckpointSaver(db_path, hot_threads, thread_ttl_seconds, keep_last, shared)
+    raise ValueError(f"Unknown checkpoint backend: {backend}")
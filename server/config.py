@@ -7,6 +7,57 @@ load_dotenv()
 SCOPES = ["https://www.googleapis.com/auth/calendar"]
 CREDENTIALS_FILE = "credentials.json"
 TOKEN_FILE = "token.json"
+TOKEN_REFRESH_MARGIN_SECONDS = int(os.getenv("TOKEN_REFRESH_MARGIN_SECONDS", "300"))
+TOKEN_REFRESH_RETRY_SECONDS = int(os.getenv("TOKEN_REFRESH_RETRY_SECONDS", "60"))
+
+# Multi-tenant Configuration (per-user tokens are <TENANT_TOKENS_DIR>/<user_id>.json).
+# X-User-ID is only accepted when TENANT_AUTH_SECRET is set, together with an
+# X-User-Token header holding the hex HMAC-SHA256 of the user ID under that secret
+TENANT_AUTH_SECRET = os.getenv("TENANT_AUTH_SECRET", "")
+TENANT_TOKENS_DIR = os.getenv("TENANT_TOKENS_DIR", "tokens")
+TENANT_POOL_MAX = int(os.getenv("TENANT_POOL_MAX", "64"))
+TENANT_IDLE_SECONDS = float(os.getenv("TENANT_IDLE_SECONDS", "1800"))
+
+# Calendar API Transport Configuration
+CALENDAR_HTTP_TIMEOUT_SECONDS = float(os.getenv("CALENDAR_HTTP_TIMEOUT_SECONDS", "30"))
+DISCOVERY_CACHE_FILE = os.getenv("DISCOVERY_CACHE_FILE", "calendar_v3_discovery.json")
+
+# Calendar Read Cache Configuration (set the TTL to 0 to disable)
+CALENDAR_CACHE_TTL_SECONDS = float(os.getenv("CALENDAR_CACHE_TTL_SECONDS", "60"))
+CALENDAR_CACHE_MAX_ENTRIES = int(os.getenv("CALENDAR_CACHE_MAX_ENTRIES", "256"))
+
+# Conflict Index Configuration
+CONFLICT_INDEX_HORIZON_DAYS = int(os.getenv("CONFLICT_INDEX_HORIZON_DAYS", "90"))
+CONFLICT_INDEX_REFRESH_SECONDS = float(os.getenv("CONFLICT_INDEX_REFRESH_SECONDS", "300"))
+
+# Local Event Mirror Configuration (SQLite, kept current with sync tokens)
+EVENT_MIRROR_ENABLED = os.getenv("EVENT_MIRROR_ENABLED", "false").lower() == "true"
+EVENT_MIRROR_PATH = os.getenv("EVENT_MIRROR_PATH", "calendar_mirror.db")
+EVENT_MIRROR_SYNC_SECONDS = float(os.getenv("EVENT_MIRROR_SYNC_SECONDS", "30"))
+EVENT_MIRROR_PAST_DAYS = int(os.getenv("EVENT_MIRROR_PAST_DAYS", "30"))
+
+# Conversation Checkpoint Store ("sqlite" persists threads, "memory" keeps them in process)
+CHECKPOINT_BACKEND = os.getenv("CHECKPOINT_BACKEND", "sqlite")
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", "checkpoints.db")
+CHECKPOINT_HOT_THREADS = int(os.getenv("CHECKPOINT_HOT_THREADS", "256"))
+CHECKPOINT_THREAD_TTL_SECONDS = float(os.getenv("CHECKPOINT_THREAD_TTL_SECONDS", "604800"))
+CHECKPOINT_KEEP_LAST = int(os.getenv("CHECKPOINT_KEEP_LAST", "2"))
+
+# Conversation Context Configuration (set the budget to 0 to send the full history)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+CONTEXT_RECENT_TURNS = int(os.getenv("CONTEXT_RECENT_TURNS", "3"))
+CONTEXT_TOOL_OUTPUT_CHARS = int(os.getenv("CONTEXT_TOOL_OUTPUT_CHARS", "500"))
+
+# Fast-path Intent Router (answers simple agenda/availability questions without the LLM)
+INTENT_ROUTER_ENABLED = os.getenv("INTENT_ROUTER_ENABLED", "true").lower() == "true"
+
+# Tool Execution Configuration
+TOOL_MAX_CONCURRENCY = int(os.getenv("TOOL_MAX_CONCURRENCY", "8"))
+TOOL_CALL_TIMEOUT_SECONDS = float(os.getenv("TOOL_CALL_TIMEOUT_SECONDS", "30"))
+
+# Observability (metrics are always served at /metrics; traces need opentelemetry-api
+# plus an SDK/exporter configured by the deployment)
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
 
 # Google AI Configuration
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
@@ -15,6 +66,36 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 API_HOST = "0.0.0.0"
 API_PORT = 8001
 OAUTH_PORT = 8000
+# Server processes; above 1 they share the SQLite checkpoint store, token files
+# and per-conversation locks, so any process can serve any thread
+API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+
+# Agent Worker Pool Configuration
+AGENT_QUEUE_SIZE = int(os.getenv("AGENT_QUEUE_SIZE", "32"))
+AGENT_ASYNC_CONCURRENCY = int(os.getenv("AGENT_ASYNC_CONCURRENCY", "100"))
+
+# Startup Configuration ("eager" builds the agent before the port opens,
+# "background" opens the port first and reports "starting" until it is built)
+STARTUP_MODE = os.getenv("STARTUP_MODE", "eager")
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "false").lower() == "true"
+
+# Idempotent Chat Configuration (replies to keyed requests are replayed for the TTL)
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "300"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "1024"))
+
+# Batch Chat Configuration (/chat/batch)
+CHAT_BATCH_MAX_ITEMS = int(os.getenv("CHAT_BATCH_MAX_ITEMS", "500"))
+CHAT_BATCH_CONCURRENCY = int(os.getenv("CHAT_BATCH_CONCURRENCY", "4"))
+CHAT_BATCH_MAX_CONCURRENCY = int(os.getenv("CHAT_BATCH_MAX_CONCURRENCY", "16"))
+
+# Event Import Configuration (/import, bypasses the LLM)
+IMPORT_BATCH_CONCURRENCY = int(os.getenv("IMPORT_BATCH_CONCURRENCY", "4"))
+
+# Refresh Configuration
+REFRESH_DRAIN_SECONDS = float(os.getenv("REFRESH_DRAIN_SECONDS", "30"))
+
+# Readiness Configuration
+READINESS_INTERVAL_SECONDS = float(os.getenv("READINESS_INTERVAL_SECONDS", "15"))
 
 # CORS Configuration
 CORS_ORIGINS = ["*"]  # In production, specify your frontend URL
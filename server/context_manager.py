@@ -0,0 +1,199 @@
+import json
+import threading
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+
+SUMMARY_TAG = "context_summary"
+
+SUMMARY_PROMPT = """You maintain the running summary of a conversation between a user and a calendar assistant.
+
+Update the summary below with the new messages. Keep every fact the assistant may need later: event titles, event IDs, calendar IDs, dates, times, time zones, attendees, decisions the user made, preferences and open questions. Drop pleasantries and raw tool output that is no longer relevant. Answer with the updated summary only.
+
+Current summary:
+{summary}
+
+New messages:
+{transcript}"""
+
+
+def content_text(content) -> str:
+    """Flatten message content (a string or a list of parts) to text."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(
+            part.get("text", "") if isinstance(part, dict) else str(part)
+            for part in content
+        )
+    return str(content)
+
+
+def estimate_tokens(messages) -> int:
+    """
+    Estimate the prompt size of a message list.
+
+    Uses the ~4 characters per token rule of thumb, plus a small per-message
+    overhead; good enough for budgeting without a tokenizer round trip.
+    """
+    chars = 0
+    for message in messages:
+        if isinstance(message, dict):
+            chars += len(content_text(message.get("content", "")))
+        else:
+            chars += len(content_text(message.content))
+            for tool_call in getattr(message, "tool_calls", None) or []:
+                chars += len(tool_call["name"]) + len(json.dumps(tool_call["args"]))
+        chars += 16
+    return chars // 4
+
+
+class ContextManager:
+    """
+    Keeps the chatbot prompt within a token budget.
+
+    The system prompt and the most recent ``recent_turns`` user turns are sent
+    verbatim. Tool outputs from earlier turns are truncated, and when the
+    prompt is still over budget the older turns are folded into a rolling
+    summary that lives in graph state (``summary`` plus ``summarized_count``,
+    the number of leading messages it covers), so each summarization only
+    reads the messages added since the last one.
+    """
+
+    def __init__(self, budget_tokens: int, recent_turns: int, tool_output_chars: int):
+        """
+        Args:
+            budget_tokens: Target prompt size (0 sends the full history)
+            recent_turns: User turns always kept verbatim
+            tool_output_chars: Length older tool outputs are truncated to
+        """
+        self.budget_tokens = budget_tokens
+        self.recent_turns = max(1, recent_turns)
+        self.tool_output_chars = tool_output_chars
+        self._lock = threading.Lock()
+        self.steps = 0
+        self.summaries = 0
+        self.summary_failures = 0
+        self._tokens_before = 0
+        self._tokens_after = 0
+        self.last_tokens_before = 0
+        self.last_tokens_after = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget_tokens > 0
+
+    def _compact(self, messages: list) -> list:
+        """Truncate tool outputs from turns before the latest user message."""
+        last_human = max(
+            (i for i, message in enumerate(messages) if isinstance(message, HumanMessage)),
+            default=0
+        )
+        compacted = []
+        for i, message in enumerate(messages):
+            content = content_text(message.content) if isinstance(message, ToolMessage) else None
+            if i < last_human and content is not None and len(content) > self.tool_output_chars:
+                message = message.model_copy(update={
+                    "content": content[:self.tool_output_chars]
+                    + f"... [{len(content) - self.tool_output_chars} chars truncated]"
+                })
+            compacted.append(message)
+        return compacted
+
+    def messages_to_fold(self, state: dict, system_prompt: str) -> list:
+        """
+        Get the messages that should be folded into the summary before this step.
+
+        Returns:
+            The oldest unsummarized messages up to the start of the recent
+            turns, or an empty list if the prompt already fits the budget
+        """
+        if not self.enabled:
+            return []
+        messages = state["messages"]
+        live = messages[state.get("summarized_count", 0):]
+        system = self.system_message(system_prompt, state.get("summary", ""))
+        if estimate_tokens([system] + self._compact(live)) <= self.budget_tokens:
+            return []
+
+        # Cut on a user turn boundary so tool calls stay next to their results
+        turn_starts = [i for i, message in enumerate(live) if isinstance(message, HumanMessage)]
+        if len(turn_starts) <= self.recent_turns:
+            return []
+        return live[:turn_starts[-self.recent_turns]]
+
+    def summary_prompt(self, summary: str, messages: list) -> str:
+        """Build the prompt that folds messages into the running summary."""
+        lines = []
+        for message in messages:
+            text = content_text(message.content)
+            if isinstance(message, HumanMessage):
+                lines.append(f"User: {text}")
+            elif isinstance(message, ToolMessage):
+                lines.append(f"Tool {message.name}: {text[:self.tool_output_chars]}")
+            elif isinstance(message, AIMessage):
+                for tool_call in message.tool_calls:
+                    lines.append(f"Assistant called {tool_call['name']} with {json.dumps(tool_call['args'])}")
+                if text:
+                    lines.append(f"Assistant: {text}")
+        return SUMMARY_PROMPT.format(summary=summary or "(none)", transcript="\n".join(lines))
+
+    @staticmethod
+    def system_message(system_prompt: str, summary: str) -> dict:
+        """The system message, with the rolling summary appended when there is one."""
+        if summary:
+            system_prompt += f"\n\nSummary of the earlier conversation:\n{summary}"
+        return {"role": "system", "content": system_prompt}
+
+    def build_prompt(self, state: dict, system_prompt: str) -> list:
+        """
+        Build the messages sent to the LLM and record the size reduction.
+
+        Args:
+            state: Graph state, with any new summary already applied
+            system_prompt: Current system prompt
+
+        Returns:
+            System message followed by the unsummarized, compacted history
+        """
+        messages = state["messages"]
+        full_prompt = [{"role": "system", "content": system_prompt}] + list(messages)
+        if not self.enabled:
+            prompt = full_prompt
+        else:
+            live = messages[state.get("summarized_count", 0):]
+            prompt = [self.system_message(system_prompt, state.get("summary", ""))] + self._compact(live)
+
+        tokens_before = estimate_tokens(full_prompt)
+        tokens_after = estimate_tokens(prompt) if prompt is not full_prompt else tokens_before
+        with self._lock:
+            self.steps += 1
+            self._tokens_before += tokens_before
+            self._tokens_after += tokens_after
+            self.last_tokens_before = tokens_before
+            self.last_tokens_after = tokens_after
+        return prompt
+
+    def record_summary(self, succeeded: bool):
+        """Count a summarization attempt."""
+        with self._lock:
+            if succeeded:
+                self.summaries += 1
+            else:
+                self.summary_failures += 1
+
+    def get_stats(self) -> dict:
+        """Get prompt size before/after context management, per LLM step."""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "budget_tokens": self.budget_tokens,
+                "recent_turns": self.recent_turns,
+                "steps": self.steps,
+                "avg_prompt_tokens_before": round(self._tokens_before / self.steps) if self.steps else 0,
+                "avg_prompt_tokens_after": round(self._tokens_after / self.steps) if self.steps else 0,
+                "last_prompt_tokens_before": self.last_tokens_before,
+                "last_prompt_tokens_after": self.last_tokens_after,
+                "summaries": self.summaries,
+                "summary_failures": self.summary_failures,
+            }
@@ -0,0 +1,551 @@
+import csv
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from calendar_batch import BATCH_LIMIT, execute_batch, _error_text
+from interval_index import IntervalIndex
+
+
+ON_CONFLICT_CHOICES = ("skip", "import")
+
+_DURATION = re.compile(
+    r"^(?P<sign>[+-])?P(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?"
+    r"(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$"
+)
+
+_CSV_DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y")
+_CSV_TIME_FORMATS = ("%H:%M", "%H:%M:%S", "%I:%M %p", "%I:%M:%S %p", "%I:%M%p")
+
+
+def _zone(name: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown time zone '{name}'")
+
+
+class EventTime:
+    """
+    An event start or end as given in the file.
+
+    ``value`` is a date (all-day), an aware datetime, or a naive datetime in
+    ``zone_name`` (or in the import's default zone when that is None).
+    """
+
+    __slots__ = ("value", "zone_name")
+
+    def __init__(self, value, zone_name: Optional[str] = None):
+        self.value = value
+        self.zone_name = zone_name
+
+    @property
+    def all_day(self) -> bool:
+        return not isinstance(self.value, datetime)
+
+    def to_api(self, default_zone: Optional[str]) -> dict:
+        """Calendar API start/end object."""
+        if self.all_day:
+            return {"date": self.value.isoformat()}
+        if self.value.tzinfo is not None:
+            return {"dateTime": self.value.isoformat()}
+        zone_name = self.zone_name or default_zone
+        if zone_name:
+            return {"dateTime": self.value.isoformat(), "timeZone": zone_name}
+        # Floating time without a default zone: server local time, like the chat tools
+        return {"dateTime": self.value.astimezone().isoformat()}
+
+    def aware(self, default_zone: Optional[str]) -> datetime:
+        """The moment as an aware datetime, for conflict checks."""
+        if self.value.tzinfo is not None:
+            return self.value
+        zone_name = self.zone_name or default_zone
+        return self.value.replace(tzinfo=_zone(zone_name)) if zone_name else self.value.astimezone()
+
+    def plus(self, delta: timedelta) -> "EventTime":
+        return EventTime(self.value + delta, self.zone_name)
+
+
+# ICS (RFC 5545)
+
+def _unfold(lines) -> Iterator[tuple]:
+    """Join folded content lines; yields (line number, logical line)."""
+    pending, pending_number = None, 0
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and pending is not None:
+            pending += line[1:]
+            continue
+        if pending:
+            yield pending_number, pending
+        pending, pending_number = line, number
+    if pending:
+        yield pending_number, pending
+
+
+def _split_property(line: str) -> tuple:
+    """Split 'NAME;PARAM=x;PARAM="a:b":value' into (name, params, value)."""
+    quoted = False
+    for position, char in enumerate(line):
+        if char == '"':
+            quoted = not quoted
+        elif char == ":" and not quoted:
+            head, value = line[:position], line[position + 1:]
+            break
+    else:
+        raise ValueError(f"Malformed line: {line[:60]}")
+    name, *raw_params = head.split(";")
+    params = {}
+    for raw in raw_params:
+        key, _, param_value = raw.partition("=")
+        params[key.upper()] = param_value.strip('"')
+    return name.upper(), params, value
+
+
+def _ics_text(value: str) -> str:
+    return re.sub(r"\\([\\;,nN])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+
+def _ics_time(value: str, params: dict) -> EventTime:
+    value = value.strip()
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return EventTime(datetime.strptime(value, "%Y%m%d").date())
+    if value.endswith("Z"):
+        return EventTime(datetime.strptime(value[:-1], "%Y%m%dT%H%M%S").replace(tzinfo=timezone.utc))
+    parsed = datetime.strptime(value, "%Y%m%dT%H%M%S")
+    zone_name = params.get("TZID")
+    if zone_name:
+        _zone(zone_name)
+    return EventTime(parsed, zone_name)
+
+
+def _ics_duration(value: str) -> timedelta:
+    match = _DURATION.match(value.strip())
+    if not match:
+        raise ValueError(f"Malformed DURATION '{value}'")
+    parts = {key: int(number or 0) for key, number in match.groupdict().items() if key != "sign"}
+    delta = timedelta(
+        weeks=parts["weeks"], days=parts["days"], hours=parts["hours"],
+        minutes=parts["minutes"], seconds=parts["seconds"]
+    )
+    return -delta if match.group("sign") == "-" else delta
+
+
+def iter_ics_records(lines) -> Iterator[tuple]:
+    """
+    Stream the VEVENTs of an iCalendar file.
+
+    Only one event's properties are held at a time. Components nested in an
+    event (alarms) are skipped.
+
+    Yields:
+        (line number of BEGIN:VEVENT, properties) where properties maps a
+        property name to a list of (params, value)
+    """
+    event, event_line, nested = None, 0, 0
+    for number, line in _unfold(lines):
+        upper = line.upper()
+        if upper == "BEGIN:VEVENT":
+            event, event_line, nested = {}, number, 0
+        elif event is None:
+            continue
+        elif upper.startswith("BEGIN:"):
+            nested += 1
+        elif upper.startswith("END:") and nested:
+            nested -= 1
+        elif upper == "END:VEVENT":
+            yield event_line, event
+            event = None
+        elif not nested:
+            try:
+                name, params, value = _split_property(line)
+            except ValueError as e:
+                # Reported when the event is normalized
+                event.setdefault("_ERRORS", []).append(({}, str(e)))
+                continue
+            event.setdefault(name, []).append((params, value))
+
+
+def ics_to_event(properties: dict) -> tuple:
+    """
+    Normalize a VEVENT's properties.
+
+    Returns:
+        (fields, start, end) with fields holding summary, location,
+        description and recurrence
+
+    Raises:
+        ValueError: If the event is malformed or cancelled
+    """
+    if "_ERRORS" in properties:
+        raise ValueError(properties["_ERRORS"][0][1])
+
+    def first(name: str):
+        values = properties.get(name)
+        return values[0] if values else (None, None)
+
+    if (first("STATUS")[1] or "").upper() == "CANCELLED":
+        raise ValueError("Event is cancelled")
+    start_params, start_value = first("DTSTART")
+    if start_value is None:
+        raise ValueError("Missing DTSTART")
+    start = _ics_time(start_value, start_params)
+
+    end_params, end_value = first("DTEND")
+    if end_value is not None:
+        end = _ics_time(end_value, end_params)
+    elif first("DURATION")[1] is not None:
+        end = start.plus(_ics_duration(first("DURATION")[1]))
+    else:
+        # RFC 5545: a date lasts one day, a date-time has no duration
+        end = start.plus(timedelta(days=1) if start.all_day else timedelta(0))
+
+    fields = {"summary": _ics_text(first("SUMMARY")[1] or "").strip() or "(No title)"}
+    for name in ("LOCATION", "DESCRIPTION"):
+        value = first(name)[1]
+        if value:
+            fields[name.lower()] = _ics_text(value)
+    recurrence = [
+        f"{name}:{value}" if not params else
+        f"{name};{';'.join(f'{key}={param}' for key, param in params.items())}:{value}"
+        for name in ("RRULE", "RDATE", "EXDATE")
+        for params, value in properties.get(name, [])
+    ]
+    if recurrence:
+        fields["recurrence"] = recurrence
+    return fields, start, end
+
+
+# CSV (Google Calendar's export columns, or summary/start/end)
+
+def iter_csv_records(lines) -> Iterator[tuple]:
+    """
+    Stream the rows of a CSV file with a header row.
+
+    Header names are lower-cased with spaces turned into underscores, so
+    both "Start Date" and "start_date" work.
+
+    Yields:
+        (line number, row dict)
+    """
+    reader = csv.reader(lines)
+    header = None
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        if header is None:
+            header = [cell.strip().lower().replace(" ", "_") for cell in row]
+            continue
+        yield reader.line_num, dict(zip(header, (cell.strip() for cell in row)))
+
+
+def _csv_value(row: dict, *names) -> str:
+    for name in names:
+        if row.get(name):
+            return row[name]
+    return ""
+
+
+def _csv_time(date_text: str, time_text: str, zone_name: Optional[str], all_day: bool) -> EventTime:
+    combined = f"{date_text} {time_text}".strip()
+    try:
+        parsed = datetime.fromisoformat(combined)
+        if all_day or (len(combined) <= 10 and not time_text):
+            return EventTime(parsed.date())
+        return EventTime(parsed, zone_name if parsed.tzinfo is None else None)
+    except ValueError:
+        pass
+    for date_format in _CSV_DATE_FORMATS:
+        try:
+            day = datetime.strptime(date_text, date_format).date()
+            break
+        except ValueError:
+            continue
+    else:
+        raise ValueError(f"Unrecognized date '{date_text}'")
+    if all_day or not time_text:
+        return EventTime(day)
+    for time_format in _CSV_TIME_FORMATS:
+        try:
+            clock = datetime.strptime(time_text.upper(), time_format).time()
+            return EventTime(datetime.combine(day, clock), zone_name)
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized time '{time_text}'")
+
+
+def csv_to_event(row: dict) -> tuple:
+    """
+    Normalize a CSV row.
+
+    A timed event without an end lasts one hour; all-day end dates are
+    inclusive, as in Google Calendar's CSV format.
+
+    Returns:
+        (fields, start, end), as for ``ics_to_event``
+
+    Raises:
+        ValueError: If the row is malformed
+    """
+    zone_name = _csv_value(row, "timezone", "time_zone") or None
+    if zone_name:
+        _zone(zone_name)
+    all_day = _csv_value(row, "all_day_event", "all_day").lower() in ("true", "yes", "1")
+
+    start_date = _csv_value(row, "start_date", "start", "start_datetime")
+    if not start_date:
+        raise ValueError("Missing start")
+    start = _csv_time(start_date, _csv_value(row, "start_time"), zone_name, all_day)
+
+    end_date = _csv_value(row, "end_date", "end", "end_datetime")
+    end_time = _csv_value(row, "end_time")
+    if not end_date and end_time and not start.all_day:
+        end_date = start.value.date().isoformat()
+    if end_date:
+        end = _csv_time(end_date, end_time, zone_name, start.all_day)
+        if start.all_day:
+            end = end.plus(timedelta(days=1))
+    else:
+        end = start.plus(timedelta(days=1) if start.all_day else timedelta(hours=1))
+
+    fields = {"summary": _csv_value(row, "summary", "subject", "title") or "(No title)"}
+    for name in ("location", "description"):
+        if row.get(name):
+            fields[name] = row[name]
+    return fields, start, end
+
+
+class EventImporter:
+    """
+    Imports a stream of parsed events into a calendar without the LLM.
+
+    Events are validated and normalized one at a time, checked against the
+    calendar's conflict index and the file's earlier events, and inserted through the service's API
+    resource in multipart batches of BATCH_LIMIT events. Up to
+    ``concurrency`` batches are in flight at once; reading waits for the
+    oldest batch when that many are outstanding, so memory stays bounded
+    whatever the file size. Events that fail are reported and the import
+    carries on.
+    """
+
+    def __init__(self, calendar_service, calendar_id: str = "primary", on_conflict: str = "skip",
+                 default_timezone: Optional[str] = None, concurrency: int = 4):
+        """
+        Args:
+            calendar_service: The user's CalendarService
+            calendar_id: Calendar the events are created in
+            on_conflict: "skip" events that overlap existing ones, or "import" them anyway
+            default_timezone: IANA zone for times given without one (defaults to server local time)
+            concurrency: Batch requests in flight at once
+
+        Raises:
+            ValueError: If on_conflict or default_timezone is invalid
+        """
+        if on_conflict not in ON_CONFLICT_CHOICES:
+            raise ValueError(f"on_conflict must be one of: {', '.join(ON_CONFLICT_CHOICES)}")
+        if default_timezone:
+            _zone(default_timezone)
+        self.service = calendar_service
+        self.calendar_id = calendar_id
+        self.on_conflict = on_conflict
+        self.default_timezone = default_timezone
+        self.concurrency = max(1, concurrency)
+        self.cancelled = threading.Event()
+        self.read = 0
+        self._months = {}
+        # Timed events accepted from this file, keyed by record index, so later
+        # events are checked against them before their batch completes
+        self._reserved = IntervalIndex()
+        self._created_ids = set()
+        self.all_day_imported = False
+        self.counts = {"imported": 0, "skipped": 0, "failed": 0}
+
+    def _prepare(self, record, normalize) -> tuple:
+        """
+        Build one event's API body.
+
+        Returns:
+            (body, window): window is the aware (start, end) of a timed event, None for all-day ones
+
+        Raises:
+            ValueError: If the event is invalid
+        """
+        fields, start, end = normalize(record)
+        if start.all_day != end.all_day:
+            raise ValueError("Start and end must both be dates or both be date-times")
+        body = dict(fields, start=start.to_api(self.default_timezone), end=end.to_api(self.default_timezone))
+        if start.all_day:
+            if end.value <= start.value:
+                raise ValueError("End is not after start")
+            return body, None
+        window = (start.aware(self.default_timezone), end.aware(self.default_timezone))
+        if window[1] < window[0]:
+            raise ValueError("End is before start")
+        return body, window
+
+    def _conflicts(self, window) -> Optional[list]:
+        """Existing events and earlier events of this file that overlap a timed event."""
+        if window is None or self.on_conflict != "skip":
+            return None
+        try:
+            conflicts = self.service.conflict_index.find_conflicts(self.calendar_id, *window)
+            if conflicts is None:
+                conflicts = self._conflicts_beyond_index(*window)
+        except Exception as e:
+            print(f"Conflict pre-check unavailable: {e}")
+            conflicts = []
+        # Events this import created are reported through the file's own reservations
+        conflicts = [conflict for conflict in conflicts if conflict["id"] not in self._created_ids]
+        conflicts.extend(
+            {
+                "index": item["id"],
+                "summary": item["summary"],
+                "start": item["start"].isoformat(),
+                "end": item["end"].isoformat(),
+            }
+            for item in self._reserved.overlapping(*window)
+        )
+        return conflicts
+
+    def _conflicts_beyond_index(self, start: datetime, end: datetime) -> list:
+        """
+        Check an event outside the conflict index's window.
+
+        The calendar is fetched a month at a time and kept for the rest of
+        the import, so far-off events cost one API call per month rather
+        than one each.
+        """
+        found = {}
+        start_utc = start.astimezone(timezone.utc)
+        month = datetime(start_utc.year, start_utc.month, 1, tzinfo=timezone.utc)
+        while month < end:
+            next_month = (month + timedelta(days=32)).replace(day=1)
+            index = self._months.get(month)
+            if index is None:
+                index = self._months[month] = self.service.conflict_index.load(self.calendar_id, month, next_month)
+            # An event spanning a month boundary is in both months
+            for item in index.overlapping(start, end):
+                found[item["id"]] = {
+                    "id": item["id"],
+                    "summary": item["summary"],
+                    "start": item["start"].isoformat(),
+                    "end": item["end"].isoformat(),
+                }
+            month = next_month
+        return list(found.values())
+
+    def _event_report(self, index: int, line: int, status: str, **fields) -> dict:
+        self.counts[status] += 1
+        return {"type": "event", "index": index, "line": line, "status": status, **fields}
+
+    def _finish_batch(self, batch: list, results: list, report):
+        """Record a completed batch request's results."""
+        created = 0
+        dated = False
+        for (index, line, body, window), (response, error) in zip(batch, results):
+            if error is not None:
+                if window is not None:
+                    self._reserved.remove(index)
+                report(self._event_report(index, line, "failed", summary=body["summary"], error=_error_text(error)))
+                continue
+            created += 1
+            self.counts["imported"] += 1
+            if window is not None:
+                self._created_ids.add(response.get("id"))
+                # Other requests check new bookings against the imported events too
+                self.service.conflict_index.add_event(self.calendar_id, *window, response.get("id"), body["summary"])
+            else:
+                dated = True
+        if dated:
+            self.all_day_imported = True
+        if created:
+            # Imported events may fall anywhere, so the calendar's cached reads are dropped whole
+            self.service.cache.invalidate(self.calendar_id)
+            if self.service.mirror is not None:
+                self.service.mirror.mark_stale(self.calendar_id)
+        report({"type": "progress", "read": self.read, **self.counts})
+
+    def run(self, records, normalize, report) -> dict:
+        """
+        Import every record.
+
+        Args:
+            records: Iterator of (line number, raw record) from ``iter_ics_records`` or ``iter_csv_records``
+            normalize: ``ics_to_event`` or ``csv_to_event``
+            report: Called (from this thread) with each skipped or failed event and a
+                progress report after each batch request
+
+        Returns:
+            Records read and events imported, skipped and failed
+        """
+        api_resource = self.service._get_api_resource()
+        in_flight = deque()
+        batch = []
+
+        def send(bodies: list) -> list:
+            # Built on the worker so the batch goes through that thread's own connection
+            events = api_resource.events()
+            requests = [events.insert(calendarId=self.calendar_id, body=body) for body in bodies]
+            return execute_batch(api_resource, requests)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="calendar-import") as executor:
+            def flush():
+                in_flight.append((list(batch), executor.submit(send, [body for _, _, body, _ in batch])))
+                batch.clear()
+
+            def collect_oldest():
+                done, future = in_flight.popleft()
+                self._finish_batch(done, future.result(), report)
+
+            for index, (line, record) in enumerate(records):
+                if self.cancelled.is_set():
+                    break
+                self.read = index + 1
+                try:
+                    body, window = self._prepare(record, normalize)
+                except (ValueError, OverflowError) as e:
+                    report(self._event_report(index, line, "failed", error=str(e)))
+                    continue
+
+                conflicts = self._conflicts(window)
+                if conflicts:
+                    report(self._event_report(index, line, "skipped", summary=body["summary"], conflicts=conflicts))
+                    continue
+
+                if window is not None and self.on_conflict == "skip":
+                    self._reserved.add(*window, index, body["summary"])
+                batch.append((index, line, body, window))
+                if len(batch) == BATCH_LIMIT:
+                    flush()
+                    while len(in_flight) >= self.concurrency:
+                        collect_oldest()
+
+            if batch and not self.cancelled.is_set():
+                flush()
+            while in_flight:
+                collect_oldest()
+        if self.all_day_imported:
+            # Rebuilt once on next use rather than after every batch
+            self.service.conflict_index.invalidate(self.calendar_id)
+        return {"read": self.read, **self.counts}
+
+
+FORMATS = {
+    "ics": (iter_ics_records, ics_to_event),
+    "csv": (iter_csv_records, csv_to_event),
+}
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """Guess "ics" or "csv" from an upload's file name or content type."""
+    name = (filename or "").lower()
+    content_type = (content_type or "").lower()
+    if name.endswith((".ics", ".ical", ".ifb")) or "calendar" in content_type:
+        return "ics"
+    if name.endswith(".csv") or "csv" in content_type:
+        return "csv"
+    return None
@@ -0,0 +1,248 @@
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from googleapiclient.errors import HttpError
+
+from calendar_ids import PRIMARY_ALIAS
+from interval_index import parse_event_time
+
+
+class EventMirror:
+    """
+    Local SQLite mirror of Google Calendar events kept current with sync tokens.
+
+    The first sync of a calendar is a full windowed fetch; later syncs send the
+    stored ``nextSyncToken`` and only apply changes. A 410 Gone response means
+    the token expired, so the calendar is cleared and fully resynced. Sync
+    tokens live in the database, so the mirror survives restarts.
+    """
+
+    def __init__(self, db_path: str, get_api_resource, sync_seconds: float, past_days: int,
+                 resolve_calendar_id=None):
+        """
+        Args:
+            db_path: SQLite database file
+            get_api_resource: Callable returning the Calendar API resource
+            sync_seconds: Age after which a read triggers an incremental sync
+            past_days: How far back the initial full sync reaches
+            resolve_calendar_id: Maps calendar aliases ("primary") to real IDs, so
+                writes mark the calendar that reads are served from
+        """
+        self.db_path = db_path
+        self.get_api_resource = get_api_resource
+        self.resolve_calendar_id = resolve_calendar_id or (lambda calendar_id: calendar_id)
+        self.sync_seconds = sync_seconds
+        self.past_days = past_days
+        self._lock = threading.RLock()
+        self._stale = set()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS events (
+                calendar_id TEXT NOT NULL,
+                event_id TEXT NOT NULL,
+                start_ts REAL NOT NULL,
+                end_ts REAL NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (calendar_id, event_id)
+            );
+            CREATE INDEX IF NOT EXISTS events_by_time ON events (calendar_id, start_ts);
+            CREATE TABLE IF NOT EXISTS sync_state (
+                calendar_id TEXT PRIMARY KEY,
+                sync_token TEXT,
+                synced_at REAL NOT NULL
+            );
+        """)
+        self._conn.commit()
+        self.full_syncs = 0
+        self.incremental_syncs = 0
+        self.queries = 0
+
+    def _list_pages(self, **params):
+        """Yield every page of an events.list call."""
+        page_token = None
+        while True:
+            result = self.get_api_resource().events().list(
+                pageToken=page_token, **params
+            ).execute()
+            yield result
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                return
+
+    def _apply(self, calendar_id: str, items: list):
+        """Upsert changed events and drop cancelled ones."""
+        for event in items:
+            if event.get("status") == "cancelled":
+                self._conn.execute(
+                    "DELETE FROM events WHERE calendar_id = ? AND event_id = ?",
+                    (calendar_id, event["id"])
+                )
+                continue
+            self._conn.execute(
+                "INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?)",
+                (
+                    calendar_id,
+                    event["id"],
+                    parse_event_time(event["start"]).timestamp(),
+                    parse_event_time(event["end"]).timestamp(),
+                    json.dumps(event),
+                )
+            )
+
+    def _save_token(self, calendar_id: str, sync_token):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)",
+            (calendar_id, sync_token, time.time())
+        )
+
+    def _full_sync(self, calendar_id: str):
+        """
+        Replace a calendar's mirror with a fresh full fetch.
+
+        Runs as one transaction: if any page fails the calendar's previous
+        copy is kept, and nothing is left pending on the shared connection.
+        """
+        time_min = datetime.now(timezone.utc) - timedelta(days=self.past_days)
+        try:
+            self._conn.execute("DELETE FROM events WHERE calendar_id = ?", (calendar_id,))
+            sync_token = None
+            for page in self._list_pages(
+                calendarId=calendar_id,
+                timeMin=time_min.isoformat(),
+                singleEvents=True,
+                maxResults=2500,
+            ):
+                self._apply(calendar_id, page.get("items", []))
+                sync_token = page.get("nextSyncToken", sync_token)
+            self._save_token(calendar_id, sync_token)
+            self._conn.commit()
+        except BaseException:
+            self._conn.rollback()
+            raise
+        self.full_syncs += 1
+
+    def sync(self, calendar_id: str):
+        """Bring a calendar's mirror up to date, incrementally when possible."""
+        calendar_id = self.resolve_calendar_id(calendar_id)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sync_token FROM sync_state WHERE calendar_id = ?", (calendar_id,)
+            ).fetchone()
+            if not row or not row[0]:
+                self._full_sync(calendar_id)
+            else:
+                sync_token = row[0]
+                try:
+                    for page in self._list_pages(
+                        calendarId=calendar_id,
+                        syncToken=sync_token,
+                        singleEvents=True,
+                        maxResults=2500,
+                    ):
+                        self._apply(calendar_id, page.get("items", []))
+                        sync_token = page.get("nextSyncToken", sync_token)
+                except HttpError as e:
+                    self._conn.rollback()
+                    if e.resp.status != 410:
+                        raise
+                    # Sync token expired: start over
+                    self._full_sync(calendar_id)
+                except BaseException:
+                    self._conn.rollback()
+                    raise
+                else:
+                    self._save_token(calendar_id, sync_token)
+                    self._conn.commit()
+                    self.incremental_syncs += 1
+            self._stale.discard(calendar_id)
+
+    def ensure_fresh(self, calendar_id: str):
+        """Sync a calendar if it was written to or has not been synced recently."""
+        calendar_id = self.resolve_calendar_id(calendar_id)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT synced_at FROM sync_state WHERE calendar_id = ?", (calendar_id,)
+            ).fetchone()
+            if (
+                row is None
+                or calendar_id in self._stale
+                or time.time() - row[0] > self.sync_seconds
+            ):
+                self.sync(calendar_id)
+
+    def mark_stale(self, calendar_id: str):
+        """Force a sync before the next read of a calendar (after a write)."""
+        calendar_id = self.resolve_calendar_id(calendar_id)
+        with self._lock:
+            if calendar_id == PRIMARY_ALIAS:
+                # Unresolved alias: any mirrored calendar may have been written
+                self._stale.update(
+                    row[0] for row in self._conn.execute("SELECT calendar_id FROM sync_state")
+                )
+            self._stale.add(calendar_id)
+
+    def covers(self, start: datetime) -> bool:
+        """Whether reads starting at ``start`` are inside the mirrored window."""
+        # A full sync reaches past_days back from when it ran, never less than from now
+        return start >= datetime.now(timezone.utc) - timedelta(days=self.past_days)
+
+    def query(self, calendar_id: str, start: datetime, end: datetime,
+              query: str = None, max_results: int = 10) -> list:
+        """
+        Get mirrored events overlapping [start, end), ordered by start time.
+
+        Args:
+            calendar_id: Calendar to read
+            start: Aware start datetime
+            end: Aware end datetime
+            query: Optional text matched against the summary, description and location
+            max_results: Maximum number of events
+
+        Returns:
+            List of raw Calendar API event dicts
+        """
+        calendar_id = self.resolve_calendar_id(calendar_id)
+        self.ensure_fresh(calendar_id)
+        sql = (
+            "SELECT data FROM events WHERE calendar_id = ? "
+            "AND start_ts < ? AND end_ts > ?"
+        )
+        params = [calendar_id, end.timestamp(), start.timestamp()]
+        if query:
+            sql += " AND (" + " OR ".join(
+                f"json_extract(data, '$.{field}') LIKE ? ESCAPE '\\'"
+                for field in ("summary", "description", "location")
+            ) + ")"
+            pattern = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.extend([f"%{pattern}%"] * 3)
+        sql += " ORDER BY start_ts LIMIT ?"
+        params.append(max_results)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            self.queries += 1
+        return [json.loads(row[0]) for row in rows]
+
+    def get_stats(self) -> dict:
+        """Get mirror size and sync counters."""
+        with self._lock:
+            events, calendars = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT calendar_id) FROM events"
+            ).fetchone()
+            return {
+                "db_path": self.db_path,
+                "events": events,
+                "calendars": calendars,
+                "full_syncs": self.full_syncs,
+                "incremental_syncs": self.incremental_syncs,
+                "queries": self.queries,
+            }
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,86 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to locks that only span this process
+    fcntl = None
+
+
+_local_locks = {}
+_local_locks_guard = threading.Lock()
+
+
+def _local_lock(path: str) -> threading.Lock:
+    with _local_locks_guard:
+        return _local_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+class FileLock:
+    """
+    Exclusive advisory lock on a file, shared by every process on the host.
+
+    Used as a blocking context manager, or with ``try_acquire``/``release``
+    for callers that poll (e.g. from the event loop). The lock file is
+    created on first use and never removed. Where ``fcntl`` is unavailable
+    the lock only serializes threads of the current process.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Lock file; every process locking the same resource uses the same path
+        """
+        self.path = path
+        self._fd = None
+
+    def _open(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        return os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+
+    def acquire(self):
+        """Block until the lock is held."""
+        if fcntl is None:
+            _local_lock(self.path).acquire()
+            return
+        fd = self._open()
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def try_acquire(self) -> bool:
+        """Take the lock if it is free; returns whether it is now held."""
+        if fcntl is None:
+            return _local_lock(self.path).acquire(blocking=False)
+        fd = self._open()
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+        return True
+
+    def release(self):
+        """Release the lock (closing the file releases it too)."""
+        if fcntl is None:
+            _local_lock(self.path).release()
+            return
+        fd, self._fd = self._fd, None
+        if fd is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
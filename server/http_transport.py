@@ -0,0 +1,152 @@
+import functools
+import json
+import os
+import threading
+
+import httplib2
+import google_auth_httplib2
+from googleapiclient.discovery import DISCOVERY_URI, Resource, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.http import HttpRequest
+
+from telemetry import CALENDAR_API_SECONDS, trace
+
+
+@functools.lru_cache(maxsize=None)
+def load_discovery_document(service_name: str, version: str, cache_path: str) -> dict:
+    """
+    Load an API discovery document without a network round trip when possible.
+
+    The copy bundled with googleapiclient is used first, then a local cache
+    file; only if both are missing is the document fetched, and it is then
+    written to the cache file for the next start. The parsed document is
+    memoized and shared by every user's transport.
+
+    Args:
+        service_name: API name, e.g. "calendar"
+        version: API version, e.g. "v3"
+        cache_path: Local file the fetched document is cached in
+
+    Returns:
+        The parsed discovery document
+    """
+    content = get_static_doc(service_name, version)
+    if content is None and os.path.exists(cache_path):
+        with open(cache_path) as f:
+            content = f.read()
+    if content is None:
+        uri = DISCOVERY_URI.format(api=service_name, apiVersion=version)
+        response, body = httplib2.Http().request(uri)
+        if response.status >= 400:
+            raise RuntimeError(f"Could not fetch the {service_name} {version} discovery document: HTTP {response.status}")
+        content = body.decode("utf-8")
+        with open(cache_path, "w") as f:
+            f.write(content)
+    return json.loads(content)
+
+
+class TimedHttpRequest(HttpRequest):
+    """API request that records its time per Calendar API method (e.g. calendar.events.list)."""
+
+    def execute(self, http=None, num_retries=0):
+        with trace(CALENDAR_API_SECONDS, self.methodId, method=self.methodId):
+            return super().execute(http=http, num_retries=num_retries)
+
+
+class CalendarTransport:
+    """
+    Per-thread Calendar API clients over keep-alive HTTP connections.
+
+    httplib2 connections must not be shared between threads, so each thread
+    that calls the API gets its own authorized client, built from a discovery
+    document parsed once and reused for the life of the thread, so its TLS
+    connection stays open between requests. All clients share one credentials
+    object; when the auth service swaps in new credentials they are pushed to
+    every client. Clients of threads that have exited are closed the next
+    time a client is built.
+    """
+
+    def __init__(self, credentials, discovery_document: dict, timeout: float):
+        """
+        Args:
+            credentials: Google OAuth credentials shared by all clients
+            discovery_document: Parsed Calendar API discovery document
+            timeout: Socket timeout for API requests, in seconds
+        """
+        self.credentials = credentials
+        self.discovery_document = discovery_document
+        self.timeout = timeout
+        self._local = threading.local()
+        # Thread -> its authorized client
+        self._clients = {}
+        self._lock = threading.Lock()
+        self.resource = ThreadLocalResource(self)
+
+    def _new_http(self) -> httplib2.Http:
+        """Plain HTTP client the authorized client wraps."""
+        return httplib2.Http(timeout=self.timeout)
+
+    def get_resource(self):
+        """Get the calling thread's API resource, building it on first use."""
+        resource = getattr(self._local, "resource", None)
+        if resource is None:
+            http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=self._new_http())
+            resource = build_from_document(
+                self.discovery_document, http=http, requestBuilder=TimedHttpRequest
+            )
+            self._local.resource = resource
+            with self._lock:
+                self._prune()
+                self._clients[threading.current_thread()] = http
+        return resource
+
+    def _prune(self):
+        """Close and forget the clients of threads that have exited (lock held)."""
+        for thread in [thread for thread in self._clients if not thread.is_alive()]:
+            self._clients.pop(thread).close()
+
+    def update_credentials(self, credentials):
+        """Point every pooled client at new credentials."""
+        with self._lock:
+            self.credentials = credentials
+            for http in self._clients.values():
+                http.credentials = credentials
+
+    def get_stats(self) -> dict:
+        """Get the number of pooled clients and open connections."""
+        with self._lock:
+            self._prune()
+            return {
+                "clients": len(self._clients),
+                "open_connections": sum(len(http.http.connections) for http in self._clients.values()),
+                "timeout_seconds": self.timeout,
+            }
+
+    def close(self):
+        """Close every pooled client's connections."""
+        with self._lock:
+            for http in self._clients.values():
+                http.close()
+            self._clients.clear()
+        self._local = threading.local()
+
+
+class ThreadLocalResource(Resource):
+    """
+    Calendar API resource that routes each call to the calling thread's client.
+
+    It stands in for a single shared resource (tools, the conflict index and
+    the event mirror all hold one) while every thread actually talks through
+    its own connection.
+    """
+
+    def __init__(self, transport: CalendarTransport):
+        # Resource.__init__ is skipped on purpose: no attributes of our own, so
+        # every API attribute falls through to __getattr__
+        object.__setattr__(self, "_transport", transport)
+
+    def __getattr__(self, name):
+        return getattr(self._transport.get_resource(), name)
+
+    def close(self):
+        self._transport.close()
@@ -0,0 +1,162 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+
+class IdempotencyConflictError(Exception):
+    """Raised when an idempotency key is reused for a different request."""
+
+    def __init__(self):
+        super().__init__("Idempotency key was already used for a different message or thread")
+
+
+def _consume_error(future: asyncio.Future):
+    # Nobody may be waiting on a failed execution; don't warn about it
+    if not future.cancelled():
+        future.exception()
+
+
+class IdempotencyCache:
+    """
+    Runs each idempotency key's request once and replays its result.
+
+    Requests carrying a key already in flight wait for that execution
+    instead of starting another; requests carrying a key that completed
+    within ``ttl_seconds`` get the stored result immediately. Failed
+    executions are not stored, so a retry after an error runs again. The
+    ``max_entries`` most recent results are kept.
+
+    Keys live in this process only; with several server processes a retry
+    served by another process is not recognized.
+    """
+
+    def __init__(self, ttl_seconds: float = 300, max_entries: int = 1024):
+        """
+        Args:
+            ttl_seconds: How long a completed result is replayed (0 disables replays)
+            max_entries: Completed results kept at most
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(0, max_entries)
+        self._in_flight = {}
+        self._completed = OrderedDict()
+        self._stats_lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+        self.replayed = 0
+        self.conflicts = 0
+
+    def _count(self, counter: str):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _evict_expired(self, now: float):
+        while self._completed:
+            key, (expires_at, _, _) = next(iter(self._completed.items()))
+            if expires_at > now:
+                break
+            del self._completed[key]
+
+    def begin(self, key: str, fingerprint) -> tuple:
+        """
+        Join or start the execution for a key.
+
+        Args:
+            key: Idempotency key, scoped to the caller
+            fingerprint: What identifies the request; a key reused with another fingerprint is rejected
+
+        Returns:
+            (future, leader): the future resolves to the result; the leader must run
+            the request and report it with ``finish``/``fail``, everyone else awaits it
+
+        Raises:
+            IdempotencyConflictError: If the key belongs to a different request
+        """
+        now = time.monotonic()
+        self._evict_expired(now)
+
+        completed = self._completed.get(key)
+        if completed is not None:
+            _, stored_fingerprint, result = completed
+            if stored_fingerprint != fingerprint:
+                self._count("conflicts")
+                raise IdempotencyConflictError()
+            self._count("replayed")
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(result)
+            return future, False
+
+        running = self._in_flight.get(key)
+        if running is not None:
+            future, stored_fingerprint = running
+            if stored_fingerprint != fingerprint:
+                self._count("conflicts")
+                raise IdempotencyConflictError()
+            self._count("coalesced")
+            return future, False
+
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_consume_error)
+        self._in_flight[key] = (future, fingerprint)
+        self._count("executions")
+        return future, True
+
+    def finish(self, key: str, result):
+        """Store the leader's result and hand it to every waiting request."""
+        future, fingerprint = self._in_flight.pop(key)
+        if self.ttl_seconds > 0 and self.max_entries > 0:
+            self._completed[key] = (time.monotonic() + self.ttl_seconds, fingerprint, result)
+            self._completed.move_to_end(key)
+            while len(self._completed) > self.max_entries:
+                self._completed.popitem(last=False)
+        if not future.done():
+            future.set_result(result)
+
+    def fail(self, key: str, error: BaseException):
+        """Pass the leader's error to every waiting request without storing it."""
+        entry = self._in_flight.pop(key, None)
+        if entry is not None and not entry[0].done():
+            entry[0].set_exception(error)
+
+    async def run(self, key: str, fingerprint, execute) -> tuple:
+        """
+        Run ``execute()`` once per key and share its result.
+
+        The execution is a task of its own, so a leader whose client
+        disconnects still completes it for the requests waiting on it.
+
+        Returns:
+            (result, replayed): replayed is False only for the request that ran it
+        """
+        future, leader = self.begin(key, fingerprint)
+        if leader:
+            async def lead():
+                try:
+                    result = await execute()
+                except asyncio.CancelledError:
+                    self.fail(key, RuntimeError("The request was cancelled before it finished"))
+                    raise
+                except BaseException as e:
+                    self.fail(key, e)
+                    raise
+                self.finish(key, result)
+
+            task = asyncio.create_task(lead())
+            # Retrieved through the future; keeps the task from warning
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return await asyncio.shield(future), not leader
+
+    def get_stats(self) -> dict:
+        """Get executions, coalesced and replayed requests, and stored results."""
+        with self._stats_lock:
+            return {
+                "in_flight": len(self._in_flight),
+                "stored": len(self._completed),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "replayed": self.replayed,
+                "conflicts": self.conflicts,
+            }
@@ -0,0 +1,288 @@
+import calendar
+import json
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from interval_index import parse_event_time
+
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+DAY_PATTERN = re.compile(
+    r"\b(today|tomorrow|this week|(?:(?:this|on)\s+)?(" + "|".join(WEEKDAYS) + r"))\b"
+)
+TIME_PATTERN = re.compile(
+    r"\b(?:(\d{1,2})(?::([0-5]\d))?\s*(am|pm|a\.m\.|p\.m\.)|([01]?\d|2[0-3]):([0-5]\d)|(noon))(?![\w:])"
+)
+DURATION_PATTERN = re.compile(
+    r"\bfor\s+(an?|\d+)\s*(minutes?|mins?|hours?|hrs?)\b"
+)
+
+AGENDA_PATTERN = re.compile(
+    r"^(what|show|list|tell me|give me|do i have|any)\b"
+    r".*\b(schedule|calendar|agenda|events?|meetings?|appointments?|plans?|what'?s on)\b"
+)
+AVAILABILITY_PATTERN = re.compile(r"^(am i|are we|will i be)\s+(free|available|busy)\b")
+
+# Anything that suggests a write, a relative range or a condition goes to the LLM
+FALL_THROUGH_PATTERN = re.compile(
+    r"\b(create|add|book|set up|cancel|delete|remove|move|reschedule|update|change|"
+    r"invite|rename|to schedule|schedule\s+(?:a|an|me|my|it|that|the|some)|next|last|morning|"
+    r"afternoon|evening|tonight|night|weekend|month|between|until|after|before|"
+    r"from|every|if|and|or|but|with|not|about|regarding|called|named|titled|"
+    r"yesterday|did|was|were|ago|" + "|".join(calendar.month_name[1:]) + "|"
+    + "|".join(calendar.month_abbr[1:]) + r")\b"
+)
+
+MAX_WORDS = 12
+AGENDA_MAX_RESULTS = 50
+DEFAULT_DURATION_MINUTES = 60
+
+
+def _normalize(message: str) -> str:
+    """Lowercase, unify apostrophes and strip trailing punctuation."""
+    text = message.strip().lower().replace("’", "'")
+    return re.sub(r"[?.!\s]+$", "", text)
+
+
+def _format_time(value: datetime) -> str:
+    return value.strftime("%I:%M %p").lstrip("0")
+
+
+def _format_day(day: date, today: date) -> str:
+    if day == today:
+        label = "today"
+    elif day == today + timedelta(days=1):
+        label = "tomorrow"
+    else:
+        return day.strftime("%A, %B %d")
+    return f"{label} ({day.strftime('%A, %B %d')})"
+
+
+def _format_event(event: dict) -> str:
+    """One agenda line for an event whose start/end are API strings."""
+    summary = event.get("summary") or "(no title)"
+    if "T" not in (event.get("start") or ""):
+        return f"- All day: {summary}"
+    start = parse_event_time({"dateTime": event["start"]}).astimezone()
+    end = parse_event_time({"dateTime": event["end"]}).astimezone()
+    return f"- {_format_time(start)} – {_format_time(end)}: {summary}"
+
+
+def parse_day(text: str, today: date) -> Optional[tuple]:
+    """
+    Find the single day (or "this week") a message refers to.
+
+    Returns:
+        (first_day, last_day) inclusive, today when the message names no day,
+        or None when it names more than one
+    """
+    matches = DAY_PATTERN.findall(text)
+    if len(matches) > 1:
+        return None
+    if not matches:
+        return today, today
+
+    phrase, weekday = matches[0]
+    if phrase == "today":
+        return today, today
+    if phrase == "tomorrow":
+        day = today + timedelta(days=1)
+        return day, day
+    if phrase == "this week":
+        return today, today + timedelta(days=6 - today.weekday())
+    day = today + timedelta(days=(WEEKDAYS.index(weekday) - today.weekday()) % 7)
+    return day, day
+
+
+def parse_time(text: str) -> Optional[tuple]:
+    """
+    Find the single clock time a message refers to.
+
+    Returns:
+        (hour, minute), or None when there is no unambiguous time
+    """
+    matches = TIME_PATTERN.findall(text)
+    if len(matches) != 1:
+        return None
+    hour, minute, meridiem, hour_24, minute_24, noon = matches[0]
+    if noon:
+        return 12, 0
+    if hour_24:
+        return int(hour_24), int(minute_24)
+
+    hour = int(hour)
+    if not 1 <= hour <= 12:
+        return None
+    if meridiem.startswith("p") and hour != 12:
+        hour += 12
+    elif meridiem.startswith("a") and hour == 12:
+        hour = 0
+    return hour, int(minute or 0)
+
+
+def parse_duration(text: str) -> int:
+    """Get a "for N minutes/hours" duration in minutes, or the default."""
+    match = DURATION_PATTERN.search(text)
+    if not match:
+        return DEFAULT_DURATION_MINUTES
+    amount = 1 if match.group(1) in ("a", "an") else int(match.group(1))
+    return amount * 60 if match.group(2).startswith(("hour", "hr")) else amount
+
+
+class IntentRouter:
+    """
+    Deterministic fast path for simple agenda and availability questions.
+
+    Only short, unambiguous questions about the primary calendar are
+    answered here, straight from the calendar tools (and so from the read
+    cache, event mirror and conflict index) with a templated reply. Anything
+    else, or any failure, returns None so the message goes to the LLM.
+    """
+
+    def __init__(self, get_tools):
+        """
+        Args:
+            get_tools: Callable taking a user ID and returning that user's
+                calendar tools by name
+        """
+        self.get_tools = get_tools
+        self._lock = threading.Lock()
+        self.routed = 0
+        self.fell_through = 0
+        self.errors = 0
+        self._route_time = 0.0
+
+    def match(self, message: str, now: datetime = None) -> Optional[dict]:
+        """
+        Parse a message into a high-confidence intent.
+
+        Returns:
+            Dict with ``intent`` ("agenda" or "availability") and its window,
+            or None if the message is not a simple query
+        """
+        text = _normalize(message)
+        if not text or len(text.split()) > MAX_WORDS or FALL_THROUGH_PATTERN.search(text):
+            return None
+        now = now or datetime.now()
+        today = now.date()
+
+        if AVAILABILITY_PATTERN.search(text):
+            days = parse_day(text, today)
+            clock = parse_time(text)
+            # Numbers other than the time and duration could be dates
+            leftover = DURATION_PATTERN.sub("", TIME_PATTERN.sub("", text))
+            if days is None or days[0] != days[1] or clock is None or re.search(r"\d", leftover):
+                return None
+            start = datetime.combine(days[0], datetime.min.time()).replace(hour=clock[0], minute=clock[1])
+            return {
+                "intent": "availability",
+                "start": start,
+                "end": start + timedelta(minutes=parse_duration(text)),
+                "today": today,
+            }
+
+        if AGENDA_PATTERN.search(text) and not re.search(r"\d", text):
+            days = parse_day(text, today)
+            if days is None:
+                return None
+            return {
+                "intent": "agenda",
+                "start": datetime.combine(days[0], datetime.min.time()),
+                "end": datetime.combine(days[1] + timedelta(days=1), datetime.min.time()),
+                "today": today,
+            }
+        return None
+
+    def _answer_agenda(self, intent: dict, tools: dict) -> str:
+        events = tools["search_events"].invoke({
+            "calendars_info": json.dumps([{"id": "primary"}]),
+            "min_datetime": intent["start"].strftime("%Y-%m-%d %H:%M:%S"),
+            "max_datetime": intent["end"].strftime("%Y-%m-%d %H:%M:%S"),
+            "max_results": AGENDA_MAX_RESULTS,
+        })
+        first_day = intent["start"].date()
+        last_day = (intent["end"] - timedelta(days=1)).date()
+        if first_day == last_day:
+            label = _format_day(first_day, intent["today"])
+        else:
+            label = f"the rest of this week ({first_day.strftime('%B %d')} – {last_day.strftime('%B %d')})"
+
+        if not events:
+            return f"You have no events scheduled for {label}."
+        if first_day == last_day:
+            return f"Here's your schedule for {label}:\n" + "\n".join(_format_event(e) for e in events)
+
+        lines = [f"Here's your schedule for {label}:"]
+        current_day = None
+        for event in events:
+            event_day = parse_event_time(
+                {"dateTime": event["start"]} if "T" in event["start"] else {"date": event["start"]}
+            ).astimezone().date()
+            if event_day != current_day:
+                current_day = event_day
+                lines.append(f"\n**{event_day.strftime('%A, %B %d')}**")
+            lines.append(_format_event(event))
+        return "\n".join(lines)
+
+    def _answer_availability(self, intent: dict, tools: dict) -> str:
+        conflicts = json.loads(tools["check_calendar_conflicts"].invoke({
+            "start_datetime": intent["start"].strftime("%Y-%m-%d %H:%M:%S"),
+            "end_datetime": intent["end"].strftime("%Y-%m-%d %H:%M:%S"),
+            "calendar_id": "primary",
+        }))
+        slot = (
+            f"{_format_day(intent['start'].date(), intent['today'])} from "
+            f"{_format_time(intent['start'])} to {_format_time(intent['end'])}"
+        )
+        if not conflicts:
+            return f"Yes, you're free {slot}."
+        count = "an event" if len(conflicts) == 1 else f"{len(conflicts)} events"
+        return f"No, you have {count} {slot}:\n" + "\n".join(_format_event(e) for e in conflicts)
+
+    def route(self, message: str, user_id: str) -> Optional[str]:
+        """
+        Answer a message on the fast path.
+
+        Args:
+            message: User's message
+            user_id: Caller identity, whose calendar is read
+
+        Returns:
+            The templated reply, or None to hand the message to the LLM
+        """
+        started_at = time.perf_counter()
+        intent = self.match(message)
+        try:
+            if intent is None:
+                answer = None
+            elif intent["intent"] == "agenda":
+                answer = self._answer_agenda(intent, self.get_tools(user_id))
+            else:
+                answer = self._answer_availability(intent, self.get_tools(user_id))
+        except Exception as e:
+            print(f"Fast-path routing failed, falling back to the LLM: {e}")
+            answer = None
+            with self._lock:
+                self.errors += 1
+
+        with self._lock:
+            if answer is None:
+                self.fell_through += 1
+            else:
+                self.routed += 1
+                self._route_time += time.perf_counter() - started_at
+        return answer
+
+    def get_stats(self) -> dict:
+        """Get how many messages took the fast path and how fast they were answered."""
+        with self._lock:
+            return {
+                "routed": self.routed,
+                "fell_through": self.fell_through,
+                "errors": self.errors,
+                "avg_routed_ms": round(self._route_time / self.routed * 1000, 2) if self.routed else 0.0,
+            }
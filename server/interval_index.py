@@ -0,0 +1,286 @@
+import bisect
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+
+
+def parse_event_time(value: dict) -> datetime:
+    """Parse a Calendar API start/end object into an aware datetime."""
+    if "dateTime" in value:
+        return datetime.fromisoformat(value["dateTime"].replace("Z", "+00:00"))
+    # All-day events are anchored to local midnight
+    return datetime.strptime(value["date"], "%Y-%m-%d").astimezone()
+
+
+def _summarize_event(event: dict) -> dict:
+    """Reduce a Calendar API event to the fields conflict checks report."""
+    return {
+        "id": event.get("id"),
+        "summary": event.get("summary"),
+        "start": event["start"].get("dateTime") or event["start"].get("date"),
+        "end": event["end"].get("dateTime") or event["end"].get("date"),
+    }
+
+
+def _blocks_time(event: dict) -> bool:
+    return event.get("status") != "cancelled" and event.get("transparency") != "transparent"
+
+
+class IntervalIndex:
+    """
+    Intervals kept sorted by start time.
+
+    Overlap queries bisect on the start times and only scan back as far as the
+    longest interval, so lookups are O(log n + k) for typical calendars.
+    """
+
+    def __init__(self):
+        self._starts = []
+        self._items = []
+        self._max_duration = timedelta(0)
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, start: datetime, end: datetime, event_id=None, summary=None):
+        """Insert an interval."""
+        position = bisect.bisect_right(self._starts, start)
+        self._starts.insert(position, start)
+        self._items.insert(position, {
+            "id": event_id,
+            "summary": summary,
+            "start": start,
+            "end": end,
+        })
+        self._max_duration = max(self._max_duration, end - start)
+
+    def remove(self, event_id) -> bool:
+        """Remove the interval for an event ID; returns whether one was found."""
+        for position, item in enumerate(self._items):
+            if item["id"] == event_id:
+                del self._starts[position]
+                del self._items[position]
+                return True
+        return False
+
+    def overlapping(self, start: datetime, end: datetime) -> list:
+        """Get intervals that overlap [start, end)."""
+        low = bisect.bisect_left(self._starts, start - self._max_duration)
+        high = bisect.bisect_left(self._starts, end)
+        return [
+            item for item in self._items[low:high]
+            if item["end"] > start
+        ]
+
+
+class EventIntervalIndex:
+    """
+    Per-calendar interval indexes of upcoming events for instant conflict checks.
+
+    Each calendar is loaded with one windowed fetch covering the next
+    ``horizon_days`` and rebuilt after ``refresh_seconds``; writes made
+    through the agent's tools are applied to the index immediately.
+
+    Fetches run outside the index lock, one at a time per calendar: checks
+    on other calendars never wait for them, concurrent checks of a calendar
+    being built share its one fetch, and while an expired index is rebuilt
+    it keeps answering.
+    """
+
+    def __init__(self, get_api_resource, horizon_days: int, refresh_seconds: float):
+        """
+        Args:
+            get_api_resource: Callable returning the Calendar API resource
+            horizon_days: How far ahead events are indexed
+            refresh_seconds: Age after which a calendar's index is rebuilt
+        """
+        self.get_api_resource = get_api_resource
+        self.horizon = timedelta(days=horizon_days)
+        self.refresh_seconds = refresh_seconds
+        self._calendars = {}
+        # Calendar -> fetch in progress, with the writes made while it runs
+        self._building = {}
+        self._lock = threading.RLock()
+        self.builds = 0
+        self.queries = 0
+        self.live_queries = 0
+        self._query_time = 0.0
+
+    def _fetch_events(self, calendar_id: str, window_start: datetime, window_end: datetime) -> list:
+        """Fetch every event in the window, following pagination."""
+        events = []
+        page_token = None
+        while True:
+            result = self.get_api_resource().events().list(
+                calendarId=calendar_id,
+                timeMin=window_start.isoformat(),
+                timeMax=window_end.isoformat(),
+                singleEvents=True,
+                orderBy="startTime",
+                maxResults=2500,
+                pageToken=page_token,
+            ).execute()
+            events.extend(result.get("items", []))
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                return events
+
+    def load(self, calendar_id: str, window_start: datetime, window_end: datetime) -> IntervalIndex:
+        """Fetch a calendar's events in a window into a new, unshared interval index."""
+        index = IntervalIndex()
+        for event in self._fetch_events(calendar_id, window_start, window_end):
+            if _blocks_time(event):
+                index.add(
+                    parse_event_time(event["start"]),
+                    parse_event_time(event["end"]),
+                    event.get("id"),
+                    event.get("summary"),
+                )
+        return index
+
+    def _build(self, calendar_id: str) -> dict:
+        """Load a calendar's upcoming events into a fresh index."""
+        window_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        window_end = window_start + self.horizon
+        index = self.load(calendar_id, window_start, window_end)
+        return {
+            "index": index,
+            "window_start": window_start,
+            "window_end": window_end,
+            "built_at": time.monotonic(),
+        }
+
+    def _get(self, calendar_id: str) -> dict:
+        """Get a calendar's index entry, building or rebuilding it if needed."""
+        with self._lock:
+            entry = self._calendars.get(calendar_id)
+            if entry is not None and time.monotonic() - entry["built_at"] <= self.refresh_seconds:
+                return entry
+            build = self._building.get(calendar_id)
+            if build is not None and entry is not None:
+                # Another thread is rebuilding it; the expired index answers meanwhile
+                return entry
+            owner = build is None
+            if owner:
+                build = self._building[calendar_id] = {"future": Future(), "writes": [], "invalidated": False}
+        if not owner:
+            return build["future"].result()
+
+        try:
+            entry = self._build(calendar_id)
+        except BaseException as e:
+            with self._lock:
+                del self._building[calendar_id]
+            build["future"].set_exception(e)
+            raise
+        with self._lock:
+            del self._building[calendar_id]
+            # Writes made during the fetch may or may not be in it, so each is replayed
+            for event_id, added in build["writes"]:
+                if event_id is not None:
+                    entry["index"].remove(event_id)
+                if added is not None:
+                    entry["index"].add(*added)
+            if not build["invalidated"]:
+                self._calendars[calendar_id] = entry
+            self.builds += 1
+        build["future"].set_result(entry)
+        return entry
+
+    def find_conflicts(self, calendar_id: str, start: datetime, end: datetime):
+        """
+        Find indexed events overlapping [start, end).
+
+        Args:
+            calendar_id: Calendar to check
+            start: Aware start datetime
+            end: Aware end datetime
+
+        Returns:
+            List of overlapping events, or None if the range is outside the indexed window
+        """
+        entry = self._get(calendar_id)
+        with self._lock:
+            if start < entry["window_start"] or end > entry["window_end"]:
+                return None
+            started_at = time.perf_counter()
+            conflicts = entry["index"].overlapping(start, end)
+            self._query_time += time.perf_counter() - started_at
+            self.queries += 1
+            return [
+                {
+                    "id": item["id"],
+                    "summary": item["summary"],
+                    "start": item["start"].isoformat(),
+                    "end": item["end"].isoformat(),
+                }
+                for item in conflicts
+            ]
+
+    def find_conflicts_live(self, calendar_id: str, start: datetime, end: datetime, mirror=None) -> list:
+        """
+        Find events overlapping [start, end), wherever the range falls.
+
+        Inside the indexed window this is ``find_conflicts``; outside it the
+        event mirror (when given and the range is mirrored) or the Calendar
+        API is asked directly, so far-off bookings are still checked.
+
+        Returns:
+            List of overlapping events
+        """
+        conflicts = self.find_conflicts(calendar_id, start, end)
+        if conflicts is not None:
+            return conflicts
+        if mirror is not None and mirror.covers(start):
+            events = mirror.query(calendar_id, start, end, max_results=250)
+        else:
+            events = self._fetch_events(calendar_id, start, end)
+        with self._lock:
+            self.live_queries += 1
+        return [_summarize_event(event) for event in events if _blocks_time(event)]
+
+    def add_event(self, calendar_id: str, start: datetime, end: datetime, event_id=None, summary=None):
+        """Apply a created or updated event to an already-built index."""
+        with self._lock:
+            entry = self._calendars.get(calendar_id)
+            if entry is not None:
+                entry["index"].add(start, end, event_id, summary)
+            build = self._building.get(calendar_id)
+            if build is not None:
+                build["writes"].append((event_id, (start, end, event_id, summary)))
+
+    def remove_event(self, calendar_id: str, event_id: str):
+        """Remove a deleted or moved event from an already-built index."""
+        with self._lock:
+            entry = self._calendars.get(calendar_id)
+            if entry is not None:
+                entry["index"].remove(event_id)
+            build = self._building.get(calendar_id)
+            if build is not None:
+                build["writes"].append((event_id, None))
+
+    def invalidate(self, calendar_id: str = None):
+        """Drop one calendar's index (or all of them) so it is rebuilt on next use."""
+        with self._lock:
+            if calendar_id is None:
+                self._calendars.clear()
+                builds = self._building.values()
+            else:
+                self._calendars.pop(calendar_id, None)
+                builds = [self._building[calendar_id]] if calendar_id in self._building else []
+            # A fetch already running may predate the change; its result is not kept
+            for build in builds:
+                build["invalidated"] = True
+
+    def get_stats(self) -> dict:
+        """Get index sizes and query timing."""
+        with self._lock:
+            return {
+                "calendars": len(self._calendars),
+                "events": sum(len(entry["index"]) for entry in self._calendars.values()),
+                "builds": self.builds,
+                "queries": self.queries,
+                "live_queries": self.live_queries,
+                "avg_query_us": round(self._query_time / self.queries * 1e6, 2) if self.queries else 0.0,
+            }
@@ -1,15 +1,42 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Query, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional, TYPE_CHECKING
+import asyncio
+import io
+import json
+import time
 import uvicorn
 
-from calendar_agent import CalendarAgent
-from models import ChatMessage, ChatResponse, HealthResponse, StatusResponse
+from models import (
+    BatchChatRequest, ChatMessage, ChatResponse, HealthResponse, StatusResponse, ThreadMessagesResponse
+)
+from worker_pool import AgentWorkerPool, QueueFullError
+from readiness import ReadinessMonitor
+from thread_locks import ThreadLocks
+from idempotency import IdempotencyCache, IdempotencyConflictError
+from chat_batch import run_batch
+from event_import import EventImporter, FORMATS, ON_CONFLICT_CHOICES, detect_format
+import telemetry
 from config import (
-    API_HOST, API_PORT, CORS_ORIGINS, CORS_ALLOW_CREDENTIALS, 
-    CORS_ALLOW_METHODS, CORS_ALLOW_HEADERS
+    API_HOST, API_PORT, API_WORKERS, CORS_ORIGINS, CORS_ALLOW_CREDENTIALS, 
+    CORS_ALLOW_METHODS, CORS_ALLOW_HEADERS, AGENT_QUEUE_SIZE,
+    AGENT_ASYNC_CONCURRENCY, READINESS_INTERVAL_SECONDS, CHECKPOINT_BACKEND,
+    CHECKPOINT_DB_PATH, CHECKPOINT_HOT_THREADS, CHECKPOINT_THREAD_TTL_SECONDS,
+    CHECKPOINT_KEEP_LAST, REFRESH_DRAIN_SECONDS, STARTUP_MODE, STARTUP_WARMUP,
+    IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_MAX_ENTRIES, CHAT_BATCH_MAX_ITEMS,
+    CHAT_BATCH_CONCURRENCY, CHAT_BATCH_MAX_CONCURRENCY, IMPORT_BATCH_CONCURRENCY,
+    TENANT_AUTH_SECRET
 )
 
+# The agent stack (LangGraph, LangChain, Google clients) is imported when the
+# first agent is built, not at module load, so the port can open right away
+if TYPE_CHECKING:
+    from calendar_agent import CalendarAgent
+
 
 # Global state
 app_state = {}
@@ -20,27 +47,53 @@ async def lifespan(app: FastAPI):
     """Application lifespan manager."""
     # Startup
     print("Initializing Calendar Assistant...")
+    app_state["worker_pool"] = AgentWorkerPool(AGENT_QUEUE_SIZE, AGENT_ASYNC_CONCURRENCY)
+    app_state["checkpointer"] = None
+    app_state["calendar_agent"] = None
+    app_state["refresh_task"] = None
+    app_state["retiring"] = set()
+    # Outlives agent rebuilds, like the checkpointer, so ordering holds across /refresh;
+    # with several processes the locks live next to the shared checkpoint store
+    app_state["thread_locks"] = ThreadLocks(
+        lock_dir=f"{CHECKPOINT_DB_PATH}.locks" if API_WORKERS > 1 else None
+    )
+    app_state["idempotency"] = IdempotencyCache(IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_MAX_ENTRIES)
+    # Keyed streaming turns run as tasks of their own so they outlive their request
+    app_state["detached_turns"] = set()
     
-    try:
-        # Initialize the calendar agent
-        calendar_agent = CalendarAgent()
-        app_state["calendar_agent"] = calendar_agent
-        
-        # Get initial status
-        status = calendar_agent.get_status()
-        print(f"Calendar Assistant initialized. Today is {status['current_date']}")
-        print(f"Ready: {status['ready']}, Authenticated: {status['authenticated']}")
-        
-    except Exception as e:
-        print(f"Error initializing Calendar Assistant: {e}")
-        # Still start the app, but mark as not ready
-        app_state["calendar_agent"] = None
-        app_state["initialization_error"] = str(e)
+    readiness = ReadinessMonitor(
+        get_agent=lambda: app_state.get("calendar_agent"),
+        get_error=lambda: app_state.get("initialization_error"),
+        interval=READINESS_INTERVAL_SECONDS,
+        is_starting=_is_starting
+    )
+    app_state["readiness"] = readiness
+    
+    if STARTUP_MODE == "background":
+        # Open the port now; readiness reports "starting" until the agent is built
+        app_state["refresh_task"] = _start_task(_initialize_agent())
+        await readiness.refresh()
+    else:
+        await _initialize_agent()
+    readiness.start()
     
     yield
     
     # Shutdown
     print("Shutting down Calendar Assistant...")
+    await readiness.stop()
+    if app_state["refresh_task"] is not None:
+        app_state["refresh_task"].cancel()
+    for task in app_state["detached_turns"]:
+        task.cancel()
+    if app_state["detached_turns"]:
+        await asyncio.gather(*app_state["detached_turns"], return_exceptions=True)
+    if app_state["retiring"]:
+        await asyncio.gather(*app_state["retiring"], return_exceptions=True)
+    if app_state.get("calendar_agent"):
+        app_state["calendar_agent"].close()
+    if app_state["checkpointer"] is not None and hasattr(app_state["checkpointer"], "close"):
+        app_state["checkpointer"].close()
     app_state.clear()
 
 
@@ -62,20 +115,52 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def record_request_time(request: Request, call_next):
+    """Observe each request's time until its response starts (streams excluded)."""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        telemetry.HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            # Route templates, not raw paths, keep the label set bounded
+            route=route.path if route is not None else "unmatched",
+            status=status
+        )
+
+
+def _current_date_and_time() -> tuple:
+    """Current local date and time formatted for status responses."""
+    now = datetime.now()
+    return now.strftime("%A, %B %d, %Y"), now.strftime("%I:%M %p")
+
+
 @app.get("/")
 async def root():
     """Root endpoint with basic information."""
-    calendar_agent = app_state.get("calendar_agent")
+    status = app_state["readiness"].snapshot
     
-    if calendar_agent:
-        status = calendar_agent.get_status()
+    if status["initialized"]:
+        current_date, current_time = _current_date_and_time()
         return {
             "message": "Calendar Assistant API",
             "version": "1.0.0",
-            "current_date": status["current_date"],
-            "current_time": status["current_time"],
+            "current_date": current_date,
+            "current_time": current_time,
             "ready": status["ready"]
         }
+    elif status["starting"]:
+        return {
+            "message": "Calendar Assistant API",
+            "version": "1.0.0",
+            "status": "starting"
+        }
     else:
         error = app_state.get("initialization_error", "Unknown initialization error")
         return {
@@ -86,79 +171,786 @@ async def root():
         }
 
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat(message: ChatMessage):
-    """Chat endpoint for interacting with the calendar assistant."""
-    calendar_agent = app_state.get("calendar_agent")
+def _create_agent() -> "CalendarAgent":
+    """Build a calendar agent, importing the agent stack on first use."""
+    from calendar_agent import CalendarAgent
+    from checkpoint_store import create_checkpointer
+    
+    if app_state["checkpointer"] is None:
+        # One checkpoint store outlives agent rebuilds so conversations survive /refresh
+        app_state["checkpointer"] = create_checkpointer(
+            CHECKPOINT_BACKEND, CHECKPOINT_DB_PATH, CHECKPOINT_HOT_THREADS,
+            CHECKPOINT_THREAD_TTL_SECONDS, CHECKPOINT_KEEP_LAST,
+            shared=API_WORKERS > 1
+        )
+    return CalendarAgent(checkpointer=app_state["checkpointer"])
+
+
+async def _initialize_agent():
+    """Build the first agent; on failure the app still starts, marked not ready."""
+    try:
+        await _rebuild_agent()
+    except Exception as e:
+        print(f"Error initializing Calendar Assistant: {e}")
+        app_state["initialization_error"] = str(e)
+        await app_state["readiness"].refresh()
+        return
+    
+    if STARTUP_WARMUP:
+        await asyncio.to_thread(app_state["calendar_agent"].warm_up)
+        await app_state["readiness"].refresh()
     
+    status = app_state["readiness"].snapshot
+    print(f"Calendar Assistant initialized. Today is {datetime.now().strftime('%A, %B %d, %Y')}")
+    print(f"Ready: {status['ready']}, Authenticated: {status['authenticated']}")
+
+
+def _is_starting() -> bool:
+    """Whether the first agent is still being built."""
+    task = app_state.get("refresh_task")
+    return app_state.get("calendar_agent") is None and task is not None and not task.done()
+
+
+async def _get_agent() -> "CalendarAgent":
+    """Get the current agent, waiting for it while the server is still starting."""
+    if _is_starting():
+        try:
+            await asyncio.shield(app_state["refresh_task"])
+        except Exception:
+            pass
+    
+    calendar_agent = app_state.get("calendar_agent")
     if not calendar_agent:
         error_msg = app_state.get("initialization_error", "Calendar Assistant not initialized")
         raise HTTPException(status_code=500, detail=error_msg)
+    return calendar_agent
+
+
+async def _resolve_user(
+    calendar_agent: "CalendarAgent",
+    user_id: Optional[str],
+    user_token: Optional[str] = None
+) -> str:
+    """
+    Resolve the caller identity from the X-User-ID header.
+    
+    Requests without the header act as the default user. Other users are
+    only accepted when TENANT_AUTH_SECRET is set and X-User-Token carries
+    the user ID's signature, and they must already have a token file; the
+    browser OAuth flow is never started for them from a request.
+    """
+    from tenant_pool import DEFAULT_USER_ID, UnknownTenantError, validate_user_id, verify_user_token
     
-    if not calendar_agent.is_ready():
+    if user_id is None:
+        return DEFAULT_USER_ID
+    if not TENANT_AUTH_SECRET:
+        raise HTTPException(
+            status_code=400,
+            detail="X-User-ID is not accepted: multi-tenant requests are disabled on this server."
+        )
+    try:
+        validate_user_id(user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not verify_user_token(user_id, user_token, TENANT_AUTH_SECRET):
+        raise HTTPException(status_code=401, detail="Missing or invalid X-User-Token for X-User-ID.")
+    if user_id != DEFAULT_USER_ID:
+        try:
+            service = await asyncio.to_thread(calendar_agent.tenants.get, user_id)
+        except UnknownTenantError as e:
+            raise HTTPException(status_code=401, detail=str(e))
+        if not await asyncio.to_thread(service.is_ready):
+            raise HTTPException(
+                status_code=401,
+                detail=f"No valid Google Calendar credentials for user '{user_id}'."
+            )
+    return user_id
+
+
+def _idempotency_key(message: ChatMessage, header_key: Optional[str], user_id: str) -> Optional[str]:
+    """The request's idempotency key (body first, then Idempotency-Key header), scoped to the user."""
+    key = message.idempotency_key or header_key
+    if key is None:
+        return None
+    if len(key) > 128:
+        raise HTTPException(status_code=400, detail="Idempotency key must be at most 128 characters")
+    return f"{user_id}:{key}"
+
+
+@asynccontextmanager
+async def _hold_tenant(calendar_agent: "CalendarAgent", user_id: str):
+    """Keep the user's calendar service open while a turn uses it, even if the pool evicts it."""
+    service = await asyncio.to_thread(calendar_agent.tenants.acquire, user_id)
+    try:
+        yield service
+    finally:
+        calendar_agent.tenants.release(service)
+
+
+async def _run_turn(calendar_agent: "CalendarAgent", user_id: str, thread_id: str, text: str) -> tuple:
+    """
+    Run one chat turn after the conversation's earlier turns.
+    
+    Returns:
+        (response, seconds waited for earlier turns of the thread)
+    """
+    # Keyed turns run as tasks of their own and may outlive their request
+    calendar_agent.begin_turn()
+    try:
+        # Admitted first, then waits for this conversation's earlier turns
+        # before taking a worker slot, so queued turns of a busy thread count
+        # against the bounded queue
+        async with _hold_tenant(calendar_agent, user_id), app_state["worker_pool"].slot(
+            wait_for=app_state["thread_locks"].hold(f"{user_id}:{thread_id}")
+        ) as waited:
+            response = await calendar_agent.aprocess_message(text, thread_id, user_id)
+        return response, waited
+    finally:
+        calendar_agent.end_turn()
+
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(
+    message: ChatMessage,
+    http_response: Response,
+    x_user_id: Optional[str] = Header(None),
+    x_user_token: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None)
+):
+    """
+    Chat endpoint for interacting with the calendar assistant.
+    
+    Turns of one conversation run in order; the X-Thread-Wait-Ms response
+    header tells how long this one waited for earlier turns. A request with
+    an idempotency key that is running or recently answered is not run
+    again: it gets that turn's reply, marked with Idempotent-Replayed.
+    """
+    calendar_agent = await _get_agent()
+    
+    if not app_state["readiness"].snapshot["ready"]:
         raise HTTPException(
             status_code=503, 
             detail="Calendar Assistant is not ready. Please check authentication."
         )
     
+    # Counted from here so a /refresh swap waits for this turn before closing the agent
+    calendar_agent.begin_turn()
     try:
-        response = calendar_agent.process_message(
-            message.message, 
-            message.thread_id
-        )
+        user_id = await _resolve_user(calendar_agent, x_user_id, x_user_token)
+        key = _idempotency_key(message, idempotency_key, user_id)
+        
+        async def run_turn() -> str:
+            response, waited = await _run_turn(calendar_agent, user_id, message.thread_id, message.message)
+            http_response.headers["X-Thread-Wait-Ms"] = f"{waited * 1000:.1f}"
+            return response
+        
+        if key is None:
+            response = await run_turn()
+        else:
+            response, replayed = await app_state["idempotency"].run(
+                key, (message.thread_id, message.message), run_turn
+            )
+            if replayed:
+                http_response.headers["Idempotent-Replayed"] = "true"
         
         return ChatResponse(
             response=response, 
             thread_id=message.thread_id
         )
     
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Calendar Assistant is busy. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    
+    except HTTPException:
+        raise
+    
     except Exception as e:
         raise HTTPException(
             status_code=500, 
             detail=f"Error processing message: {str(e)}"
         )
+    
+    finally:
+        calendar_agent.end_turn()
+
+
+def _format_sse(event: dict) -> str:
+    """Format an agent event as a Server-Sent Events frame."""
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+@app.post("/chat/stream")
+async def chat_stream(
+    message: ChatMessage,
+    x_user_id: Optional[str] = Header(None),
+    x_user_token: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None)
+):
+    """
+    Streaming chat endpoint that emits tokens and tool progress as SSE.
+    
+    A keyed turn keeps running if its client disconnects, so a retry with
+    the same key gets its reply instead of running it again. A request
+    whose idempotency key is running or recently answered waits for that
+    turn and receives only its start and done frames, the start frame
+    marked ``replayed``.
+    """
+    calendar_agent = await _get_agent()
+    
+    if not app_state["readiness"].snapshot["ready"]:
+        raise HTTPException(
+            status_code=503, 
+            detail="Calendar Assistant is not ready. Please check authentication."
+        )
+    
+    calendar_agent.begin_turn()
+    try:
+        user_id = await _resolve_user(calendar_agent, x_user_id, x_user_token)
+        key = _idempotency_key(message, idempotency_key, user_id)
+        future, leader = None, True
+        if key is not None:
+            future, leader = app_state["idempotency"].begin(key, (message.thread_id, message.message))
+    except IdempotencyConflictError as e:
+        calendar_agent.end_turn()
+        raise HTTPException(status_code=409, detail=str(e))
+    except HTTPException:
+        calendar_agent.end_turn()
+        raise
+    
+    async def replay_stream():
+        try:
+            yield _format_sse({"type": "start", "thread_id": message.thread_id, "replayed": True})
+            try:
+                response = await asyncio.shield(future)
+            except Exception as e:
+                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                yield _format_sse({"type": "error", "detail": f"Error processing message: {detail}"})
+                return
+            yield _format_sse({"type": "done", "response": response})
+        finally:
+            calendar_agent.end_turn()
+    
+    async def turn_events():
+        """The turn's events, run after the thread's earlier turns and in a worker slot."""
+        async with _hold_tenant(calendar_agent, user_id), app_state["worker_pool"].slot(
+            wait_for=app_state["thread_locks"].hold(f"{user_id}:{message.thread_id}")
+        ) as waited:
+            yield {
+                "type": "start",
+                "thread_id": message.thread_id,
+                "thread_wait_ms": round(waited * 1000, 1)
+            }
+            try:
+                async for event in calendar_agent.astream_message(
+                    message.message,
+                    message.thread_id,
+                    user_id
+                ):
+                    yield event
+            except Exception as e:
+                yield {"type": "error", "detail": f"Error processing message: {str(e)}"}
+    
+    async def event_stream():
+        try:
+            async for event in turn_events():
+                yield _format_sse(event)
+        finally:
+            # Also runs when admission fails or the client disconnects
+            calendar_agent.end_turn()
+    
+    async def run_keyed_turn(events: asyncio.Queue):
+        # Detached from the request like /chat's keyed turns: a client that
+        # disconnects and retries with the same key gets this turn's reply
+        error = None
+        finished = False
+        try:
+            async for event in turn_events():
+                if event["type"] == "done":
+                    app_state["idempotency"].finish(key, event["response"])
+                    finished = True
+                elif event["type"] == "error":
+                    error = RuntimeError(event["detail"])
+                events.put_nowait(event)
+        except Exception as e:
+            error = e
+            events.put_nowait(e)
+        finally:
+            if not finished:
+                app_state["idempotency"].fail(
+                    key, error or RuntimeError("The request was cancelled before it finished")
+                )
+            events.put_nowait(None)
+            calendar_agent.end_turn()
+    
+    async def keyed_stream():
+        events = asyncio.Queue()
+        task = asyncio.create_task(run_keyed_turn(events))
+        app_state["detached_turns"].add(task)
+        task.add_done_callback(app_state["detached_turns"].discard)
+        while (event := await events.get()) is not None:
+            if isinstance(event, Exception):
+                raise event
+            yield _format_sse(event)
+    
+    if not leader:
+        stream = replay_stream()
+    elif key is not None:
+        stream = keyed_stream()
+    else:
+        stream = event_stream()
+    
+    # Wait for admission before committing to a 200 response
+    try:
+        first_frame = await stream.__anext__()
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Calendar Assistant is busy. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    
+    async def frames():
+        yield first_frame
+        async for frame in stream:
+            yield frame
+    
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _batch_error(error: Exception) -> dict:
+    """Error fields reported for a failed batch item, with the status /chat would return."""
+    if isinstance(error, QueueFullError):
+        return {
+            "error": "Calendar Assistant is busy. Please retry shortly.",
+            "status_code": 503,
+            "retry_after": error.retry_after
+        }
+    if isinstance(error, IdempotencyConflictError):
+        return {"error": str(error), "status_code": 409}
+    return {"error": f"Error processing message: {str(error)}", "status_code": 500}
+
+
+@app.post("/chat/batch")
+async def chat_batch(
+    batch: BatchChatRequest,
+    x_user_id: Optional[str] = Header(None),
+    x_user_token: Optional[str] = Header(None)
+):
+    """
+    Run many chat messages and stream each result as NDJSON when it completes.
+    
+    Messages of different threads run concurrently, up to the batch's
+    concurrency; messages of one thread run in the order given, after any
+    turns of that thread already in progress. A ``{"type": "start", ...}``
+    line is followed by a ``{"type": "result", ...}`` line per item (status
+    ok, error or skipped) and a final ``{"type": "summary", ...}`` line with
+    the counts. A failed item does not fail the batch.
+    """
+    calendar_agent = await _get_agent()
+    
+    if not app_state["readiness"].snapshot["ready"]:
+        raise HTTPException(
+            status_code=503, 
+            detail="Calendar Assistant is not ready. Please check authentication."
+        )
+    if len(batch.items) > CHAT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"A batch can hold at most {CHAT_BATCH_MAX_ITEMS} messages."
+        )
+    
+    calendar_agent.begin_turn()
+    try:
+        user_id = await _resolve_user(calendar_agent, x_user_id, x_user_token)
+    except HTTPException:
+        calendar_agent.end_turn()
+        raise
+    concurrency = min(batch.concurrency or CHAT_BATCH_CONCURRENCY, CHAT_BATCH_MAX_CONCURRENCY)
+    
+    async def run_item(item) -> str:
+        async def run_turn() -> str:
+            response, _ = await _run_turn(calendar_agent, user_id, item.thread_id, item.message)
+            return response
+        
+        key = _idempotency_key(item, None, user_id)
+        if key is None:
+            return await run_turn()
+        response, _ = await app_state["idempotency"].run(key, (item.thread_id, item.message), run_turn)
+        return response
+    
+    async def lines():
+        started = time.perf_counter()
+        counts = {"ok": 0, "error": 0, "skipped": 0}
+        try:
+            yield json.dumps({"type": "start", "items": len(batch.items), "concurrency": concurrency}) + "\n"
+            async for result in run_batch(
+                batch.items, concurrency, run_item, batch.stop_thread_on_error, _batch_error
+            ):
+                counts[result["status"]] += 1
+                yield json.dumps({"type": "result", **result}, default=str) + "\n"
+            yield json.dumps({
+                "type": "summary",
+                "items": len(batch.items),
+                "succeeded": counts["ok"],
+                "failed": counts["error"],
+                "skipped": counts["skipped"],
+                "concurrency": concurrency,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+            }) + "\n"
+        finally:
+            # Also runs when the client disconnects, after the batch's turns are cancelled
+            calendar_agent.end_turn()
+    
+    stream = lines()
+    # Started here so its cleanup runs even if the client leaves before streaming begins
+    first_line = await stream.__anext__()
+    
+    async def body():
+        yield first_line
+        async for line in stream:
+            yield line
+    
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+@app.post("/import")
+async def import_events(
+    file: UploadFile = File(..., description="An .ics or .csv file"),
+    calendar_id: str = Query("primary"),
+    file_format: Optional[str] = Query(None, alias="format", description="'ics' or 'csv'; guessed from the file name if omitted"),
+    on_conflict: str = Query("skip", description="'skip' events overlapping existing ones, or 'import' them anyway"),
+    default_timezone: Optional[str] = Query(None, alias="timezone", description="IANA time zone for times given without one"),
+    x_user_id: Optional[str] = Header(None),
+    x_user_token: Optional[str] = Header(None)
+):
+    """
+    Bulk-import events from an ICS or CSV file, streaming progress as NDJSON.
+    
+    The file is parsed as it is read and written with batched Calendar API
+    requests; the LLM is not involved. A ``{"type": "start", ...}`` line is
+    followed by a ``{"type": "event", ...}`` line for each skipped or failed
+    event, a ``{"type": "progress", ...}`` line after each batch request and
+    a final ``{"type": "summary", ...}`` line with the counts.
+    """
+    calendar_agent = await _get_agent()
+    
+    if not app_state["readiness"].snapshot["ready"]:
+        raise HTTPException(
+            status_code=503, 
+            detail="Calendar Assistant is not ready. Please check authentication."
+        )
+    file_format = (file_format or detect_format(file.filename, file.content_type) or "").lower()
+    if file_format not in FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail="Unknown file format; pass format=ics or format=csv."
+        )
+    if on_conflict not in ON_CONFLICT_CHOICES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"on_conflict must be one of: {', '.join(ON_CONFLICT_CHOICES)}"
+        )
+    
+    from tenant_pool import UnknownTenantError
+    
+    calendar_agent.begin_turn()
+    try:
+        user_id = await _resolve_user(calendar_agent, x_user_id, x_user_token)
+        # Held until the import finishes, so evicting the user does not close it
+        service = await asyncio.to_thread(calendar_agent.tenants.acquire, user_id)
+    except UnknownTenantError as e:
+        calendar_agent.end_turn()
+        raise HTTPException(status_code=401, detail=str(e))
+    except HTTPException:
+        calendar_agent.end_turn()
+        raise
+    try:
+        importer = EventImporter(
+            service, calendar_id, on_conflict, default_timezone, IMPORT_BATCH_CONCURRENCY
+        )
+    except ValueError as e:
+        calendar_agent.tenants.release(service)
+        calendar_agent.end_turn()
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    def finish_import():
+        calendar_agent.tenants.release(service)
+        calendar_agent.end_turn()
+    
+    parse, normalize = FORMATS[file_format]
+    loop = asyncio.get_running_loop()
+    reports = asyncio.Queue()
+    
+    def report(line: dict):
+        loop.call_soon_threadsafe(reports.put_nowait, line)
+    
+    # Uploads are spooled to disk and read a line at a time. FastAPI closes
+    # upload files when the endpoint returns, before the response streams,
+    # so the import takes the file over and closes it itself.
+    upload, file.file = file.file, io.BytesIO()
+    
+    def run_import() -> dict:
+        text = io.TextIOWrapper(upload, encoding="utf-8-sig", errors="replace", newline="")
+        try:
+            return importer.run(parse(text), normalize, report)
+        finally:
+            text.close()
+    
+    async def lines():
+        started = time.perf_counter()
+        task = None
+        try:
+            yield json.dumps({
+                "type": "start", "format": file_format, "calendar_id": calendar_id, "on_conflict": on_conflict
+            }) + "\n"
+            task = asyncio.create_task(asyncio.to_thread(run_import))
+            # Ends when the import does, after every report it queued
+            task.add_done_callback(lambda _: loop.call_soon(reports.put_nowait, None))
+            while (line := await reports.get()) is not None:
+                yield json.dumps(line, default=str) + "\n"
+            summary = {"type": "summary"}
+            try:
+                summary.update(await task)
+            except Exception as e:
+                summary.update(importer.counts, read=importer.read, error=f"Import stopped: {str(e)}")
+            summary["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            yield json.dumps(summary) + "\n"
+        finally:
+            # Also runs when the client disconnects: the import stops reading,
+            # and batches already sent still complete
+            importer.cancelled.set()
+            if task is not None and not task.done():
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                # The service stays open until those batches are done
+                task.add_done_callback(lambda _: finish_import())
+            else:
+                finish_import()
+    
+    stream = lines()
+    # Started here so its cleanup runs even if the client leaves before streaming begins
+    first_line = await stream.__anext__()
+    
+    async def body():
+        yield first_line
+        async for line in stream:
+            yield line
+    
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+@app.get("/threads/{thread_id}/messages", response_model=ThreadMessagesResponse)
+async def get_thread_messages(
+    thread_id: str,
+    before: Optional[int] = Query(None, ge=0, description="Cursor from a previous page's next_before"),
+    limit: int = Query(20, ge=1, le=100),
+    x_user_id: Optional[str] = Header(None),
+    x_user_token: Optional[str] = Header(None)
+):
+    """
+    Page through a conversation's transcript, newest messages first.
+    
+    Read straight from the checkpoint store, so it does not take a worker
+    slot or wait for a turn in progress. Unknown threads have no messages.
+    """
+    calendar_agent = await _get_agent()
+    user_id = await _resolve_user(calendar_agent, x_user_id, x_user_token)
+    page = await calendar_agent.aget_messages(thread_id, user_id, before, limit)
+    return ThreadMessagesResponse(thread_id=thread_id, **page)
 
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
-    """Health check endpoint."""
-    calendar_agent = app_state.get("calendar_agent")
+    """Health check endpoint, answered from the cached readiness snapshot."""
+    status = app_state["readiness"].snapshot
     return HealthResponse(
-        status="healthy" if calendar_agent and calendar_agent.is_ready() else "unhealthy",
-        initialized=calendar_agent is not None
+        status="healthy" if status["ready"] else ("starting" if status["starting"] else "unhealthy"),
+        initialized=status["initialized"],
+        checked_at=status["checked_at"]
+    )
+
+
+@app.get("/livez")
+async def liveness_check():
+    """Liveness probe: the process is up and its event loop is responsive."""
+    return {"status": "alive"}
+
+
+@app.get("/readyz", response_model=HealthResponse)
+async def readiness_check():
+    """Readiness probe: 200 only when the agent can serve chat requests."""
+    status = app_state["readiness"].snapshot
+    body = HealthResponse(
+        status="ready" if status["ready"] else ("starting" if status["starting"] else "not_ready"),
+        initialized=status["initialized"],
+        checked_at=status["checked_at"]
+    )
+    return JSONResponse(
+        status_code=200 if status["ready"] else 503,
+        content=body.model_dump()
     )
 
 
 @app.get("/status", response_model=StatusResponse)
 async def get_status():
-    """Detailed status endpoint."""
+    """Detailed status endpoint, answered from the cached readiness snapshot."""
+    status = app_state["readiness"].snapshot
+    current_date, current_time = _current_date_and_time()
+    return StatusResponse(
+        current_date=current_date,
+        current_time=current_time,
+        **{key: value for key, value in status.items() if key in StatusResponse.model_fields}
+    )
+
+
+@app.get("/stats")
+async def get_stats():
+    """Runtime statistics for sizing the server."""
+    stats = {
+        "worker_pool": app_state["worker_pool"].get_stats(),
+        "thread_locks": app_state["thread_locks"].get_stats(),
+        "idempotency": app_state["idempotency"].get_stats()
+    }
+    if app_state["checkpointer"] is not None and hasattr(app_state["checkpointer"], "get_stats"):
+        stats["checkpoints"] = app_state["checkpointer"].get_stats()
     calendar_agent = app_state.get("calendar_agent")
+    if calendar_agent:
+        stats["context"] = calendar_agent.context.get_stats()
+        stats["intent_router"] = calendar_agent.router.get_stats()
+        stats["tools"] = calendar_agent.tool_node.get_stats()
+        stats["calendar_cache"] = calendar_agent.calendar_service.get_cache_stats()
+        stats["conflict_index"] = calendar_agent.calendar_service.get_conflict_index_stats()
+        stats["event_mirror"] = calendar_agent.calendar_service.get_mirror_stats()
+        stats["http_transport"] = calendar_agent.calendar_service.get_transport_stats()
+        stats["tenants"] = calendar_agent.tenants.get_stats()
+    return stats
+
+
+async def _retire_agent(old_agent: "CalendarAgent"):
+    """Let a replaced agent's in-flight turns finish, then release its resources."""
+    drained = await asyncio.to_thread(old_agent.drain, REFRESH_DRAIN_SECONDS)
+    if not drained:
+        print(f"Closing the replaced agent with {old_agent.in_flight} turn(s) still running")
+    await asyncio.to_thread(old_agent.close)
+
+
+async def _rebuild_agent():
+    """Build a new agent off the event loop and swap it in."""
+    calendar_agent = await asyncio.to_thread(_create_agent)
+    
+    # One assignment on the event loop: each request gets the old agent or the
+    # new one, and conversations carry over through the shared checkpointer
+    old_agent = app_state.get("calendar_agent")
+    app_state["calendar_agent"] = calendar_agent
+    app_state.pop("initialization_error", None)
+    await app_state["readiness"].refresh()
     
+    if old_agent:
+        task = asyncio.create_task(_retire_agent(old_agent))
+        app_state["retiring"].add(task)
+        task.add_done_callback(app_state["retiring"].discard)
+
+
+def _report_refresh(task: asyncio.Task):
+    """Log a failed rebuild (nobody may be waiting on it)."""
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Error refreshing Calendar Assistant: {task.exception()}")
+
+
+def _start_task(coro) -> asyncio.Task:
+    """Run an agent build in the background, logging it if it fails."""
+    task = asyncio.create_task(coro)
+    task.add_done_callback(_report_refresh)
+    return task
+
+
+def _start_refresh() -> asyncio.Task:
+    """Start a rebuild, or join the one already running."""
+    task = app_state["refresh_task"]
+    if task is None or task.done():
+        print("Refreshing Calendar Assistant...")
+        task = _start_task(_rebuild_agent())
+        app_state["refresh_task"] = task
+    return task
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics: per-stage latency histograms, token counts and pool gauges."""
+    worker_stats = app_state["worker_pool"].get_stats()
+    telemetry.WORKER_QUEUE_DEPTH.set(worker_stats["queue_depth"])
+    telemetry.WORKER_RUNNING.set(worker_stats["running"])
+    checkpointer = app_state["checkpointer"]
+    if checkpointer is not None and hasattr(checkpointer, "hot_hits"):
+        # Counters only; get_stats would also count rows in the database
+        lookups = checkpointer.hot_hits + checkpointer.hot_misses
+        telemetry.CHECKPOINT_HOT_HIT_RATIO.set(checkpointer.hot_hits / lookups if lookups else 0.0)
+    calendar_agent = app_state.get("calendar_agent")
     if calendar_agent:
-        status = calendar_agent.get_status()
-        return StatusResponse(**status)
-    else:
-        # Return default status when not initialized
-        from datetime import datetime
-        return StatusResponse(
-            ready=False,
-            authenticated=False,
-            current_date=datetime.now().strftime("%A, %B %d, %Y"),
-            current_time=datetime.now().strftime("%I:%M %p"),
-            llm_initialized=False,
-            graph_built=False
-        )
+        telemetry.TURNS_IN_FLIGHT.set(calendar_agent.in_flight)
+        telemetry.TENANTS_POOLED.set(calendar_agent.tenants.get_stats()["size"])
+        telemetry.CACHE_HIT_RATIO.set(calendar_agent.calendar_service.get_cache_stats()["hit_ratio"])
+    return PlainTextResponse(
+        telemetry.REGISTRY.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
 
 
 @app.post("/refresh")
-async def refresh_agent():
-    """Refresh the calendar agent (useful after authentication issues)."""
+async def refresh_agent(
+    scope: str = "agent",
+    wait: bool = True,
+    x_user_id: Optional[str] = Header(None),
+    x_user_token: Optional[str] = Header(None)
+):
+    """
+    Refresh the calendar agent (useful after authentication issues).
+    
+    ``scope=agent`` builds a new agent in the background and swaps it in once
+    it is ready; requests keep being served by the old agent meanwhile, and
+    turns already running on it are allowed to finish. Pass ``wait=false`` to
+    return before the new agent is ready. ``scope=tools`` only rebuilds the
+    calling user's calendar tools, e.g. after a token change.
+    """
+    if scope == "tools":
+        calendar_agent = app_state.get("calendar_agent")
+        if not calendar_agent:
+            raise HTTPException(status_code=409, detail="Calendar Assistant not initialized")
+        user_id = await _resolve_user(calendar_agent, x_user_id, x_user_token)
+        try:
+            await asyncio.to_thread(calendar_agent.refresh_tools, user_id)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error refreshing calendar tools: {str(e)}"
+            )
+        await app_state["readiness"].refresh()
+        return {
+            "message": "Calendar tools refreshed successfully",
+            "status": app_state["readiness"].snapshot
+        }
+    
+    if scope != "agent":
+        raise HTTPException(status_code=400, detail="scope must be 'agent' or 'tools'")
+    
+    task = _start_refresh()
+    if not wait:
+        return JSONResponse(status_code=202, content={"message": "Calendar Assistant refresh started"})
+    
     try:
-        print("Refreshing Calendar Assistant...")
-        calendar_agent = CalendarAgent()
-        app_state["calendar_agent"] = calendar_agent
-        
-        status = calendar_agent.get_status()
+        # A disconnecting client does not cancel the rebuild
+        await asyncio.shield(task)
+        status = app_state["readiness"].snapshot
         return {
             "message": "Calendar Assistant refreshed successfully",
             "status": status
@@ -172,8 +964,10 @@ async def refresh_agent():
 
 
 if __name__ == "__main__":
+    # Worker processes import the app themselves, so it is passed by name
     uvicorn.run(
-        app, 
+        "main:app" if API_WORKERS > 1 else app, 
         host=API_HOST, 
         port=API_PORT,
+        workers=API_WORKERS,
     )
\ No newline at end of file
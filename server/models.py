@@ -1,11 +1,15 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 
 
 class ChatMessage(BaseModel):
     """Model for incoming chat messages."""
     message: str = Field(..., description="The user's message")
     thread_id: str = Field(default="1", description="Conversation thread ID")
+    idempotency_key: Optional[str] = Field(
+        None, max_length=128,
+        description="Client-chosen key; resending it returns the first request's reply instead of running the turn again"
+    )
 
 
 class ChatResponse(BaseModel):
@@ -14,10 +18,42 @@ class ChatResponse(BaseModel):
     thread_id: str = Field(..., description="Conversation thread ID")
 
 
+class BatchChatItem(BaseModel):
+    """Model for one message of a batch."""
+    message: str = Field(..., description="The user's message")
+    thread_id: str = Field(default="1", description="Conversation thread ID")
+    idempotency_key: Optional[str] = Field(
+        None, max_length=128, description="Client-chosen key, as for /chat"
+    )
+
+
+class BatchChatRequest(BaseModel):
+    """Model for a batch of chat messages."""
+    items: List[BatchChatItem] = Field(..., min_length=1, description="Messages, in the order each thread should see them")
+    concurrency: Optional[int] = Field(None, ge=1, description="Messages running at once (capped by the server)")
+    stop_thread_on_error: bool = Field(True, description="Skip a thread's later messages once one fails")
+
+
+class ThreadMessage(BaseModel):
+    """Model for one message of a conversation transcript."""
+    role: str = Field(..., description="Who wrote it: user or assistant")
+    content: str = Field(..., description="Message text")
+    cursor: int = Field(..., description="Position in the thread; pass as before to page back from here")
+    id: Optional[str] = Field(None, description="Message ID")
+
+
+class ThreadMessagesResponse(BaseModel):
+    """Model for a page of a conversation transcript."""
+    thread_id: str = Field(..., description="Conversation thread ID")
+    messages: List[ThreadMessage] = Field(..., description="Messages in the page, oldest first")
+    next_before: Optional[int] = Field(None, description="Cursor for the next older page, if any")
+
+
 class HealthResponse(BaseModel):
     """Model for health check responses."""
     status: str = Field(..., description="Health status")
     initialized: bool = Field(..., description="Whether the system is initialized")
+    checked_at: Optional[str] = Field(None, description="When the readiness snapshot was taken")
 
 
 class StatusResponse(BaseModel):
@@ -28,6 +64,12 @@ class StatusResponse(BaseModel):
     current_time: str = Field(..., description="Current time")
     llm_initialized: bool = Field(..., description="Whether LLM is initialized")
     graph_built: bool = Field(..., description="Whether the graph is built")
+    token_expiry: Optional[str] = Field(None, description="When the OAuth access token expires")
+    last_token_refresh_at: Optional[str] = Field(None, description="When the token was last refreshed")
+    llm_reachable: bool = Field(False, description="Whether the last LLM call succeeded")
+    last_llm_success_at: Optional[str] = Field(None, description="When the LLM last answered")
+    last_llm_error: Optional[str] = Field(None, description="Error from the last failed LLM call")
+    checked_at: Optional[str] = Field(None, description="When the readiness snapshot was taken")
 
 
 class ErrorResponse(BaseModel):
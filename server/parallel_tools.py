@@ -0,0 +1,259 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, Optional
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import ContextThreadPoolExecutor, get_config_list
+from langgraph.prebuilt import ToolNode
+from langgraph.store.base import BaseStore
+
+from telemetry import GRAPH_NODE_SECONDS, TOOL_CALL_SECONDS, trace
+
+
+READ_ONLY_TOOLS = frozenset({
+    "search_events",
+    "get_calendars_info",
+    "get_current_datetime",
+    "check_calendar_conflicts",
+    "get_calendar_events_batch",
+})
+
+
+# Tools of the user whose call is running, set around each call by ParallelToolNode
+_current_tools: ContextVar[Optional[dict]] = ContextVar("current_tools", default=None)
+
+
+class _ToolsByName(dict):
+    """Template tools keyed by name; lookups return the running user's tool instead."""
+
+    def __getitem__(self, name):
+        tools = _current_tools.get()
+        if tools is not None:
+            return tools[name]
+        return super().__getitem__(name)
+
+
+def serial_key(call: dict) -> Optional[tuple]:
+    """
+    Get the key that orders a tool call relative to the others in its step.
+
+    Read-only calls return None and run independently. Writes to the same
+    event share a key, and so do event creations in the same calendar (so a
+    conflict pre-check cannot race another booking).
+    """
+    if call["name"] in READ_ONLY_TOOLS:
+        return None
+    args = call.get("args") or {}
+    if args.get("event_id"):
+        return ("event", args["event_id"])
+    return ("calendar", args.get("calendar_id") or "primary")
+
+
+def _lanes(tool_calls: list) -> list:
+    """Group call indices into lanes that run in parallel; each lane runs in order."""
+    lanes = OrderedDict()
+    for i, call in enumerate(tool_calls):
+        key = serial_key(call)
+        lanes.setdefault(key if key is not None else ("call", i), []).append(i)
+    return list(lanes.values())
+
+
+class ParallelToolNode(ToolNode):
+    """
+    ToolNode that runs independent tool calls from one LLM step concurrently.
+
+    Calls are grouped into lanes by ``serial_key``; lanes run in parallel,
+    up to ``max_concurrency`` calls at once within each step, while calls
+    inside a lane keep the order the LLM emitted them. Every call gets a
+    timeout; when a write times out, the calls queued behind it in its lane
+    are skipped rather than run alongside it. Results are returned in the
+    original call order.
+
+    With ``resolve_tools`` the node's tools are templates: each call runs on
+    the tool of the same name returned for the run's config, which is how one
+    compiled graph serves many users.
+    """
+
+    def __init__(self, tools: list, max_concurrency: int, timeout_seconds: float,
+                 resolve_tools=None, **kwargs):
+        """
+        Args:
+            tools: Tools the node can call
+            max_concurrency: Tool calls from one step running at once. Async
+                steps (the server's path) each get their own limit; blocking
+                steps share a thread pool of this size
+            timeout_seconds: Per-call timeout
+            resolve_tools: Optional callable mapping a run's config to its tools by name
+        """
+        super().__init__(tools, **kwargs)
+        self.tools_by_name = _ToolsByName(self.tools_by_name)
+        self.resolve_tools = resolve_tools
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout_seconds = timeout_seconds
+        self._executor = ContextThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="calendar-tool"
+        )
+        self._stats_lock = threading.Lock()
+        self.steps = 0
+        self.calls = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.max_parallel = 0
+
+    def _timeout_message(self, call: dict) -> ToolMessage:
+        return ToolMessage(
+            content=(
+                f"Error: {call['name']} timed out after {self.timeout_seconds:g}s. "
+                "The calendar may or may not have been changed; check before retrying."
+            ),
+            name=call["name"],
+            tool_call_id=call["id"],
+            status="error",
+        )
+
+    def _skipped_message(self, call: dict) -> ToolMessage:
+        return ToolMessage(
+            content=(
+                f"Error: {call['name']} was not run because an earlier call on the "
+                "same event timed out."
+            ),
+            name=call["name"],
+            tool_call_id=call["id"],
+            status="error",
+        )
+
+    def _run_one(self, call, input_type, config):
+        with trace(TOOL_CALL_SECONDS, f"tool.{call['name']}", tool=call["name"]):
+            if self.resolve_tools is None:
+                return super()._run_one(call, input_type, config)
+            token = _current_tools.set(self.resolve_tools(config))
+            try:
+                return super()._run_one(call, input_type, config)
+            finally:
+                _current_tools.reset(token)
+
+    async def _arun_one(self, call, input_type, config):
+        with trace(TOOL_CALL_SECONDS, f"tool.{call['name']}", tool=call["name"]):
+            if self.resolve_tools is None:
+                return await super()._arun_one(call, input_type, config)
+            token = _current_tools.set(self.resolve_tools(config))
+            try:
+                return await super()._arun_one(call, input_type, config)
+            finally:
+                _current_tools.reset(token)
+
+    def _record_step(self, tool_calls: list, lanes: list, timeouts: int, skipped: int):
+        with self._stats_lock:
+            self.steps += 1
+            self.calls += len(tool_calls)
+            self.timeouts += timeouts
+            self.skipped += skipped
+            self.max_parallel = max(self.max_parallel, min(len(lanes), self.max_concurrency))
+
+    def _func(self, input: Any, config: RunnableConfig, *, store: Optional[BaseStore]) -> Any:
+        with trace(GRAPH_NODE_SECONDS, "graph.tools", node="tools"):
+            return self._run_step(input, config, store)
+
+    def _run_step(self, input: Any, config: RunnableConfig, store: Optional[BaseStore]) -> Any:
+        tool_calls, input_type = self._parse_input(input, store)
+        config_list = get_config_list(config, len(tool_calls))
+        lanes = [list(lane) for lane in _lanes(tool_calls)]
+        outputs = [None] * len(tool_calls)
+        running = {}
+        timeouts = skipped = 0
+
+        def submit(lane):
+            i = lane.pop(0)
+            future = self._executor.submit(self._run_one, tool_calls[i], input_type, config_list[i])
+            running[future] = (i, lane, time.monotonic() + self.timeout_seconds)
+
+        for lane in lanes:
+            submit(lane)
+        try:
+            while running:
+                next_deadline = min(deadline for _, _, deadline in running.values())
+                done, _ = wait(
+                    running, timeout=max(0.0, next_deadline - time.monotonic()),
+                    return_when=FIRST_COMPLETED
+                )
+                now = time.monotonic()
+                for future in list(running):
+                    i, lane, deadline = running[future]
+                    if future in done:
+                        del running[future]
+                        outputs[i] = future.result()
+                        if lane:
+                            submit(lane)
+                    elif deadline <= now:
+                        # The thread cannot be interrupted; stop waiting for it
+                        del running[future]
+                        future.cancel()
+                        outputs[i] = self._timeout_message(tool_calls[i])
+                        timeouts += 1
+                        for j in lane:
+                            outputs[j] = self._skipped_message(tool_calls[j])
+                            skipped += 1
+                        lane.clear()
+        finally:
+            for future in running:
+                future.cancel()
+
+        self._record_step(tool_calls, lanes, timeouts, skipped)
+        return self._combine_tool_outputs(outputs, input_type)
+
+    async def _afunc(self, input: Any, config: RunnableConfig, *, store: Optional[BaseStore]) -> Any:
+        with trace(GRAPH_NODE_SECONDS, "graph.tools", node="tools"):
+            return await self._arun_step(input, config, store)
+
+    async def _arun_step(self, input: Any, config: RunnableConfig, store: Optional[BaseStore]) -> Any:
+        tool_calls, input_type = self._parse_input(input, store)
+        lanes = _lanes(tool_calls)
+        outputs = [None] * len(tool_calls)
+        counts = {"timeouts": 0, "skipped": 0}
+        # Per step: concurrent turns must not queue behind each other's tool calls
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_lane(lane):
+            for position, i in enumerate(lane):
+                async with semaphore:
+                    try:
+                        outputs[i] = await asyncio.wait_for(
+                            self._arun_one(tool_calls[i], input_type, config),
+                            self.timeout_seconds
+                        )
+                        continue
+                    except asyncio.TimeoutError:
+                        outputs[i] = self._timeout_message(tool_calls[i])
+                        counts["timeouts"] += 1
+                for j in lane[position + 1:]:
+                    outputs[j] = self._skipped_message(tool_calls[j])
+                    counts["skipped"] += 1
+                return
+
+        # Cancelling the turn cancels every lane and any call not yet started
+        await asyncio.gather(*(run_lane(lane) for lane in lanes))
+
+        self._record_step(tool_calls, lanes, counts["timeouts"], counts["skipped"])
+        return self._combine_tool_outputs(outputs, input_type)
+
+    def get_stats(self) -> dict:
+        """Get tool call counts, timeouts and the widest parallel step."""
+        with self._stats_lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "timeout_seconds": self.timeout_seconds,
+                "steps": self.steps,
+                "calls": self.calls,
+                "timeouts": self.timeouts,
+                "skipped": self.skipped,
+                "max_parallel": self.max_parallel,
+            }
+
+    def shutdown(self):
+        """Stop the tool thread pool without waiting for abandoned calls."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
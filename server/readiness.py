@@ -0,0 +1,116 @@
+import asyncio
+from datetime import datetime, timezone
+
+
+def _isoformat(value):
+    """Format an optional datetime for JSON output."""
+    return value.isoformat() if value else None
+
+
+class ReadinessMonitor:
+    """
+    Keeps a periodically refreshed readiness snapshot of the calendar agent.
+
+    Probes run in a worker thread on a fixed interval, so health endpoints can
+    answer from memory without touching disk, the network or the OAuth flow.
+    """
+
+    def __init__(self, get_agent, get_error, interval: float, is_starting=None):
+        """
+        Args:
+            get_agent: Callable returning the current CalendarAgent or None
+            get_error: Callable returning the initialization error, if any
+            interval: Seconds between probes
+            is_starting: Optional callable telling whether the agent is still being built
+        """
+        self.get_agent = get_agent
+        self.get_error = get_error
+        self.is_starting = is_starting or (lambda: False)
+        self.interval = interval
+        self._task = None
+        self._snapshot = self._probe_uninitialized()
+
+    def _probe_uninitialized(self) -> dict:
+        """Snapshot used before the agent exists or after it failed to build."""
+        return {
+            "initialized": False,
+            "starting": self.is_starting(),
+            "ready": False,
+            "authenticated": False,
+            "token_expiry": None,
+            "last_token_refresh_at": None,
+            "llm_initialized": False,
+            "llm_reachable": False,
+            "last_llm_success_at": None,
+            "last_llm_error": None,
+            "graph_built": False,
+            "error": self.get_error(),
+            "checked_at": _isoformat(datetime.now(timezone.utc)),
+        }
+
+    def _probe(self) -> dict:
+        """Collect the agent's status; may block, so it runs off the event loop."""
+        agent = self.get_agent()
+        if agent is None:
+            return self._probe_uninitialized()
+
+        auth_service = agent.calendar_service.auth_service
+        authenticated = auth_service.check_authenticated()
+        expiry = auth_service.get_token_expiry()
+        llm_initialized = agent.llm is not None
+        graph_built = agent.graph is not None
+
+        return {
+            "initialized": True,
+            "starting": False,
+            "ready": authenticated and llm_initialized and graph_built,
+            "authenticated": authenticated,
+            "token_expiry": _isoformat(expiry.replace(tzinfo=timezone.utc) if expiry else None),
+            "last_token_refresh_at": _isoformat(auth_service.last_refresh_at),
+            "llm_initialized": llm_initialized,
+            "llm_reachable": agent.last_llm_error is None,
+            "last_llm_success_at": _isoformat(agent.last_llm_success_at),
+            "last_llm_error": agent.last_llm_error,
+            "graph_built": graph_built,
+            "error": None,
+            "checked_at": _isoformat(datetime.now(timezone.utc)),
+        }
+
+    async def refresh(self):
+        """Run one probe now and publish the new snapshot."""
+        try:
+            self._snapshot = await asyncio.to_thread(self._probe)
+        except Exception as e:
+            snapshot = dict(self._snapshot)
+            snapshot.update({
+                "ready": False,
+                "error": f"Readiness probe failed: {e}",
+                "checked_at": _isoformat(datetime.now(timezone.utc)),
+            })
+            self._snapshot = snapshot
+
+    async def _run(self):
+        """Probe on a fixed interval until cancelled."""
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.refresh()
+
+    def start(self):
+        """Start periodic probing on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop periodic probing."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def snapshot(self) -> dict:
+        """The latest published snapshot (a plain memory read)."""
+        return self._snapshot
@@ -0,0 +1,240 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+from config import TRACING_ENABLED
+
+
+# Seconds; spans from sub-millisecond cache hits to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """A labelled metric family rendered in the Prometheus text format."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_series(key, value))
+        return lines
+
+    def _render_series(self, key: tuple, value) -> list:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (),
+                 buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            # Per-bucket counts; made cumulative when rendered
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def _render_series(self, key: tuple, value) -> list:
+        counts, total = value
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            bucket_label = f'le="{le}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, bucket_label)} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+        lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """The process's metric families, rendered together for /metrics."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "calendar_http_request_seconds", "API request time until the response starts.",
+    ("method", "route", "status")
+))
+GRAPH_NODE_SECONDS = REGISTRY.register(Histogram(
+    "calendar_graph_node_seconds", "Time spent in each agent graph node.", ("node", "status")
+))
+LLM_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "calendar_llm_request_seconds", "Gemini call time.", ("purpose", "status")
+))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "calendar_llm_tokens_total", "Tokens reported by Gemini.", ("purpose", "type")
+))
+TOOL_CALL_SECONDS = REGISTRY.register(Histogram(
+    "calendar_tool_call_seconds", "Calendar tool call time.", ("tool", "status")
+))
+CALENDAR_API_SECONDS = REGISTRY.register(Histogram(
+    "calendar_api_request_seconds", "Google Calendar API request time.", ("method", "status")
+))
+AUTH_REFRESH_SECONDS = REGISTRY.register(Histogram(
+    "calendar_auth_refresh_seconds", "OAuth token refresh time.", ("status",)
+))
+CHECKPOINT_SECONDS = REGISTRY.register(Histogram(
+    "calendar_checkpoint_seconds", "Conversation checkpoint store operation time.", ("op", "status")
+))
+THREAD_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "calendar_thread_wait_seconds", "Time a turn waited for earlier turns of its conversation."
+))
+
+# Point-in-time values, set from the components' stats when /metrics is scraped
+WORKER_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "calendar_worker_queue_depth", "Agent turns waiting for a worker."
+))
+WORKER_RUNNING = REGISTRY.register(Gauge(
+    "calendar_worker_running", "Agent turns running on the worker pool."
+))
+TURNS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "calendar_turns_in_flight", "Chat turns admitted on the current agent."
+))
+TENANTS_POOLED = REGISTRY.register(Gauge(
+    "calendar_tenants_pooled", "Non-default users with a live calendar service."
+))
+CACHE_HIT_RATIO = REGISTRY.register(Gauge(
+    "calendar_read_cache_hit_ratio", "Default user's calendar read cache hit ratio."
+))
+CHECKPOINT_HOT_HIT_RATIO = REGISTRY.register(Gauge(
+    "calendar_checkpoint_hot_hit_ratio", "Share of checkpoint reads served from memory."
+))
+
+
+def _load_tracer():
+    """OpenTelemetry tracer when tracing is enabled and the API is installed, else None."""
+    if not TRACING_ENABLED:
+        return None
+    try:
+        from opentelemetry import trace as otel_trace
+    except ImportError:
+        print("TRACING_ENABLED is set but opentelemetry-api is not installed; tracing is off")
+        return None
+    return otel_trace.get_tracer("calendar-assistant")
+
+
+_tracer = _load_tracer()
+
+
+class Span:
+    """Handle for the block being traced; attributes go to the OpenTelemetry span."""
+
+    __slots__ = ("otel_span",)
+
+    def __init__(self, otel_span=None):
+        self.otel_span = otel_span
+
+    def set(self, key: str, value):
+        if self.otel_span is not None:
+            self.otel_span.set_attribute(key, value)
+
+
+@contextmanager
+def trace(histogram: Histogram, span_name: str, **labels):
+    """
+    Time a block into a histogram and, when tracing is on, an OpenTelemetry span.
+
+    A ``status`` label of "ok" or "error" is added when the histogram has one.
+    Also usable as a function decorator.
+
+    Args:
+        histogram: Histogram the duration is observed in
+        span_name: OpenTelemetry span name
+        labels: Histogram labels, also set as span attributes
+    """
+    status = "ok"
+    started = time.perf_counter()
+    if _tracer is None:
+        try:
+            yield Span()
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - started, status=status, **labels)
+        return
+
+    with _tracer.start_as_current_span(span_name, attributes=labels) as otel_span:
+        try:
+            yield Span(otel_span)
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - started, status=status, **labels)
+
+
+def record_llm_usage(purpose: str, message, span: Span = None):
+    """Count the prompt and completion tokens Gemini reported for a response."""
+    usage = getattr(message, "usage_metadata", None)
+    if not usage:
+        return
+    LLM_TOKENS.inc(usage.get("input_tokens", 0), purpose=purpose, type="prompt")
+    LLM_TOKENS.inc(usage.get("output_tokens", 0), purpose=purpose, type="completion")
+    if span is not None:
+        span.set("llm.prompt_tokens", usage.get("input_tokens", 0))
+        span.set("llm.completion_tokens", usage.get("output_tokens", 0))
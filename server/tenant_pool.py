@@ -0,0 +1,228 @@
+import hashlib
+import hmac
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from calendar_service import CalendarService
+
+
+DEFAULT_USER_ID = "default"
+
+USER_ID_PATTERN = re.compile(r"^[A-Za-z0-9._@+-]{1,128}$")
+
+
+def validate_user_id(user_id: str) -> str:
+    """Check a caller identity is safe to use in file names and thread keys."""
+    if not USER_ID_PATTERN.match(user_id) or user_id in (".", ".."):
+        raise ValueError("Invalid user ID")
+    return user_id
+
+
+def sign_user_id(user_id: str, secret: str) -> str:
+    """The X-User-Token a caller presents for a user ID: hex HMAC-SHA256 of the ID."""
+    return hmac.new(secret.encode("utf-8"), user_id.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def verify_user_token(user_id: str, token: str, secret: str) -> bool:
+    """Check a caller's X-User-Token against its user ID (never true without a secret)."""
+    if not secret or not token:
+        return False
+    return hmac.compare_digest(sign_user_id(user_id, secret), token)
+
+
+class UnknownTenantError(Exception):
+    """Raised when a user has no token file or no valid credentials."""
+
+
+class TenantPool:
+    """
+    LRU/TTL-bounded pool of per-user CalendarService objects.
+
+    Each user gets their own credentials (``<tokens_dir>/<user_id>.json``),
+    API clients, bound tools, read cache, conflict index and, when enabled,
+    event mirror. The default user keeps using TOKEN_FILE and is never
+    evicted; other users are closed and dropped once the pool is full or
+    they have been idle for ``idle_seconds``. A user is only pooled once
+    their token file is found and their credentials are valid, so unknown
+    IDs never push out real tenants. A service in use by a turn, stream or
+    import (see ``acquire``) is only closed once the last of them releases
+    it, even if it has been evicted meanwhile.
+    """
+
+    def __init__(self, tokens_dir: str, max_tenants: int, idle_seconds: float):
+        """
+        Args:
+            tokens_dir: Directory holding per-user token files
+            max_tenants: Maximum pooled users besides the default user
+            idle_seconds: Idle time after which a user's service is evicted
+        """
+        self.tokens_dir = tokens_dir
+        self.max_tenants = max_tenants
+        self.idle_seconds = idle_seconds
+        self._tenants = OrderedDict()
+        # Service -> number of holders; evicted services still held wait in _retired
+        self._users = {}
+        self._retired = set()
+        self._lock = threading.Lock()
+        self.default = CalendarService()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _create(self, user_id: str) -> CalendarService:
+        """
+        Build a service for a non-default user (never launches the OAuth flow).
+
+        Raises:
+            UnknownTenantError: If the user has no token file or its credentials are not valid
+        """
+        token_file = os.path.join(self.tokens_dir, f"{user_id}.json")
+        if not os.path.exists(token_file):
+            raise UnknownTenantError(f"No Google Calendar credentials for user '{user_id}'.")
+        service = CalendarService(
+            token_file=token_file,
+            interactive=False,
+            mirror_path=os.path.join(self.tokens_dir, f"{user_id}.mirror.db"),
+        )
+        if not service.is_ready():
+            service.close()
+            raise UnknownTenantError(f"No valid Google Calendar credentials for user '{user_id}'.")
+        return service
+
+    def _evict(self, now: float) -> list:
+        """Pop idle and over-capacity tenants; returns the services no one holds, to close."""
+        evicted = []
+        while self._tenants:
+            user_id, entry = next(iter(self._tenants.items()))
+            if len(self._tenants) <= self.max_tenants and now - entry["last_used"] <= self.idle_seconds:
+                break
+            del self._tenants[user_id]
+            self.evictions += 1
+            if entry["service"] in self._users:
+                # Closed by the last holder's release
+                self._retired.add(entry["service"])
+            else:
+                evicted.append(entry["service"])
+        return evicted
+
+    def get(self, user_id: str = DEFAULT_USER_ID) -> CalendarService:
+        """
+        Get a user's calendar service, creating it on first use.
+
+        A new user's service is built and checked outside the pool lock, so
+        other users' lookups do not wait on it.
+
+        Args:
+            user_id: Caller identity
+
+        Returns:
+            The user's CalendarService
+
+        Raises:
+            UnknownTenantError: If a new user has no token file or valid credentials
+        """
+        return self._get(user_id, hold=False)
+
+    def acquire(self, user_id: str = DEFAULT_USER_ID) -> CalendarService:
+        """
+        Get a user's calendar service and keep it open until ``release``.
+
+        Hold one around each turn, stream or import that uses the service,
+        so evicting the user meanwhile does not close it under them.
+
+        Raises:
+            UnknownTenantError: If a new user has no token file or valid credentials
+        """
+        return self._get(user_id, hold=True)
+
+    def release(self, service: CalendarService):
+        """Give back a service from ``acquire``; closes it if it was evicted meanwhile."""
+        if service is self.default:
+            return
+        with self._lock:
+            self._users[service] -= 1
+            if self._users[service]:
+                return
+            del self._users[service]
+            if service not in self._retired:
+                return
+            self._retired.discard(service)
+        service.close()
+
+    def _get(self, user_id: str, hold: bool) -> CalendarService:
+        if user_id == DEFAULT_USER_ID:
+            return self.default
+        validate_user_id(user_id)
+
+        service = self._use(user_id, None, hold)
+        if service is None:
+            created = self._create(user_id)
+            service = self._use(user_id, created, hold)
+            if service is not created:
+                # Another request pooled the user first
+                created.close()
+        return service
+
+    def _use(self, user_id: str, created, hold: bool):
+        """
+        Touch a user's entry, pooling ``created`` if the user has none.
+
+        Returns:
+            The user's pooled service, or None if the user is not pooled and nothing was created
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._tenants.get(user_id)
+            if entry is None:
+                if created is None:
+                    return None
+                entry = self._tenants[user_id] = {"service": created}
+                self.misses += 1
+            else:
+                self._tenants.move_to_end(user_id)
+                if created is None:
+                    self.hits += 1
+            entry["last_used"] = now
+            service = entry["service"]
+            if hold:
+                self._users[service] = self._users.get(service, 0) + 1
+            evicted = self._evict(now)
+        for evicted_service in evicted:
+            evicted_service.close()
+        return service
+
+    def get_stats(self) -> dict:
+        """Get pool size, hit/miss counts and each tenant's read cache counters."""
+        now = time.monotonic()
+        with self._lock:
+            tenants = {
+                user_id: {
+                    "idle_seconds": round(now - entry["last_used"], 1),
+                    "cache": entry["service"].get_cache_stats(),
+                }
+                for user_id, entry in self._tenants.items()
+            }
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._tenants),
+                "max_tenants": self.max_tenants,
+                "idle_seconds": self.idle_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "tenants": tenants,
+            }
+
+    def close(self):
+        """Close every pooled service, the default one included."""
+        with self._lock:
+            services = [entry["service"] for entry in self._tenants.values()] + list(self._retired)
+            self._tenants.clear()
+            self._retired.clear()
+        for service in services:
+            service.close()
+        self.default.close()
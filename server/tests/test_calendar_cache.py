@@ -0,0 +1,101 @@
+from datetime import datetime
+
+from calendar_cache import CalendarReadCache
+from calendar_ids import CalendarIdResolver
+
+
+class _Calendars:
+    def __init__(self, primary_id, fail=False):
+        self.primary_id = primary_id
+        self.fail = fail
+        self.lookups = 0
+
+    def calendars(self):
+        return self
+
+    def get(self, calendarId):
+        assert calendarId == "primary"
+        self.lookups += 1
+        return self
+
+    def execute(self):
+        if self.fail:
+            raise ConnectionError("offline")
+        return {"id": self.primary_id}
+
+
+def _window(start_hour, end_hour):
+    return datetime(2030, 1, 2, start_hour), datetime(2030, 1, 2, end_hour)
+
+
+def test_write_to_primary_invalidates_reads_of_its_real_id():
+    api = _Calendars("alice@example.com")
+    cache = CalendarReadCache(60, 16, CalendarIdResolver(lambda: api).resolve)
+    cache.put("search", ["event"], calendars=("alice@example.com",), window=_window(9, 17))
+    cache.put("other", ["event"], calendars=("team@example.com",), window=_window(9, 17))
+
+    cache.invalidate("primary", _window(10, 11))
+
+    assert cache.get("search") is CalendarReadCache.MISS
+    assert cache.get("other") == ["event"]
+    cache.invalidate("primary")
+    assert api.lookups == 1
+
+
+def test_reads_keyed_by_primary_match_writes_by_real_id():
+    api = _Calendars("alice@example.com")
+    cache = CalendarReadCache(60, 16, CalendarIdResolver(lambda: api).resolve)
+    cache.put("search", ["event"], calendars=("primary",))
+
+    cache.invalidate("alice@example.com")
+
+    assert cache.get("search") is CalendarReadCache.MISS
+
+
+def test_unresolved_primary_invalidates_every_calendar():
+    api = _Calendars("alice@example.com", fail=True)
+    cache = CalendarReadCache(60, 16, CalendarIdResolver(lambda: api).resolve)
+    cache.put("search", ["event"], calendars=("alice@example.com",))
+    cache.put("timezone", "UTC")
+
+    cache.invalidate("primary")
+
+    assert cache.get("search") is CalendarReadCache.MISS
+    assert cache.get("timezone") == "UTC"
+
+
+def test_write_drops_only_reads_overlapping_its_window():
+    cache = CalendarReadCache(60, 16)
+    cache.put("morning", ["standup"], calendars=("alice@example.com",), window=_window(9, 12))
+    cache.put("afternoon", ["review"], calendars=("alice@example.com",), window=_window(13, 17))
+
+    cache.invalidate("alice@example.com", _window(10, 11))
+
+    assert cache.get("morning") is CalendarReadCache.MISS
+    assert cache.get("afternoon") == ["review"]
+
+
+def test_entries_expire_and_the_oldest_are_evicted(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("calendar_cache.time.monotonic", lambda: clock[0])
+    cache = CalendarReadCache(60, 2)
+    cache.put("first", 1)
+    cache.put("second", 2)
+    cache.put("third", 3)
+
+    assert cache.get("first") is CalendarReadCache.MISS
+    assert cache.get("third") == 3
+    clock[0] += 61
+    assert cache.get("third") is CalendarReadCache.MISS
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_cached_values_are_copies():
+    cache = CalendarReadCache(60, 16)
+    events = [{"summary": "Standup"}]
+    cache.put("search", events)
+    events[0]["summary"] = "changed"
+
+    cache.get("search")[0]["summary"] = "changed again"
+
+    assert cache.get("search") == [{"summary": "Standup"}]
@@ -0,0 +1,101 @@
+import asyncio
+from types import SimpleNamespace
+
+from chat_batch import run_batch
+
+
+def _items(*pairs):
+    return [SimpleNamespace(thread_id=thread_id, message=message) for thread_id, message in pairs]
+
+
+async def _collect(items, concurrency, run_item, stop_thread_on_error=True):
+    return [result async for result in run_batch(items, concurrency, run_item, stop_thread_on_error)]
+
+
+def test_items_of_a_thread_run_in_order_while_threads_overlap():
+    items = _items(("a", "a1"), ("b", "b1"), ("a", "a2"), ("b", "b2"), ("a", "a3"))
+    running = {"now": 0, "max": 0}
+    order = []
+
+    async def run_item(item):
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(0.01)
+        order.append(item.message)
+        running["now"] -= 1
+        return item.message.upper()
+
+    results = asyncio.run(_collect(items, 2, run_item))
+
+    assert [message for message in order if message.startswith("a")] == ["a1", "a2", "a3"]
+    assert [message for message in order if message.startswith("b")] == ["b1", "b2"]
+    assert running["max"] == 2
+    assert sorted(result["index"] for result in results) == [0, 1, 2, 3, 4]
+    assert all(result["response"] == items[result["index"]].message.upper() for result in results)
+
+
+def test_concurrency_caps_items_running_across_threads():
+    items = _items(*[(f"t{n}", "hi") for n in range(6)])
+    running = {"now": 0, "max": 0}
+
+    async def run_item(item):
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        return "ok"
+
+    asyncio.run(_collect(items, 3, run_item))
+
+    assert running["max"] == 3
+
+
+def test_failed_item_skips_the_rest_of_its_thread_only():
+    items = _items(("a", "fail"), ("a", "a2"), ("b", "b1"))
+
+    async def run_item(item):
+        if item.message == "fail":
+            raise RuntimeError("calendar unavailable")
+        return "ok"
+
+    results = {result["index"]: result for result in asyncio.run(_collect(items, 2, run_item))}
+
+    assert results[0]["status"] == "error" and results[0]["error"] == "calendar unavailable"
+    assert results[1]["status"] == "skipped"
+    assert results[2]["status"] == "ok"
+
+
+def test_failed_item_can_leave_its_thread_running():
+    items = _items(("a", "fail"), ("a", "a2"))
+
+    async def run_item(item):
+        if item.message == "fail":
+            raise RuntimeError("calendar unavailable")
+        return "ok"
+
+    results = asyncio.run(_collect(items, 1, run_item, stop_thread_on_error=False))
+
+    assert [result["status"] for result in sorted(results, key=lambda r: r["index"])] == ["error", "ok"]
+
+
+def test_closing_the_stream_cancels_unfinished_items():
+    items = _items(("a", "fast"), ("b", "slow"))
+    cancelled = []
+
+    async def run_item(item):
+        if item.message == "slow":
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(item.message)
+                raise
+        return "ok"
+
+    async def scenario():
+        stream = run_batch(items, 2, run_item)
+        first = await stream.__anext__()
+        await stream.aclose()
+        return first
+
+    assert asyncio.run(scenario())["index"] == 0
+    assert cancelled == ["slow"]
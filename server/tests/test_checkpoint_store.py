@@ -0,0 +1,54 @@
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import START, MessagesState, StateGraph
+
+from checkpoint_store import SQLiteCheckpointSaver
+
+
+def _graph(saver):
+    """One-node graph that answers each message with the conversation's length."""
+    builder = StateGraph(MessagesState)
+    builder.add_node("reply", lambda state: {"messages": [AIMessage(content=f"{len(state['messages'])} so far")]})
+    builder.add_edge(START, "reply")
+    return builder.compile(checkpointer=saver)
+
+
+def _say(graph, thread_id, text):
+    config = {"configurable": {"thread_id": thread_id}}
+    return graph.invoke({"messages": [HumanMessage(content=text)]}, config)["messages"][-1].content
+
+
+def test_conversations_survive_reopening_the_store(tmp_path):
+    db_path = str(tmp_path / "checkpoints.db")
+    saver = SQLiteCheckpointSaver(db_path)
+    _say(_graph(saver), "alice", "hello")
+    saver.close()
+
+    saver = SQLiteCheckpointSaver(db_path)
+    assert _say(_graph(saver), "alice", "again") == "3 so far"
+    saver.close()
+
+
+def test_only_the_newest_checkpoints_are_kept(tmp_path):
+    saver = SQLiteCheckpointSaver(str(tmp_path / "checkpoints.db"), keep_last=2)
+    graph = _graph(saver)
+    for n in range(5):
+        _say(graph, "alice", f"message {n}")
+
+    assert len(list(saver.list({"configurable": {"thread_id": "alice"}}))) == 2
+    assert saver.get_stats()["pruned_checkpoints"] > 0
+    # The full conversation is still in the newest checkpoint
+    assert _say(graph, "alice", "last") == "11 so far"
+    saver.close()
+
+
+def test_idle_threads_are_evicted(tmp_path):
+    saver = SQLiteCheckpointSaver(str(tmp_path / "checkpoints.db"), thread_ttl_seconds=3600)
+    graph = _graph(saver)
+    _say(graph, "alice", "hello")
+    _say(graph, "bob", "hello")
+    saver._conn.execute("UPDATE threads SET last_access = 0 WHERE thread_id = 'alice'")
+
+    assert saver.evict_idle_threads() == 1
+    assert saver.get_tuple({"configurable": {"thread_id": "alice"}}) is None
+    assert saver.get_tuple({"configurable": {"thread_id": "bob"}}) is not None
+    saver.close()
@@ -0,0 +1,72 @@
+import threading
+
+import auth_service
+import http_transport
+from bench.fakes import FakeCalendarHttp, PRIMARY_CALENDAR_ID, _FakeCredentials
+from calendar_service import CalendarService
+from event_import import EventImporter, ics_to_event, iter_ics_records
+
+
+def _ics(*events):
+    lines = ["BEGIN:VCALENDAR"]
+    for summary, start, end in events:
+        lines += ["BEGIN:VEVENT", f"SUMMARY:{summary}", f"DTSTART:{start}", f"DTEND:{end}", "END:VEVENT"]
+    return lines + ["END:VCALENDAR"]
+
+
+def _service(tmp_path, monkeypatch):
+    backend = FakeCalendarHttp()
+    monkeypatch.setattr(http_transport.CalendarTransport, "_new_http", lambda self: backend)
+    monkeypatch.setattr(auth_service.GoogleAuthService, "get_access_token",
+                        lambda self, interactive=None: _FakeCredentials())
+    service = CalendarService(
+        token_file=str(tmp_path / "token.json"), interactive=False, mirror_path=str(tmp_path / "mirror.db")
+    )
+    return service, backend
+
+
+def test_overlapping_events_in_one_file_are_skipped(tmp_path, monkeypatch):
+    service, backend = _service(tmp_path, monkeypatch)
+    reports = []
+    records = iter_ics_records(_ics(
+        ("Standup", "20300107T100000Z", "20300107T110000Z"),
+        ("Review", "20300107T103000Z", "20300107T113000Z"),
+        ("Lunch", "20300107T120000Z", "20300107T130000Z"),
+    ))
+
+    result = EventImporter(service).run(records, ics_to_event, reports.append)
+
+    assert result == {"read": 3, "imported": 2, "skipped": 1, "failed": 0}
+    skipped = [report for report in reports if report.get("status") == "skipped"]
+    assert [report["summary"] for report in skipped] == ["Review"]
+    assert skipped[0]["conflicts"][0]["summary"] == "Standup"
+    created = sorted(event["summary"] for event in backend.events[PRIMARY_CALENDAR_ID].values())
+    assert created == ["Lunch", "Standup"]
+    service.close()
+
+
+def test_reimport_skips_events_created_by_an_earlier_import(tmp_path, monkeypatch):
+    service, backend = _service(tmp_path, monkeypatch)
+    lines = _ics(("Standup", "20300107T100000Z", "20300107T110000Z"))
+
+    EventImporter(service).run(iter_ics_records(lines), ics_to_event, lambda report: None)
+    result = EventImporter(service).run(iter_ics_records(lines), ics_to_event, lambda report: None)
+
+    assert result == {"read": 1, "imported": 0, "skipped": 1, "failed": 0}
+    assert len(backend.events[PRIMARY_CALENDAR_ID]) == 1
+    service.close()
+
+
+def test_import_worker_clients_are_closed_after_the_workers_exit(tmp_path, monkeypatch):
+    service, _ = _service(tmp_path, monkeypatch)
+    lines = _ics(*[
+        (f"Meeting {n}", f"203001{n + 1:02d}T100000Z", f"203001{n + 1:02d}T110000Z") for n in range(3)
+    ])
+
+    for _ in range(3):
+        EventImporter(service, on_conflict="import").run(iter_ics_records(lines), ics_to_event, lambda report: None)
+
+    alive = [thread for thread in threading.enumerate() if thread.name.startswith("calendar-import")]
+    assert not alive
+    assert service.transport.get_stats()["clients"] <= 1
+    service.close()
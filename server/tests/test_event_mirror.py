@@ -0,0 +1,163 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from langchain_google_community.calendar.search_events import CalendarSearchEvents
+
+from calendar_cache import CalendarReadCache
+from calendar_tools import CachedSearchEvents
+from event_mirror import EventMirror
+
+
+class _Events:
+    def __init__(self):
+        self.listed = []
+
+    def events(self):
+        return self
+
+    def list(self, **params):
+        self.listed.append(params["calendarId"])
+        self.result = {"items": [], "nextSyncToken": "token"}
+        return self
+
+    def execute(self):
+        return self.result
+
+
+def test_write_to_primary_marks_the_mirrored_calendar_stale(tmp_path):
+    api = _Events()
+    resolve = {"primary": "alice@example.com"}.get
+    mirror = EventMirror(
+        str(tmp_path / "mirror.db"), lambda: api, sync_seconds=3600, past_days=1,
+        resolve_calendar_id=lambda calendar_id: resolve(calendar_id, calendar_id)
+    )
+    mirror.ensure_fresh("alice@example.com")
+    mirror.ensure_fresh("alice@example.com")
+    assert api.listed == ["alice@example.com"]
+
+    mirror.mark_stale("primary")
+    mirror.ensure_fresh("alice@example.com")
+
+    assert api.listed == ["alice@example.com", "alice@example.com"]
+    mirror.close()
+
+
+def test_unresolved_primary_marks_every_calendar_stale(tmp_path):
+    api = _Events()
+    mirror = EventMirror(str(tmp_path / "mirror.db"), lambda: api, sync_seconds=3600, past_days=1)
+    mirror.ensure_fresh("alice@example.com")
+    mirror.ensure_fresh("team@example.com")
+
+    mirror.mark_stale("primary")
+    mirror.ensure_fresh("alice@example.com")
+    mirror.ensure_fresh("team@example.com")
+
+    assert api.listed.count("alice@example.com") == 2
+    assert api.listed.count("team@example.com") == 2
+    mirror.close()
+
+
+class _PagedEvents:
+    """events.list over fixed pages; a page that is an exception is raised."""
+
+    def __init__(self, pages):
+        self.pages = pages
+
+    def events(self):
+        return self
+
+    def list(self, **params):
+        self.result = self.pages[int(params.get("pageToken") or 0)]
+        return self
+
+    def execute(self):
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def _event(event_id: str, day: int) -> dict:
+    start = (datetime.now(timezone.utc) + timedelta(days=day)).replace(microsecond=0)
+    return {
+        "id": event_id,
+        "summary": event_id,
+        "start": {"dateTime": start.isoformat()},
+        "end": {"dateTime": (start + timedelta(hours=1)).isoformat()},
+    }
+
+
+def test_failed_full_sync_keeps_the_previous_copy(tmp_path):
+    api = _PagedEvents([{"items": [_event("standup", 1)], "nextSyncToken": "token"}])
+    mirror = EventMirror(str(tmp_path / "mirror.db"), lambda: api, sync_seconds=3600, past_days=1)
+    mirror.sync("alice@example.com")
+
+    api.pages = [{"items": [], "nextPageToken": "1"}, ConnectionError("network down")]
+    with pytest.raises(ConnectionError):
+        mirror._full_sync("alice@example.com")
+    # Another calendar's sync commits on the same connection
+    api.pages = [{"items": [_event("offsite", 2)], "nextSyncToken": "token"}]
+    mirror.sync("team@example.com")
+
+    window = (datetime.now(timezone.utc), datetime.now(timezone.utc) + timedelta(days=3))
+    assert [event["id"] for event in mirror.query("alice@example.com", *window)] == ["standup"]
+    mirror.close()
+
+
+def test_query_text_matches_event_fields_not_the_raw_json(tmp_path):
+    standup = dict(_event("standup", 1), summary="Standup", status="confirmed")
+    review = dict(_event("review", 1), summary="Review", location="Room 50%", status="confirmed")
+    api = _PagedEvents([{"items": [standup, review], "nextSyncToken": "token"}])
+    mirror = EventMirror(str(tmp_path / "mirror.db"), lambda: api, sync_seconds=3600, past_days=1)
+    window = (datetime.now(timezone.utc), datetime.now(timezone.utc) + timedelta(days=3))
+
+    def search(text):
+        return [event["id"] for event in mirror.query("alice@example.com", *window, query=text)]
+
+    assert search("stand") == ["standup"]
+    assert search("room 50%") == ["review"]
+    assert search("confirmed") == []
+    assert search("%") == ["review"]
+    mirror.close()
+
+
+class _SearchMirror:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.reads = 0
+
+    def covers(self, start):
+        return start >= datetime.now(timezone.utc) - timedelta(days=1)
+
+    def query(self, calendar_id, start, end, query=None, max_results=10):
+        self.reads += 1
+        if self.fail:
+            raise ConnectionError("sync failed")
+        return [_event("mirrored", 1)]
+
+
+def _search(mirror, monkeypatch, days_back: int):
+    monkeypatch.setattr(CalendarSearchEvents, "_run", lambda self, *args, **kwargs: ["from the API"])
+    tool = CachedSearchEvents.model_construct(api_resource=None, cache=CalendarReadCache(0, 16), mirror=mirror)
+    start = datetime.now() - timedelta(days=days_back)
+    return tool._run(
+        '[{"id": "alice@example.com"}]',
+        start.strftime("%Y-%m-%d %H:%M:%S"),
+        (datetime.now() + timedelta(days=2)).strftime("%Y-%m-%d %H:%M:%S"),
+    )
+
+
+def test_search_inside_the_mirrored_window_reads_the_mirror(monkeypatch):
+    result = _search(_SearchMirror(), monkeypatch, days_back=0)
+
+    assert [event["id"] for event in result] == ["mirrored"]
+
+
+def test_search_before_the_mirrored_window_asks_the_api(monkeypatch):
+    mirror = _SearchMirror()
+
+    assert _search(mirror, monkeypatch, days_back=5) == ["from the API"]
+    assert mirror.reads == 0
+
+
+def test_search_falls_back_to_the_api_when_the_mirror_fails(monkeypatch):
+    assert _search(_SearchMirror(fail=True), monkeypatch, days_back=0) == ["from the API"]
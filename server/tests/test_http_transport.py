@@ -0,0 +1,68 @@
+import threading
+
+from bench.fakes import FakeCalendarHttp, _FakeCredentials
+from http_transport import CalendarTransport, load_discovery_document
+
+
+def _transport(tmp_path, monkeypatch):
+    backend = FakeCalendarHttp()
+    monkeypatch.setattr(CalendarTransport, "_new_http", lambda self: backend)
+    document = load_discovery_document("calendar", "v3", str(tmp_path / "discovery.json"))
+    return CalendarTransport(_FakeCredentials(), document, timeout=5), backend
+
+
+def _in_thread(target):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(target()))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def test_each_thread_gets_its_own_reused_client(tmp_path, monkeypatch):
+    transport, _ = _transport(tmp_path, monkeypatch)
+
+    mine = transport.get_resource()
+    assert transport.get_resource() is mine
+    theirs = _in_thread(transport.get_resource)
+
+    assert theirs is not mine
+    assert theirs._http is not mine._http
+    transport.close()
+
+
+def test_shared_resource_calls_go_through_the_calling_threads_client(tmp_path, monkeypatch):
+    transport, backend = _transport(tmp_path, monkeypatch)
+
+    transport.resource.calendarList().list().execute()
+    _in_thread(lambda: transport.resource.calendarList().list().execute())
+
+    assert backend.requests == 2
+    assert transport.get_stats()["clients"] == 1
+    transport.close()
+
+
+def test_new_credentials_reach_every_client(tmp_path, monkeypatch):
+    transport, _ = _transport(tmp_path, monkeypatch)
+    resource = transport.get_resource()
+    built, keep_alive = threading.Event(), threading.Event()
+    worker_resource = []
+
+    def worker():
+        worker_resource.append(transport.get_resource())
+        built.set()
+        keep_alive.wait(5)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    assert built.wait(5)
+
+    credentials = _FakeCredentials()
+    transport.update_credentials(credentials)
+
+    assert transport.get_stats()["clients"] == 2
+    assert resource._http.credentials is credentials
+    assert worker_resource[0]._http.credentials is credentials
+    keep_alive.set()
+    thread.join()
+    transport.close()
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from idempotency import IdempotencyCache, IdempotencyConflictError
+
+
+def test_concurrent_requests_with_one_key_run_once():
+    async def scenario():
+        cache = IdempotencyCache()
+        runs = []
+        release = asyncio.Event()
+
+        async def execute():
+            runs.append(1)
+            await release.wait()
+            return "booked"
+
+        requests = [asyncio.create_task(cache.run("alice:k1", ("1", "book it"), execute)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*requests), runs, cache.get_stats()
+
+    results, runs, stats = asyncio.run(scenario())
+
+    assert results == [("booked", False), ("booked", True), ("booked", True)]
+    assert len(runs) == 1
+    assert (stats["executions"], stats["coalesced"], stats["in_flight"]) == (1, 2, 0)
+
+
+def test_completed_result_is_replayed_and_the_key_cannot_be_reused():
+    async def scenario():
+        cache = IdempotencyCache()
+        runs = []
+
+        async def execute():
+            runs.append(1)
+            return "booked"
+
+        first = await cache.run("alice:k1", ("1", "book it"), execute)
+        retry = await cache.run("alice:k1", ("1", "book it"), execute)
+        with pytest.raises(IdempotencyConflictError):
+            await cache.run("alice:k1", ("1", "cancel it"), execute)
+        return first, retry, runs
+
+    first, retry, runs = asyncio.run(scenario())
+
+    assert first == ("booked", False)
+    assert retry == ("booked", True)
+    assert len(runs) == 1
+
+
+def test_failures_reach_waiters_and_are_not_stored():
+    async def scenario():
+        cache = IdempotencyCache()
+        attempts = []
+        release = asyncio.Event()
+
+        async def execute():
+            attempts.append(1)
+            if len(attempts) == 1:
+                await release.wait()
+                raise RuntimeError("calendar unavailable")
+            return "booked"
+
+        leader = asyncio.create_task(cache.run("alice:k1", ("1", "book it"), execute))
+        waiter = asyncio.create_task(cache.run("alice:k1", ("1", "book it"), execute))
+        await asyncio.sleep(0)
+        release.set()
+        outcomes = await asyncio.gather(leader, waiter, return_exceptions=True)
+        retry = await cache.run("alice:k1", ("1", "book it"), execute)
+        return outcomes, retry
+
+    outcomes, retry = asyncio.run(scenario())
+
+    assert [str(outcome) for outcome in outcomes] == ["calendar unavailable"] * 2
+    assert retry == ("booked", False)
+
+
+def test_execution_outlives_a_cancelled_leader():
+    async def scenario():
+        cache = IdempotencyCache()
+        release = asyncio.Event()
+
+        async def execute():
+            await release.wait()
+            return "booked"
+
+        leader = asyncio.create_task(cache.run("alice:k1", ("1", "book it"), execute))
+        await asyncio.sleep(0)
+        # The leader's client disconnects
+        leader.cancel()
+        retry = asyncio.create_task(cache.run("alice:k1", ("1", "book it"), execute))
+        await asyncio.sleep(0)
+        release.set()
+        return await retry
+
+    assert asyncio.run(scenario()) == ("booked", True)
+
+
+def test_expired_results_are_not_replayed(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("idempotency.time.monotonic", lambda: clock[0])
+
+    async def scenario():
+        cache = IdempotencyCache(ttl_seconds=60)
+
+        async def execute():
+            return "booked"
+
+        await cache.run("alice:k1", ("1", "book it"), execute)
+        clock[0] += 61
+        return await cache.run("alice:k1", ("1", "book it"), execute)
+
+    assert asyncio.run(scenario()) == ("booked", False)
@@ -0,0 +1,149 @@
+import threading
+from datetime import datetime, timedelta
+
+from googleapiclient.discovery import Resource
+
+from calendar_cache import CalendarReadCache
+from calendar_tools import CheckedCreateEvent
+from interval_index import EventIntervalIndex
+
+
+class _Api(Resource):
+    """Calendar API stand-in answering events.list from a fixed list of events."""
+
+    def __init__(self, events):
+        self._items = events
+        self.list_calls = []
+
+    def events(self):
+        return self
+
+    def list(self, **params):
+        self.list_calls.append(params)
+        start = datetime.fromisoformat(params["timeMin"])
+        end = datetime.fromisoformat(params["timeMax"])
+        self._page = {"items": [
+            event for event in self._items
+            if datetime.fromisoformat(event["start"]["dateTime"]) < end
+            and datetime.fromisoformat(event["end"]["dateTime"]) > start
+        ]}
+        return self
+
+    def execute(self):
+        return self._page
+
+
+def _event(event_id, start, hours=1):
+    return {
+        "id": event_id,
+        "summary": event_id,
+        "start": {"dateTime": start.isoformat()},
+        "end": {"dateTime": (start + timedelta(hours=hours)).isoformat()},
+    }
+
+
+def _far_start():
+    # Well beyond a 90-day horizon, on a whole hour in local time
+    return (datetime.now() + timedelta(days=200)).replace(hour=10, minute=0, second=0, microsecond=0).astimezone()
+
+
+def test_live_check_finds_events_beyond_the_horizon():
+    far = _far_start()
+    api = _Api([_event("dentist", far)])
+    index = EventIntervalIndex(lambda: api, horizon_days=90, refresh_seconds=300)
+
+    assert index.find_conflicts("primary", far, far + timedelta(hours=1)) is None
+    conflicts = index.find_conflicts_live("primary", far + timedelta(minutes=30), far + timedelta(hours=2))
+
+    assert [conflict["id"] for conflict in conflicts] == ["dentist"]
+    assert index.find_conflicts_live("primary", far + timedelta(hours=1), far + timedelta(hours=2)) == []
+
+
+def test_live_check_prefers_the_mirror():
+    far = _far_start()
+    api = _Api([])
+
+    class Mirror:
+        def covers(self, start):
+            return True
+
+        def query(self, calendar_id, start, end, max_results=10):
+            return [_event("mirrored", far)]
+
+    index = EventIntervalIndex(lambda: api, horizon_days=90, refresh_seconds=300)
+    conflicts = index.find_conflicts_live("primary", far, far + timedelta(hours=1), mirror=Mirror())
+
+    assert [conflict["id"] for conflict in conflicts] == ["mirrored"]
+    # Only the index build listed events; the far-off check did not
+    assert len(api.list_calls) == 1
+
+
+def test_create_beyond_the_horizon_is_checked_for_conflicts():
+    far = _far_start()
+    api = _Api([_event("dentist", far)])
+    index = EventIntervalIndex(lambda: api, horizon_days=90, refresh_seconds=300)
+    tool = CheckedCreateEvent(api_resource=api, cache=CalendarReadCache(60, 16), index=index)
+
+    local = far.astimezone().replace(tzinfo=None)
+    result = tool._run(
+        summary="Checkup",
+        start_datetime=local.strftime("%Y-%m-%d %H:%M:%S"),
+        end_datetime=(local + timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S"),
+    )
+
+    assert result.startswith("Event not created")
+    assert "dentist" in result
+
+
+class _GatedApi(_Api):
+    """_Api whose events.list for one calendar blocks until released."""
+
+    def __init__(self, events, slow_calendar):
+        super().__init__(events)
+        self.slow_calendar = slow_calendar
+        self.fetching = threading.Event()
+        self.release = threading.Event()
+
+    def list(self, **params):
+        if params["calendarId"] == self.slow_calendar:
+            self.fetching.set()
+            self.release.wait(5)
+        return super().list(**params)
+
+
+def test_slow_build_does_not_block_other_calendars_and_is_shared():
+    soon = (datetime.now() + timedelta(days=2)).replace(hour=10, minute=0, second=0, microsecond=0).astimezone()
+    api = _GatedApi([_event("standup", soon)], slow_calendar="slow@example.com")
+    index = EventIntervalIndex(lambda: api, horizon_days=90, refresh_seconds=300)
+    index.find_conflicts("fast@example.com", soon, soon + timedelta(hours=1))
+
+    results = []
+    checks = [
+        threading.Thread(target=lambda: results.append(
+            index.find_conflicts("slow@example.com", soon, soon + timedelta(hours=1))
+        ))
+        for _ in range(2)
+    ]
+    for check in checks:
+        check.start()
+    assert api.fetching.wait(5)
+
+    # Answered while the other calendar's fetch is still blocked
+    fast = []
+    check = threading.Thread(target=lambda: fast.extend(
+        index.find_conflicts("fast@example.com", soon, soon + timedelta(hours=1))
+    ))
+    check.start()
+    check.join(1)
+    assert [c["id"] for c in fast] == ["standup"]
+    # Booked while the fetch runs: kept once the build lands
+    index.add_event("slow@example.com", soon + timedelta(hours=3), soon + timedelta(hours=4), "review", "review")
+
+    api.release.set()
+    for check in checks:
+        check.join(5)
+
+    assert [[c["id"] for c in result] for result in results] == [["standup"], ["standup"]]
+    assert [call["calendarId"] for call in api.list_calls].count("slow@example.com") == 1
+    later = index.find_conflicts("slow@example.com", soon + timedelta(hours=3), soon + timedelta(hours=4))
+    assert [c["id"] for c in later] == ["review"]
@@ -0,0 +1,68 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import START, MessagesState, StateGraph
+
+from checkpoint_store import SQLiteCheckpointSaver
+from file_lock import FileLock
+from thread_locks import ThreadLocks
+
+
+def _graph(saver):
+    builder = StateGraph(MessagesState)
+    builder.add_node("reply", lambda state: {"messages": [AIMessage(content=f"{len(state['messages'])} so far")]})
+    builder.add_edge(START, "reply")
+    return builder.compile(checkpointer=saver)
+
+
+def _say(graph, text):
+    config = {"configurable": {"thread_id": "alice"}}
+    return graph.invoke({"messages": [HumanMessage(content=text)]}, config)["messages"][-1].content
+
+
+def test_shared_store_does_not_serve_a_checkpoint_another_process_moved_on(tmp_path):
+    db_path = str(tmp_path / "checkpoints.db")
+    first = SQLiteCheckpointSaver(db_path, shared=True)
+    second = SQLiteCheckpointSaver(db_path, shared=True)
+    _say(_graph(first), "hello")
+    _say(_graph(second), "from the other process")
+
+    assert _say(_graph(first), "back again") == "5 so far"
+    assert first.get_stats()["hot_stale"] == 1
+    first.close()
+    second.close()
+
+
+def test_file_lock_excludes_other_holders(tmp_path):
+    path = str(tmp_path / "locks" / "thread.lock")
+    holder, other = FileLock(path), FileLock(path)
+
+    assert holder.try_acquire()
+    assert not other.try_acquire()
+    holder.release()
+    assert other.try_acquire()
+    other.release()
+
+
+def test_thread_locks_sharing_a_lock_dir_serialize_a_conversation(tmp_path):
+    async def scenario():
+        # Two processes' lock tables over the same lock directory
+        first = ThreadLocks(lock_dir=str(tmp_path))
+        second = ThreadLocks(lock_dir=str(tmp_path))
+        order = []
+
+        async def turn(locks, name):
+            async with locks.hold("alice:1"):
+                order.append(f"{name} start")
+                await asyncio.sleep(0.05)
+                order.append(f"{name} end")
+
+        await asyncio.gather(turn(first, "first"), turn(second, "second"))
+        return order
+
+    order = asyncio.run(scenario())
+
+    assert order in (
+        ["first start", "first end", "second start", "second end"],
+        ["second start", "second end", "first start", "first end"],
+    )
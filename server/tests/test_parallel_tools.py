@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+from langchain_core.messages import AIMessage
+from langchain_core.tools import StructuredTool
+
+from parallel_tools import ParallelToolNode
+
+
+def _tools(log: list, delays: dict):
+    """A read-only search and an event update that log when they start and end."""
+
+    async def search_events(query: str) -> str:
+        log.append(f"search {query} start")
+        await asyncio.sleep(delays.get(query, 0.02))
+        log.append(f"search {query} end")
+        return f"found {query}"
+
+    async def update_calendar_event(event_id: str, summary: str) -> str:
+        log.append(f"update {summary} start")
+        await asyncio.sleep(delays.get(summary, 0.02))
+        log.append(f"update {summary} end")
+        return f"updated {summary}"
+
+    def update_sync(event_id: str, summary: str) -> str:
+        log.append(f"update {summary} start")
+        time.sleep(delays.get(summary, 0.02))
+        log.append(f"update {summary} end")
+        return f"updated {summary}"
+
+    def search_sync(query: str) -> str:
+        time.sleep(delays.get(query, 0.02))
+        return f"found {query}"
+
+    return [
+        StructuredTool.from_function(func=search_sync, coroutine=search_events, name="search_events",
+                                     description="Search events."),
+        StructuredTool.from_function(func=update_sync, coroutine=update_calendar_event,
+                                     name="update_calendar_event", description="Update an event."),
+    ]
+
+
+def _step(*calls):
+    tool_calls = [
+        {"name": name, "args": args, "id": f"call-{n}", "type": "tool_call"}
+        for n, (name, args) in enumerate(calls)
+    ]
+    return {"messages": [AIMessage(content="", tool_calls=tool_calls)]}
+
+
+def test_writes_to_one_event_run_in_order_while_reads_run_alongside():
+    log = []
+    node = ParallelToolNode(_tools(log, {}), max_concurrency=4, timeout_seconds=5)
+
+    result = asyncio.run(node.ainvoke(_step(
+        ("update_calendar_event", {"event_id": "e1", "summary": "first"}),
+        ("search_events", {"query": "lunch"}),
+        ("update_calendar_event", {"event_id": "e1", "summary": "second"}),
+    )))
+
+    assert log.index("update first end") < log.index("update second start")
+    assert log.index("search lunch start") < log.index("update first end")
+    assert [message.content for message in result["messages"]] == ["updated first", "found lunch", "updated second"]
+    node.shutdown()
+
+
+def test_timed_out_write_skips_the_rest_of_its_lane():
+    log = []
+    node = ParallelToolNode(_tools(log, {"stuck": 1.0}), max_concurrency=4, timeout_seconds=0.1)
+
+    result = asyncio.run(node.ainvoke(_step(
+        ("update_calendar_event", {"event_id": "e1", "summary": "stuck"}),
+        ("update_calendar_event", {"event_id": "e1", "summary": "after"}),
+        ("update_calendar_event", {"event_id": "e2", "summary": "other"}),
+    )))
+
+    contents = [message.content for message in result["messages"]]
+    assert "timed out" in contents[0]
+    assert "was not run" in contents[1]
+    assert contents[2] == "updated other"
+    assert "update after start" not in log
+    stats = node.get_stats()
+    assert (stats["timeouts"], stats["skipped"]) == (1, 1)
+    node.shutdown()
+
+
+def test_blocking_step_keeps_lanes_ordered_and_enforces_the_deadline():
+    log = []
+    node = ParallelToolNode(_tools(log, {"stuck": 1.0}), max_concurrency=4, timeout_seconds=0.2)
+
+    started = time.monotonic()
+    result = node.invoke(_step(
+        ("update_calendar_event", {"event_id": "e1", "summary": "first"}),
+        ("update_calendar_event", {"event_id": "e1", "summary": "second"}),
+        ("update_calendar_event", {"event_id": "e2", "summary": "stuck"}),
+        ("search_events", {"query": "lunch"}),
+    ))
+
+    assert time.monotonic() - started < 0.9
+    contents = [message.content for message in result["messages"]]
+    assert contents[:2] == ["updated first", "updated second"]
+    assert "timed out" in contents[2]
+    assert contents[3] == "found lunch"
+    assert log.index("update first end") < log.index("update second start")
+    node.shutdown()
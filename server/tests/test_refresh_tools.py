@@ -0,0 +1,49 @@
+import json
+
+from fastapi.testclient import TestClient
+
+import main
+from calendar_service import CalendarService
+
+
+def _write_token(path, token):
+    path.write_text(json.dumps({
+        "token": token,
+        "refresh_token": "refresh",
+        "client_id": "client",
+        "client_secret": "secret",
+        "expiry": "2099-01-01T00:00:00Z",
+    }))
+
+
+class _Agent:
+    def __init__(self, service):
+        self.service = service
+
+    def refresh_tools(self, user_id):
+        self.service.refresh_tools()
+
+
+class _Readiness:
+    snapshot = {"ready": True}
+
+    async def refresh(self):
+        pass
+
+
+def test_refresh_tools_picks_up_a_replaced_token_file(tmp_path, monkeypatch):
+    token_file = tmp_path / "token.json"
+    _write_token(token_file, "old-token")
+    service = CalendarService(token_file=str(token_file), interactive=False)
+    service.get_calendar_tools()
+    assert service.transport.credentials.token == "old-token"
+
+    _write_token(token_file, "new-token")
+    monkeypatch.setattr(main, "app_state", {"calendar_agent": _Agent(service), "readiness": _Readiness()})
+    response = TestClient(main.app).post("/refresh", params={"scope": "tools"})
+
+    assert response.status_code == 200
+    assert service.auth_service.get_access_token().token == "new-token"
+    assert service.transport.credentials.token == "new-token"
+    assert service.transport.get_resource()._http.credentials.token == "new-token"
+    service.close()
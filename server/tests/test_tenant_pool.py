@@ -0,0 +1,133 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import tenant_pool
+from tenant_pool import TenantPool, UnknownTenantError, sign_user_id, verify_user_token
+
+
+class _Service:
+    def __init__(self, token_file=None, interactive=True, mirror_path=None):
+        self.token_file = token_file
+        self.closed = False
+
+    def is_ready(self):
+        return self.token_file is None or "expired" not in self.token_file
+
+    def get_cache_stats(self):
+        return {}
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(tenant_pool, "CalendarService", _Service)
+    for user_id in ("alice", "bob", "carol", "expired"):
+        (tmp_path / f"{user_id}.json").write_text("{}")
+    return TenantPool(str(tmp_path), max_tenants=2, idle_seconds=3600)
+
+
+def test_users_without_a_token_file_are_not_pooled(pool):
+    pool.get("alice")
+    pool.get("bob")
+
+    with pytest.raises(UnknownTenantError):
+        pool.get("mallory")
+
+    stats = pool.get_stats()
+    assert sorted(stats["tenants"]) == ["alice", "bob"]
+    assert stats["evictions"] == 0
+
+
+def test_users_with_invalid_credentials_are_not_pooled(pool):
+    with pytest.raises(UnknownTenantError):
+        pool.get("expired")
+
+    assert pool.get_stats()["size"] == 0
+
+
+def test_least_recently_used_tenant_is_evicted_and_closed(pool):
+    alice = pool.get("alice")
+    bob = pool.get("bob")
+    pool.get("alice")
+    pool.get("carol")
+
+    assert bob.closed and not alice.closed
+    assert sorted(pool.get_stats()["tenants"]) == ["alice", "carol"]
+
+
+def test_evicted_service_stays_open_until_its_holders_release_it(pool):
+    alice = pool.acquire("alice")
+    pool.acquire("alice")
+    pool.get("bob")
+    pool.get("carol")
+
+    assert "alice" not in pool.get_stats()["tenants"]
+    assert not alice.closed
+
+    pool.release(alice)
+    assert not alice.closed
+    pool.release(alice)
+    assert alice.closed
+
+
+def test_released_service_that_is_still_pooled_stays_open(pool):
+    alice = pool.acquire("alice")
+    pool.release(alice)
+
+    assert not alice.closed
+    assert pool.get("alice") is alice
+
+
+def test_user_tokens_are_bound_to_the_user_id():
+    token = sign_user_id("alice", "secret")
+
+    assert verify_user_token("alice", token, "secret")
+    assert not verify_user_token("bob", token, "secret")
+    assert not verify_user_token("alice", token, "other-secret")
+    assert not verify_user_token("alice", token, "")
+    assert not verify_user_token("alice", None, "secret")
+
+
+class _Agent:
+    def __init__(self, tenants):
+        self.tenants = tenants
+
+    async def aget_messages(self, thread_id, user_id, before, limit):
+        return {"messages": [], "next_before": None}
+
+
+def _client(pool, monkeypatch, secret):
+    monkeypatch.setattr(main, "TENANT_AUTH_SECRET", secret)
+    monkeypatch.setattr(main, "app_state", {"calendar_agent": _Agent(pool)})
+    return TestClient(main.app)
+
+
+def test_user_header_is_rejected_when_multi_tenancy_is_disabled(pool, monkeypatch):
+    client = _client(pool, monkeypatch, "")
+
+    response = client.get("/threads/1/messages", headers={"X-User-ID": "alice"})
+
+    assert response.status_code == 400
+    assert pool.get_stats()["size"] == 0
+
+
+def test_user_header_needs_a_matching_token(pool, monkeypatch):
+    client = _client(pool, monkeypatch, "secret")
+
+    forged = client.get("/threads/1/messages", headers={
+        "X-User-ID": "alice", "X-User-Token": sign_user_id("bob", "secret")
+    })
+    signed = client.get("/threads/1/messages", headers={
+        "X-User-ID": "alice", "X-User-Token": sign_user_id("alice", "secret")
+    })
+    unknown = client.get("/threads/1/messages", headers={
+        "X-User-ID": "mallory", "X-User-Token": sign_user_id("mallory", "secret")
+    })
+
+    assert forged.status_code == 401
+    assert signed.status_code == 200
+    assert unknown.status_code == 401
+    assert sorted(pool.get_stats()["tenants"]) == ["alice"]
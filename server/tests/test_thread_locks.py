@@ -0,0 +1,72 @@
+import asyncio
+
+from thread_locks import ThreadLocks
+
+
+def test_turns_of_one_thread_run_in_arrival_order():
+    async def scenario():
+        locks = ThreadLocks()
+        order = []
+
+        async def turn(name, delay):
+            async with locks.hold("alice:1"):
+                order.append(f"{name} start")
+                await asyncio.sleep(delay)
+                order.append(f"{name} end")
+
+        await asyncio.gather(turn("first", 0.02), turn("second", 0), turn("third", 0))
+        return order, locks.get_stats()
+
+    order, stats = asyncio.run(scenario())
+
+    assert order == ["first start", "first end", "second start", "second end", "third start", "third end"]
+    assert (stats["acquired"], stats["contended"], stats["max_queued"]) == (3, 2, 2)
+    assert stats["active_threads"] == 0
+
+
+def test_other_threads_do_not_wait():
+    async def scenario():
+        locks = ThreadLocks()
+        release = asyncio.Event()
+
+        async def busy():
+            async with locks.hold("alice:1"):
+                await release.wait()
+
+        task = asyncio.create_task(busy())
+        await asyncio.sleep(0)
+        async with locks.hold("alice:2") as waited:
+            pass
+        release.set()
+        await task
+        return waited
+
+    assert asyncio.run(scenario()) < 0.01
+
+
+def test_cancelled_waiter_does_not_block_later_turns():
+    async def scenario():
+        locks = ThreadLocks()
+        release = asyncio.Event()
+        ran = []
+
+        async def turn(name, wait_for_release=False):
+            async with locks.hold("alice:1"):
+                ran.append(name)
+                if wait_for_release:
+                    await release.wait()
+
+        first = asyncio.create_task(turn("first", wait_for_release=True))
+        await asyncio.sleep(0)
+        cancelled = asyncio.create_task(turn("cancelled"))
+        last = asyncio.create_task(turn("last"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        release.set()
+        await asyncio.gather(first, cancelled, last, return_exceptions=True)
+        return ran, locks.get_stats()["active_threads"]
+
+    ran, active = asyncio.run(scenario())
+
+    assert ran == ["first", "last"]
+    assert active == 0
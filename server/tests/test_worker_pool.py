@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from thread_locks import ThreadLocks
+from worker_pool import AgentWorkerPool, QueueFullError
+
+
+def test_turns_waiting_on_a_busy_thread_count_against_the_queue():
+    async def scenario():
+        pool = AgentWorkerPool(max_queue=1, max_async_concurrency=4)
+        locks = ThreadLocks()
+        release = asyncio.Event()
+
+        async def turn():
+            async with pool.slot(wait_for=locks.hold("alice:1")):
+                await release.wait()
+
+        running = asyncio.create_task(turn())
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(turn())
+        await asyncio.sleep(0)
+        assert pool.get_stats()["queue_depth"] == 1
+
+        with pytest.raises(QueueFullError):
+            await turn()
+
+        release.set()
+        await asyncio.gather(running, queued)
+        stats = pool.get_stats()
+        assert (stats["queue_depth"], stats["completed"], stats["rejected"]) == (0, 2, 1)
+
+    asyncio.run(scenario())
+
+
+def test_slot_yields_the_wait_for_value_and_frees_the_queue_on_cancel():
+    async def scenario():
+        pool = AgentWorkerPool(max_queue=2, max_async_concurrency=1)
+        locks = ThreadLocks()
+        release = asyncio.Event()
+
+        async def turn(thread_id):
+            async with pool.slot(wait_for=locks.hold(thread_id)) as waited:
+                await release.wait()
+                return waited
+
+        running = asyncio.create_task(turn("alice:1"))
+        await asyncio.sleep(0)
+        # Another thread's lock is free, but every running slot is taken
+        waiting = asyncio.create_task(turn("bob:1"))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+        assert pool.get_stats()["queue_depth"] == 0
+        assert locks.get_stats()["active_threads"] == 1
+        release.set()
+        assert await running >= 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import threading
+import time
+import zlib
+from contextlib import asynccontextmanager
+
+from file_lock import FileLock
+from telemetry import THREAD_WAIT_SECONDS
+
+
+class ThreadLocks:
+    """
+    Per-conversation locks that run one thread's turns strictly in order.
+
+    Turns of the same conversation wait for each other in arrival order
+    (asyncio locks wake waiters first-in, first-out); turns of different
+    conversations never contend. A lock exists only while some request holds
+    or waits for it, so idle conversations cost nothing.
+
+    With ``lock_dir`` the turn also takes a file lock shared with the other
+    server processes, so a conversation runs one turn at a time whichever
+    worker serves it. Conversations are hashed onto ``stripes`` lock files,
+    so the rare pair of conversations sharing a stripe also wait for each
+    other.
+    """
+
+    # Seconds between attempts on a file lock held by another process
+    POLL_SECONDS = 0.02
+
+    def __init__(self, lock_dir: str = None, stripes: int = 1024):
+        """
+        Args:
+            lock_dir: Directory of file locks shared by every server process (None: this process only)
+            stripes: Number of lock files conversations are spread over
+        """
+        self.lock_dir = lock_dir
+        self.stripes = max(1, stripes)
+        self._locks = {}
+        self._stats_lock = threading.Lock()
+        self.acquired = 0
+        self.contended = 0
+        self.max_queued = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _record(self, waited: float, ahead: int):
+        THREAD_WAIT_SECONDS.observe(waited)
+        with self._stats_lock:
+            self.acquired += 1
+            if ahead:
+                self.contended += 1
+            self.max_queued = max(self.max_queued, ahead)
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+
+    @asynccontextmanager
+    async def hold(self, key: str):
+        """
+        Hold a conversation's lock for the duration of a turn.
+
+        Args:
+            key: Conversation key (unique across users)
+
+        Yields:
+            Seconds spent waiting for earlier turns of the same conversation
+        """
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = {"lock": asyncio.Lock(), "users": 0}
+        # Turns of this conversation already running or queued
+        ahead = entry["users"]
+        entry["users"] += 1
+        try:
+            started = time.perf_counter()
+            async with entry["lock"]:
+                file_lock = await self._acquire_file_lock(key)
+                try:
+                    waited = time.perf_counter() - started
+                    self._record(waited, ahead)
+                    yield waited
+                finally:
+                    if file_lock is not None:
+                        file_lock.release()
+        finally:
+            entry["users"] -= 1
+            if entry["users"] == 0:
+                del self._locks[key]
+
+    async def _acquire_file_lock(self, key: str):
+        """Take the conversation's cross-process lock, polling so cancellation stays safe."""
+        if self.lock_dir is None:
+            return None
+        stripe = zlib.crc32(key.encode("utf-8")) % self.stripes
+        file_lock = FileLock(os.path.join(self.lock_dir, f"thread-{stripe}.lock"))
+        while not file_lock.try_acquire():
+            await asyncio.sleep(self.POLL_SECONDS)
+        return file_lock
+
+    def get_stats(self) -> dict:
+        """Get live lock count, contention and time spent waiting on a thread."""
+        with self._stats_lock:
+            return {
+                "active_threads": len(self._locks),
+                "cross_process": self.lock_dir is not None,
+                "acquired": self.acquired,
+                "contended": self.contended,
+                "max_queued": self.max_queued,
+                "avg_wait_ms": round(self._total_wait / self.acquired * 1000, 2) if self.acquired else 0.0,
+                "max_wait_ms": round(self._max_wait * 1000, 2),
+            }
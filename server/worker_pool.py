@@ -0,0 +1,152 @@
+import asyncio
+import math
+import threading
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+
+
+class QueueFullError(Exception):
+    """Raised when the worker pool cannot admit another request."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Agent worker pool is at capacity")
+        self.retry_after = retry_after
+
+
+class AgentWorkerPool:
+    """
+    Bounded pool with admission control for agent turns.
+    
+    Turns are coroutines run on the event loop via ``run_async`` (or inside
+    ``slot``), limited by a concurrency slot count rather than threads.
+    Requests beyond the running slots wait in a bounded queue, as do
+    requests admitted but still waiting on their conversation's lock.
+    """
+
+    def __init__(self, max_queue: int, max_async_concurrency: int = 100):
+        self.max_queue = max_queue
+        self.max_async_concurrency = max_async_concurrency
+        self._async_slots = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_exec = 0.0
+        self._max_exec = 0.0
+
+    def _retry_after(self) -> int:
+        """Estimate how many seconds until a queue slot frees up."""
+        finished = self._completed + self._failed
+        avg_exec = self._total_exec / finished if finished else 1.0
+        return max(1, math.ceil(avg_exec * (self._queued + 1) / self.max_async_concurrency))
+
+    def _admit(self):
+        """Reserve a queue slot or raise if the queue is full."""
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                raise QueueFullError(self._retry_after())
+            self._queued += 1
+
+    def _mark_started(self, submitted_at: float) -> float:
+        """Move a request from the queue to running and record its wait."""
+        started_at = time.perf_counter()
+        wait = started_at - submitted_at
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+        return started_at
+
+    def _mark_finished(self, started_at: float, failed: bool):
+        """Record execution time and outcome of a finished request."""
+        elapsed = time.perf_counter() - started_at
+        with self._lock:
+            self._running -= 1
+            self._total_exec += elapsed
+            self._max_exec = max(self._max_exec, elapsed)
+            if failed:
+                self._failed += 1
+            else:
+                self._completed += 1
+
+    async def run_async(self, coro_func, *args, **kwargs):
+        """
+        Run a coroutine function under the pool's admission control.
+
+        Args:
+            coro_func: Coroutine function to await
+            *args: Positional arguments for the coroutine function
+            **kwargs: Keyword arguments for the coroutine function
+
+        Returns:
+            The coroutine's return value
+
+        Raises:
+            QueueFullError: If the pending queue is already at capacity
+        """
+        async with self.slot():
+            return await coro_func(*args, **kwargs)
+
+    @asynccontextmanager
+    async def slot(self, wait_for=None):
+        """
+        Hold one async concurrency slot for the duration of the block.
+
+        Args:
+            wait_for: Optional async context manager (e.g. the conversation's
+                lock) entered after admission and before taking a slot, and
+                held until the slot is released. Waiting on it counts against
+                the queue, so those waiters are bounded too. Its value is yielded.
+
+        Raises:
+            QueueFullError: If the pending queue is already at capacity
+        """
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.max_async_concurrency)
+
+        self._admit()
+        submitted_at = time.perf_counter()
+        async with AsyncExitStack() as stack:
+            try:
+                value = await stack.enter_async_context(wait_for) if wait_for is not None else None
+                await self._async_slots.acquire()
+            except BaseException:
+                with self._lock:
+                    self._queued -= 1
+                raise
+
+            started_at = self._mark_started(submitted_at)
+            failed = False
+            try:
+                yield value
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                self._mark_finished(started_at, failed)
+                self._async_slots.release()
+
+    def get_stats(self) -> dict:
+        """Get queue depth, wait time and execution time statistics."""
+        with self._lock:
+            started = self._completed + self._failed + self._running
+            finished = self._completed + self._failed
+            return {
+                "max_async_concurrency": self.max_async_concurrency,
+                "max_queue": self.max_queue,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._total_wait / started * 1000, 2) if started else 0.0,
+                "max_wait_ms": round(self._max_wait * 1000, 2),
+                "avg_exec_ms": round(self._total_exec / finished * 1000, 2) if finished else 0.0,
+                "max_exec_ms": round(self._max_exec * 1000, 2),
+            }